@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""语料级规则统计：在整个论文语料库上并行运行 check_aigc，汇总各规则命中情况
+
+用于调 rules.json：统计每条规则的命中数、命中文件数、每千字命中率、
+各严重级别的逐文件分布和连接词频次。文件按批分发到进程池（map），
+主进程逐批合并（reduce），每批结果追加写入检查点文件，中断后重新运行
+同一命令即可跳过已完成（大小与 mtime 未变）的文件继续。
+
+可选 --labels 提供人工标注（JSONL，每行 {"file": 相对路径, "line": 行号,
+"rule": 规则 ID, "fp": true/false}），报告中会给出各规则的误报率。
+
+用法:
+    python3 scripts/aigc_analytics.py corpus/ --output report.json
+    python3 scripts/aigc_analytics.py corpus/ --csv rules.csv --jobs 8
+    python3 scripts/aigc_analytics.py corpus/ --labels labels.jsonl --output report.json
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+import aigc_rules
+import check_aigc
+
+# 逐文件命中数直方图的分桶下界：0 / 1 / 2-4 / 5-9 / 10-19 / 20-49 / 50+
+HIST_BOUNDS = (0, 1, 2, 5, 10, 20, 50)
+
+CONNECTIVE_WORD = re.compile(r"连接词“(.+?)”")
+
+
+def _hist_label(n: int) -> str:
+    for lo, hi in zip(HIST_BOUNDS, HIST_BOUNDS[1:]):
+        if n < hi:
+            return str(lo) if hi - lo == 1 else f"{lo}-{hi - 1}"
+    return f"{HIST_BOUNDS[-1]}+"
+
+
+# ── map：工作进程内逐文件检查 ────────────────────────────────
+
+_worker_labels: dict[str, dict[tuple[int, str], bool]] = {}
+
+
+def _init_worker(labels: dict[str, dict[tuple[int, str], bool]]) -> None:
+    global _worker_labels
+    _worker_labels = labels
+
+
+def analyze_file(path: str, rel: str, target_format: str) -> dict:
+    """检查单个文件，返回可合并的计数记录（不保留诊断本身）"""
+    text, _ = check_aigc.decode_source(Path(path).read_bytes())
+    lines = text.splitlines()
+    rules, connectives = check_aigc.compile_rules(target_format)
+    in_block_math, in_protected_env = check_aigc.precompute_envs(lines, target_format)
+    diagnostics = check_aigc.check_lines(
+        lines,
+        0,
+        len(lines),
+        rules,
+        connectives,
+        target_format,
+        in_block_math,
+        in_protected_env,
+    )
+
+    hits, severity, words = Counter(), Counter(), Counter()
+    rule_severity = {}
+    labels = _worker_labels.get(rel, {})
+    labeled = {}  # rule -> [已标注命中数, 误报数]
+    for d in diagnostics:
+        hits[d["rule"]] += 1
+        severity[d["severity"]] += 1
+        rule_severity[d["rule"]] = d["severity"]
+        if d["rule"] == "AIGC-CONN":
+            m = CONNECTIVE_WORD.search(d["message"])
+            if m:
+                words[m.group(1)] += 1
+        fp = labels.get((d["line"], d["rule"]))
+        if fp is not None:
+            counts = labeled.setdefault(d["rule"], [0, 0])
+            counts[0] += 1
+            counts[1] += int(fp)
+
+    return {
+        "format": target_format,
+        "chars": len(text),
+        "cjk_chars": len(re.findall(r"[\u4e00-\u9fff]", text)),
+        "rules": dict(hits),
+        "rule_severity": rule_severity,
+        "severity": dict(severity),
+        "connectives": dict(words),
+        "labeled": labeled,
+    }
+
+
+def _analyze_batch(batch: list[tuple[str, str, str]]) -> list[tuple[str, dict]]:
+    """一个批次的文件依次检查；单个文件失败只记录错误，不影响整批"""
+    out = []
+    for path, rel, target_format in batch:
+        try:
+            out.append((rel, analyze_file(path, rel, target_format)))
+        except (OSError, UnicodeDecodeError) as e:
+            out.append((rel, {"error": f"{type(e).__name__}: {e}"}))
+    return out
+
+
+# ── 语料遍历与检查点 ────────────────────────────────────────
+
+
+def collect_corpus(root: str, target_format: str) -> list[tuple]:
+    """递归收集语料文件：[(路径, 相对路径, 格式, size, mtime_ns)]，按路径排序"""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            fmt = check_aigc.infer_format(name, None)
+            if fmt is None or (target_format != "auto" and fmt != target_format):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            files.append((path, rel, fmt, st.st_size, st.st_mtime_ns))
+    return files
+
+
+def load_labels(path: str | None) -> tuple[dict, str]:
+    """读取人工标注，返回 ({相对路径: {(行号, 规则): 是否误报}}, 内容指纹)"""
+    if not path:
+        return {}, ""
+    raw = Path(path).read_bytes()
+    labels: dict[str, dict[tuple[int, str], bool]] = {}
+    for n, line in enumerate(raw.decode("utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            key = (int(item["line"]), item["rule"])
+            labels.setdefault(item["file"], {})[key] = bool(item["fp"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[WARN] 标注文件第 {n} 行无法解析，已跳过: {e}", file=sys.stderr)
+    return labels, hashlib.sha1(raw).hexdigest()[:12]
+
+
+def load_checkpoint(path: Path, header: dict) -> dict[str, dict]:
+    """读取检查点：头部（规则/标注指纹、语料根）一致时返回 {相对路径: 记录}
+
+    最后一行可能因中断只写了一半，解析失败的行直接忽略。
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {}
+    if not lines:
+        return {}
+    try:
+        if json.loads(lines[0]) != header:
+            print(
+                "[INFO] 规则、标注或语料目录已变化，检查点作废，从头开始",
+                file=sys.stderr,
+            )
+            return {}
+    except ValueError:
+        return {}
+    done = {}
+    for line in lines[1:]:
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        done[item["path"]] = item
+    return done
+
+
+# ── reduce：合并为报告 ──────────────────────────────────────
+
+
+def reduce_records(records: list[tuple[str, dict]]) -> dict:
+    """把逐文件记录合并成一份报告"""
+    files, failed = 0, []
+    chars = cjk_chars = 0
+    hits, doc_freq, severity, words = Counter(), Counter(), Counter(), Counter()
+    rule_severity: dict[str, str] = {}
+    labeled: dict[str, list[int]] = {}
+    # 严重级别 -> {分桶: 文件数}
+    hist = {sev: Counter() for sev in ("error", "warning", "info")}
+    by_format = Counter()
+
+    for rel, r in records:
+        if "error" in r:
+            failed.append({"file": rel, "error": r["error"]})
+            continue
+        files += 1
+        by_format[r["format"]] += 1
+        chars += r["chars"]
+        cjk_chars += r["cjk_chars"]
+        hits.update(r["rules"])
+        doc_freq.update(r["rules"].keys())
+        severity.update(r["severity"])
+        words.update(r["connectives"])
+        rule_severity.update(r["rule_severity"])
+        for sev, counter in hist.items():
+            counter[_hist_label(r["severity"].get(sev, 0))] += 1
+        for rule_id, (n, fp) in r["labeled"].items():
+            acc = labeled.setdefault(rule_id, [0, 0])
+            acc[0] += n
+            acc[1] += fp
+
+    bucket_order = [_hist_label(lo) for lo in HIST_BOUNDS]
+    rules = {}
+    for rule_id, n in sorted(hits.items(), key=lambda kv: (-kv[1], kv[0])):
+        n_labeled, n_fp = labeled.get(rule_id, (0, 0))
+        rules[rule_id] = {
+            "severity": rule_severity.get(rule_id, "info"),
+            "hits": n,
+            "files": doc_freq[rule_id],
+            "per_1k_chars": round(n * 1000 / chars, 4) if chars else 0.0,
+            "labeled": n_labeled,
+            "false_positives": n_fp,
+            "fp_rate": round(n_fp / n_labeled, 4) if n_labeled else None,
+        }
+    return {
+        "files": files,
+        "formats": dict(by_format),
+        "chars": chars,
+        "cjk_chars": cjk_chars,
+        "severity": {sev: severity.get(sev, 0) for sev in ("error", "warning", "info")},
+        "severity_histogram": {
+            sev: {b: counter.get(b, 0) for b in bucket_order}
+            for sev, counter in hist.items()
+        },
+        "rules": rules,
+        "connectives": dict(words.most_common()),
+        "failed": failed,
+    }
+
+
+def write_csv(report: dict, path: str) -> None:
+    """每条规则一行的 CSV（Excel 可直接打开，带 BOM）"""
+    fields = [
+        "rule",
+        "severity",
+        "hits",
+        "files",
+        "per_1k_chars",
+        "labeled",
+        "false_positives",
+        "fp_rate",
+    ]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for rule_id, r in report["rules"].items():
+            row = [r[k] if r[k] is not None else "" for k in fields[1:]]
+            writer.writerow([rule_id] + row)
+
+
+# ── 入口 ──────────────────────────────────────────────────
+
+
+def run(
+    corpus: str,
+    target_format: str = "auto",
+    jobs: int | None = None,
+    checkpoint: str | None = None,
+    labels_path: str | None = None,
+    batch_size: int = 32,
+) -> dict:
+    """遍历语料、并行检查并返回报告；已完成的文件按检查点跳过"""
+    labels, labels_digest = load_labels(labels_path)
+    header = {
+        "corpus": os.path.abspath(corpus),
+        "rules": aigc_rules.rules_fingerprint()[:12],
+        "labels": labels_digest,
+    }
+
+    files = collect_corpus(corpus, target_format)
+    ckpt_path = Path(checkpoint) if checkpoint else None
+    done = load_checkpoint(ckpt_path, header) if ckpt_path else {}
+    pending = [
+        (path, rel, fmt)
+        for path, rel, fmt, size, mtime in files
+        if (done.get(rel) or {}).get("stat") != [size, mtime]
+    ]
+    stats = {rel: [size, mtime] for _, rel, _, size, mtime in files}
+    print(
+        f"[INFO] 语料 {len(files)} 个文件，检查点命中 {len(files) - len(pending)} 个，"
+        f"待检查 {len(pending)} 个",
+        file=sys.stderr,
+    )
+
+    ckpt = None
+    if ckpt_path:
+        fresh = not done
+        if not fresh:
+            # 上次中断可能留下半行，先补换行，避免与新记录粘连
+            with open(ckpt_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                fresh_line = f.read(1) == b"\n"
+        ckpt = open(ckpt_path, "w" if fresh else "a", encoding="utf-8")
+        if fresh:
+            ckpt.write(json.dumps(header, ensure_ascii=False) + "\n")
+        elif not fresh_line:
+            ckpt.write("\n")
+
+    def absorb(results: list[tuple[str, dict]]) -> None:
+        for rel, record in results:
+            item = {"path": rel, "stat": stats[rel], "result": record}
+            done[rel] = item
+            if ckpt:
+                ckpt.write(json.dumps(item, ensure_ascii=False) + "\n")
+        if ckpt:
+            ckpt.flush()
+
+    batches = iter(
+        [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+    )
+    start = time.perf_counter()
+    processed = 0
+    inflight = set()
+    try:
+        if jobs == 1 or len(pending) <= batch_size:
+            _init_worker(labels)
+            for batch in batches:
+                absorb(_analyze_batch(batch))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=jobs, initializer=_init_worker, initargs=(labels,)
+            ) as pool:
+                # 在途批次有上限，避免一次性把整个语料的任务塞进队列
+                workers = jobs or os.cpu_count() or 1
+                for b in islice(batches, workers * 2):
+                    inflight.add(pool.submit(_analyze_batch, b))
+                while inflight:
+                    finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        results = fut.result()
+                        absorb(results)
+                        processed += len(results)
+                    for b in islice(batches, len(finished)):
+                        inflight.add(pool.submit(_analyze_batch, b))
+                    print(
+                        f"\r[INFO] 已检查 {processed}/{len(pending)}",
+                        end="",
+                        file=sys.stderr,
+                    )
+                print(file=sys.stderr)
+    except KeyboardInterrupt:
+        for fut in inflight:
+            fut.cancel()
+        print("\n[INFO] 已中断；使用同一检查点重新运行即可继续", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if ckpt:
+            ckpt.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"[TIME] 检查 {len(pending)} 个文件：{elapsed * 1000:.1f} ms", file=sys.stderr)
+    return reduce_records([(rel, done[rel]["result"]) for _, rel, _, _, _ in files])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语料级 AIGC 规则命中统计")
+    parser.add_argument("corpus", help="语料目录（递归收集 .tex/.md/.txt）")
+    parser.add_argument(
+        "--format",
+        choices=["auto", "latex", "markdown", "plain"],
+        default="auto",
+        help="只统计指定格式的文件（默认: auto，按扩展名推断）",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="并行进程数（默认按 CPU 核数，1 表示不开进程池）",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        metavar="FILE",
+        help="检查点文件（默认: <output>.ckpt.jsonl；中断后重跑同一命令即可续跑）",
+    )
+    parser.add_argument(
+        "--labels", default=None, metavar="FILE", help="人工标注 JSONL，用于计算误报率"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        metavar="FILE",
+        help="JSON 报告输出路径（默认输出到终端）",
+    )
+    parser.add_argument(
+        "--csv", default=None, metavar="FILE", help="另存每条规则一行的 CSV"
+    )
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.corpus):
+        print(f"Error: directory not found: {args.corpus}", file=sys.stderr)
+        sys.exit(1)
+
+    checkpoint = args.checkpoint
+    if checkpoint is None and args.output:
+        checkpoint = args.output + ".ckpt.jsonl"
+
+    report = run(args.corpus, args.format, args.jobs, checkpoint, args.labels)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        print(f"[OK] 报告已写入 {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"[OK] CSV 已写入 {args.csv}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
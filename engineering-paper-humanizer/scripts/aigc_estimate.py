@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""check_aigc.py --estimate 的实现：分层抽样估计 AIGC 密度（带置信区间）
+
+批量筛查成千上万份稿件时不需要逐条诊断，只要每份文档可靠的密度估计。
+估计模式只对抽中的段落运行规则引擎和突发性检测：
+
+- 抽样单元：检查器统一切分的段落（check_aigc.paragraph_ranges），每个单元
+  从段落首行延伸到下一段首行之前，段间的标题、环境边界行等也归入某个单元。
+  因此全部单元的命中数之和与完整检查完全一致，全抽时估计即精确值。
+- 分层：按章节（LaTeX \\section / Markdown 一、二级标题，与 --summary 相同），
+  章节过多时把相邻章节合并为段落数相近的若干层；各层按段落数比例分配样本，
+  每层至少 2 段以便估计方差。
+- 估计量：分层合并比率估计（命中数 / 汉字数 × 1000），方差用线性化公式并带
+  有限总体校正，给出 95% 置信区间。汉字数对全文逐行计数（开销很小），与
+  --summary 的分母一致，估计结果可与精确运行直接对比。
+- 样本量：先抽试点样本估计方差，再按 --precision（总密度区间半宽占估计值的
+  百分比）算出所需段落数补抽，直到达到精度或全部抽完。
+- 批量：未指定 --format 时每个文件按扩展名推断格式；读取失败的文件单独报告
+  （不中断其余文件，退出码为 1），--json 始终输出列表。
+
+用法:
+    python3 scripts/check_aigc.py <file.tex> --estimate                    # ±10% 精度
+    python3 scripts/check_aigc.py corpus/*.tex corpus/*.md --estimate --precision 20   # 批量粗筛
+    python3 scripts/check_aigc.py <file.tex> --estimate --json --seed 7
+"""
+
+from __future__ import annotations
+
+import math
+import random
+
+import check_aigc
+from aigc_summary import section_starts
+from check_aigc import SEVERITY_LEVELS
+
+# 估计的密度指标（均为 次/千字）；hits 为全部命中，决定样本量
+METRICS = ("hits", "error", "warning", "info", "connectives", "burstiness")
+
+# 95% 置信水平的正态分位数
+Z_95 = 1.96
+
+# 试点样本的段落数下限
+PILOT_PARAGRAPHS = 30
+
+# 分层数上限：每层至少抽 2 段，层数过多时试点样本就会接近全抽
+MAX_STRATA = 10
+
+# 区间半宽的下限（次/千字）：密度接近 0 时相对精度没有意义，
+# 半宽小于该值即视为足够精确，避免为几乎干净的文档抽遍全文
+MIN_HALF_WIDTH = 0.5
+
+# 每轮补抽至少增加的段落数，防止按方差估算的样本量过于乐观时反复小步补抽
+MIN_STEP = 10
+
+
+def sampling_units(
+    lines: list[str], start: int, end: int, target_format: str, in_protected_env
+) -> list[tuple[int, int]]:
+    """把 [start, end) 切成抽样单元 [(lo, hi)]：每个单元恰好含一个段落
+
+    单元首尾相接覆盖整个范围；没有任何段落时整个范围为一个单元。
+    """
+    starts = [
+        lo
+        for lo, _ in check_aigc.paragraph_ranges(
+            lines, start, end, target_format, in_protected_env
+        )
+    ]
+    if not starts:
+        return [(start, end)]
+    starts[0] = start
+    return list(zip(starts, starts[1:] + [end]))
+
+
+def _merge_sections(sections: list[list[int]], total: int) -> list[list[int]]:
+    """章节数超过 MAX_STRATA 时，按顺序把相邻章节合并为段落数相近的层"""
+    if len(sections) <= MAX_STRATA:
+        return sections
+    size = total / MAX_STRATA
+    strata: list[list[int]] = [[]]
+    for members in sections:
+        if len(strata[-1]) >= size:
+            strata.append([])
+        strata[-1].extend(members)
+    return strata
+
+
+def _allocate(strata: list[list[int]], taken: list[int], n: int) -> list[int]:
+    """按层大小比例把总样本量 n 分配到各层（不少于已抽数，每层至少 2 段）"""
+    total = sum(len(s) for s in strata)
+    want = []
+    for size, have in zip((len(s) for s in strata), taken):
+        share = math.ceil(n * size / total) if total else 0
+        want.append(min(size, max(have, share, 2)))
+    return want
+
+
+def _ratio(
+    strata: list[list[int]], taken: list[int], ys: dict[int, dict], xs: list[int], key: str
+) -> tuple[float, float]:
+    """分层合并比率估计，返回 (密度, 标准误)，单位 次/千字"""
+    y_hat = x_hat = 0.0
+    for units, n in zip(strata, taken):
+        if n:
+            size = len(units)
+            y_hat += size * sum(ys[u][key] for u in units[:n]) / n
+            x_hat += size * sum(xs[u] for u in units[:n]) / n
+    if x_hat <= 0:
+        return 0.0, 0.0
+    r = y_hat / x_hat
+    var = 0.0
+    for units, n in zip(strata, taken):
+        size = len(units)
+        if n < 2 or n >= size:
+            continue  # 全抽的层没有抽样误差
+        d = [ys[u][key] - r * xs[u] for u in units[:n]]
+        mean = sum(d) / n
+        s2 = sum((v - mean) ** 2 for v in d) / (n - 1)
+        var += size * size * (1 - n / size) * s2 / n
+    return r * 1000, math.sqrt(var) / x_hat * 1000
+
+
+def estimate_text(
+    text: str,
+    target_format: str = "latex",
+    section: int | None = None,
+    severity: str | None = None,
+    precision: int = 10,
+    seed: int = 0,
+) -> dict:
+    """抽样估计一份文本的各项密度，返回结果字典（字段见 format_estimates）"""
+    rules, connectives = check_aigc.compile_rules(target_format)
+    threshold = SEVERITY_LEVELS[severity] if severity else 0
+    if threshold:
+        rules = [
+            r for r in rules if SEVERITY_LEVELS.get(r["severity"], 0) >= threshold
+        ]
+    info_enabled = threshold <= SEVERITY_LEVELS["info"]
+
+    lines = text.splitlines()
+    in_block_math, in_protected_env = check_aigc.precompute_envs(lines, target_format)
+    start, end = check_aigc.section_range(lines, section, target_format)
+    cjk = check_aigc.cjk_counts(lines, start, end, target_format, in_protected_env)
+    units = sampling_units(lines, start, end, target_format, in_protected_env)
+    xs = [sum(cjk[lo:hi]) for lo, hi in units]
+
+    # 分层：按单元首行所在章节；层内顺序随机打乱，抽前 n 个即无放回简单随机抽样
+    bounds = [i for i, _ in section_starts(lines, target_format)]
+    by_section: dict[int, list[int]] = {}
+    k = 0
+    for u, (lo, _) in enumerate(units):
+        while k < len(bounds) and bounds[k] <= lo:
+            k += 1
+        by_section.setdefault(k, []).append(u)
+    rng = random.Random(seed)
+    strata = _merge_sections([by_section[k] for k in sorted(by_section)], len(units))
+    for members in strata:
+        rng.shuffle(members)
+
+    ys: dict[int, dict] = {}
+
+    def evaluate(u: int) -> None:
+        lo, hi = units[u]
+        y = dict.fromkeys(METRICS, 0)
+        for _, _, rule in check_aigc.iter_rule_hits(
+            lines, lo, hi, rules, target_format, in_block_math, in_protected_env
+        ):
+            y[rule["severity"]] = y.get(rule["severity"], 0) + 1
+        if info_enabled:
+            if connectives:
+                for _ in check_aigc.iter_connective_hits(
+                    lines,
+                    lo,
+                    hi,
+                    connectives,
+                    target_format,
+                    in_block_math,
+                    in_protected_env,
+                ):
+                    y["connectives"] += 1
+            y["burstiness"] = len(
+                check_aigc.check_burstiness(
+                    lines, lo, hi, target_format, in_protected_env
+                )
+            )
+            y["info"] += y["connectives"] + y["burstiness"]
+        y["hits"] = y["error"] + y["warning"] + y["info"]
+        ys[u] = y
+
+    total = len(units)
+    taken = [0] * len(strata)
+    n = total if precision <= 0 else min(total, max(PILOT_PARAGRAPHS, 2 * len(strata)))
+    while True:
+        want = _allocate(strata, taken, n)
+        for h, units_h in enumerate(strata):
+            for u in units_h[taken[h] : want[h]]:
+                evaluate(u)
+            taken[h] = want[h]
+        sampled = sum(taken)
+        density, se = _ratio(strata, taken, ys, xs, "hits")
+        target = max(density * precision / 100, MIN_HALF_WIDTH)
+        if sampled >= total or Z_95 * se <= target:
+            break
+        # 比例分配下 Var = A (N/n - 1) / X²，解出达到目标半宽所需的 n
+        a = (se / 1000 * sum(xs)) ** 2 / (total / sampled - 1)
+        need = total / (1 + (target / 1000 * sum(xs) / Z_95) ** 2 / a)
+        n = min(total, max(math.ceil(need), sampled + MIN_STEP))
+
+    result = {
+        "format": target_format,
+        "exact": sampled >= total,
+        "paragraphs": total,
+        "sampled": sampled,
+        "strata": len(strata),
+        "cjk_chars": sum(xs),
+        "sampled_cjk_chars": sum(xs[u] for u in ys),
+        "precision": precision,
+        "confidence": 0.95,
+        "density": {},
+    }
+    sampled_chars = result["sampled_cjk_chars"]
+    for key in METRICS:
+        density, se = _ratio(strata, taken, ys, xs, key)
+        high = density + Z_95 * se
+        if not result["exact"] and sampled_chars and not any(y[key] for y in ys.values()):
+            # 样本中一次都没命中时标准误为 0，区间退化为 [0, 0]；
+            # 改用“三分法则”给出 95% 上界（约 3 次 / 已抽汉字数）
+            high = 3000 / sampled_chars
+        result["density"][key] = {
+            "estimate": round(density, 2),
+            "low": round(max(0.0, density - Z_95 * se), 2),
+            "high": round(high, 2),
+        }
+    return result
+
+
+def estimate_file(
+    filepath: str,
+    target_format: str | None = None,
+    section: int | None = None,
+    severity: str | None = None,
+    precision: int = 10,
+    seed: int = 0,
+) -> dict:
+    """估计一个文件；target_format 为 None 时按扩展名推断
+
+    读取失败不中断批量估计，返回 {"file", "error"}。
+    """
+    try:
+        text = check_aigc.load_source(filepath)
+    except (OSError, UnicodeDecodeError) as e:
+        return {"file": filepath, "error": check_aigc.source_error(filepath, e)}
+    fmt = target_format or check_aigc.infer_format(filepath)
+    result = estimate_text(text, fmt, section, severity, precision, seed)
+    return {"file": filepath, **result}
+
+
+def _interval(d: dict) -> str:
+    return f"{d['estimate']:.1f} [{d['low']:.1f}, {d['high']:.1f}]"
+
+
+def format_estimates(results: list[dict]) -> str:
+    """每份文档一行：抽样比例、总密度及 95% 区间、各分项密度（次/千字）"""
+    out = [
+        "密度单位：次/千字，方括号内为 95% 置信区间；* 表示已全抽（精确值）",
+        f"{'抽样':>11}  {'总密度':<20} {'错误':<16} {'警告':<16} {'连接词':<16} "
+        f"{'低突发':<16} 文件",
+    ]
+    for r in results:
+        if "error" in r:
+            out.append(f"{'读取失败':>9}   {r['error']}")
+            continue
+        d = r["density"]
+        mark = "*" if r["exact"] else " "
+        out.append(
+            f"{r['sampled']:>5}/{r['paragraphs']:<5}{mark} {_interval(d['hits']):<20} "
+            f"{_interval(d['error']):<16} {_interval(d['warning']):<16} "
+            f"{_interval(d['connectives']):<16} {_interval(d['burstiness']):<16} "
+            f"{r['file']}"
+        )
+    return "\n".join(out)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""check_aigc.py --fix 的实现：一次扫描应用全部机械式修复
+
+只处理 rules.json 中带 "autofix" 字段的规则，且只收录不改变语义、也不会
+引出新诊断的确定性改写（\cite 与标点的相对位置、\cite 前的空格、裸百分号）。
+破折号、连续括号等需要结合上下文改写的问题只报告不修复。修复与检查共用同一套掩码：注释、
+块级数学/受保护环境、行内数学内不会被改动，且只有检查器本身会报告的
+位置才会被改写。同一行内的候选改写按起点排序、取互不重叠的区间，
+整份文件改完后原子写回（临时文件 + os.replace）。
+
+用法:
+    python3 scripts/check_aigc.py <file.tex> --fix          # 修复并输出剩余诊断
+    python3 scripts/check_aigc.py <file.tex> --fix --json   # {"fixed": [...], "diagnostics": [...]}
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+
+import check_aigc
+
+
+def compile_autofixes(rules: list[dict]) -> list[tuple[dict, list]]:
+    """挑出带 autofix 的规则，预编译改写正则：[(rule, [(regex, replace), ...])]"""
+    fixable = []
+    for rule in rules:
+        specs = rule.get("autofix")
+        if specs:
+            fixable.append(
+                (rule, [(re.compile(s["pattern"]), s["replace"]) for s in specs])
+            )
+    return fixable
+
+
+def plan_line(
+    i: int,
+    line: str,
+    fixable: list[tuple[dict, list]],
+    target_format: str,
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+) -> list[tuple[int, int, str, str]]:
+    """计算第 i 行要应用的改写，返回互不重叠的 [(start, end, replacement, rule_id)]"""
+    if target_format == "latex":
+        if line.lstrip().startswith("%"):
+            return []
+        # strip_latex_comment 只截断行尾，行内位置与原行一致
+        line_for_check = check_aigc.strip_latex_comment(line)
+    else:
+        line_for_check = line
+
+    candidates = []
+    for order, (rule, specs) in enumerate(fixable):
+        if check_aigc.rule_skipped(
+            rule["id"], i, target_format, in_block_math, in_protected_env
+        ):
+            continue
+        # 检查器会报告的位置（已去掉行内数学内的匹配）
+        reported = [
+            m.start()
+            for m in check_aigc.rule_regex(rule).finditer(line_for_check)
+            if not check_aigc.match_masked(
+                i,
+                line_for_check,
+                m.start(),
+                target_format,
+                in_block_math,
+                in_protected_env,
+            )
+        ]
+        if not reported:
+            continue
+        for regex, replace in specs:
+            for m in regex.finditer(line_for_check):
+                if any(m.start() <= p < m.end() for p in reported):
+                    candidates.append(
+                        (m.start(), order, m.end(), m.expand(replace), rule["id"])
+                    )
+
+    # 按起点（同起点按规则顺序）贪心选取互不重叠的区间
+    edits, last_end = [], -1
+    for start, _, end, replacement, rule_id in sorted(candidates):
+        if start >= last_end:
+            edits.append((start, end, replacement, rule_id))
+            last_end = end
+    return edits
+
+
+def fix_text(
+    text: str, target_format: str = "latex", section: int | None = None
+) -> tuple[str, list[dict]]:
+    """对文本应用全部安全改写，返回 (新文本, 改动列表)"""
+    rows = text.splitlines(keepends=True)
+    lines = text.splitlines()
+    rules, _ = check_aigc.compile_rules(target_format)
+    fixable = compile_autofixes(rules)
+    in_block_math, in_protected_env = check_aigc.precompute_envs(lines, target_format)
+    start_line, end_line = check_aigc.section_range(lines, section, target_format)
+
+    changes = []
+    for i in range(start_line, end_line):
+        line = lines[i]
+        edits = plan_line(
+            i, line, fixable, target_format, in_block_math, in_protected_env
+        )
+        if not edits:
+            continue
+        # 从右往左替换，前面的偏移量不受影响
+        new_line = line
+        for start, end, replacement, _ in reversed(edits):
+            new_line = new_line[:start] + replacement + new_line[end:]
+        rows[i] = new_line + rows[i][len(line) :]
+        for start, end, replacement, rule_id in edits:
+            changes.append(
+                {
+                    "line": i + 1,
+                    "column": start + 1,
+                    "rule": rule_id,
+                    "before": line[start:end],
+                    "after": replacement,
+                }
+            )
+    return "".join(rows), changes
+
+
+def write_atomic(path: str, text: str, encoding: str = "utf-8") -> None:
+    """写入同目录临时文件后 os.replace，保留原文件权限，中途失败不会留下半截文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".humanizer-fix-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def fix_file(
+    filepath: str, target_format: str = "latex", section: int | None = None
+) -> tuple[str, list[dict]]:
+    """修复文件并原子写回（无改动时不写），返回 (修复后文本, 改动列表)"""
+    if not os.path.exists(filepath):
+        print(f"Error: file not found: {filepath}", file=sys.stderr)
+        sys.exit(1)
+    # 按字节读入：原换行符（CRLF 文件写回后仍是 CRLF）与编码（GBK 模板写回后
+    # 仍是 GB18030，带 BOM 的仍带 BOM）都原样保留
+    with open(filepath, "rb") as f:
+        data = f.read()
+    try:
+        text, encoding = check_aigc.decode_source(data)
+    except UnicodeDecodeError:
+        print(f"Error: 无法识别 {filepath} 的编码（已尝试 UTF-8、GB18030）", file=sys.stderr)
+        sys.exit(1)
+    new_text, changes = fix_text(text, target_format, section)
+    if changes:
+        write_atomic(filepath, new_text, encoding)
+    return new_text, changes
+
+
+def format_changes(changes: list[dict], filepath: str) -> str:
+    """格式化改动列表"""
+    if not changes:
+        return f"[FIX] {filepath}: 无可自动修复的问题"
+    out = [f"[FIX] {filepath}: 已自动修复 {len(changes)} 处"]
+    for c in changes:
+        out.append(
+            f"  [{c['rule']}] L{c['line']}:{c['column']}  "
+            f"'{c['before']}' → '{c['after']}'"
+        )
+    return "\n".join(out)
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""规则存储与加载（check_aigc.py / generate_dict.py 等共用）
+
+支持两种存储方式：
+
+- rules.json：单文件（默认，仓库自带的规则即此形式）
+- rules/ 目录：按 类别（CITE/LATEX/PUNCT/STYLE/AIGC…）× 适用格式 分片，
+  加一个很小的 manifest.json 索引。加载时先读索引，只解析目标格式用得到
+  的分片——规则集增长到上千条时，单格式检查不必解析、过滤全部规则。
+
+scripts/rules/manifest.json 存在时优先使用目录，否则回退到 rules.json。
+规则顺序按索引中的分片顺序、分片内的文件顺序。两者并存时目录生效：
+rules.json 比 manifest.json 新（改了 rules.json 却忘了重新 split）会在
+stderr 给出警告，`index --check` 也会把两者内容不一致视为过期。
+
+目录结构:
+    rules/
+    ├── manifest.json              # {"version", "connectives", "environments", "shards": [...]}
+    ├── connectives.json           # 连接词表
+    ├── environments.json          # LaTeX 环境类别（整体跳过/受保护/数学）
+    ├── cite-latex.json            # 分片：规则数组
+    └── aigc-latex-markdown-plain.json
+
+用法:
+    python3 scripts/aigc_rules.py split                 # rules.json → rules/ 分片
+    python3 scripts/aigc_rules.py index                 # 手工增删分片后重建索引
+    python3 scripts/aigc_rules.py index --check         # 索引过期或与 rules.json 不一致时返回 1（供 CI 使用）
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.path.join(SCRIPT_DIR, "rules.json")
+RULES_DIR = os.path.join(SCRIPT_DIR, "rules")
+MANIFEST = "manifest.json"
+CONNECTIVES_FILE = "connectives.json"
+ENVIRONMENTS_FILE = "environments.json"
+
+FORMATS = ("latex", "markdown", "plain")
+MANIFEST_VERSION = 1
+
+
+def _read_json(path: str):
+    if not os.path.exists(path):
+        print(f"[ERROR] 规则文件不存在: {path}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[ERROR] 无法加载 {os.path.basename(path)}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _write_json(path: str, data) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def use_rules_dir() -> bool:
+    """是否使用分片目录（rules/manifest.json 存在）"""
+    return os.path.exists(os.path.join(RULES_DIR, MANIFEST))
+
+
+def _warn_if_stale() -> None:
+    """rules.json 比 manifest.json 新时警告一次：目录会覆盖 rules.json 的修改
+
+    标记写进环境变量，--jobs 的工作进程不再重复警告。
+    """
+    if os.environ.get("AIGC_RULES_STALE_WARNED") or not os.path.exists(RULES_FILE):
+        return
+    os.environ["AIGC_RULES_STALE_WARNED"] = "1"
+    if os.path.getmtime(RULES_FILE) > os.path.getmtime(os.path.join(RULES_DIR, MANIFEST)):
+        print(
+            "[WARN] rules.json 比 rules/manifest.json 新，但当前使用的是 rules/ 分片；"
+            "请运行 aigc_rules.py split 同步，或删除 rules/ 目录",
+            file=sys.stderr,
+        )
+
+
+def rule_formats(rule: dict) -> list[str]:
+    return rule.get("format", ["latex"])
+
+
+# ── 加载 ────────────────────────────────────────────────────
+
+
+def load_rules(format_filter: str | None = None) -> tuple[list[dict], dict]:
+    """加载规则和连接词配置
+
+    参数:
+        format_filter: "latex" | "markdown" | "plain"；None 表示全部格式
+
+    返回:
+        (rules, connectives)：connectives 为 rules.json 中的原始配置
+        （{"format", "words", ...}）；分片目录下连接词不适用于该格式时返回 {}
+    """
+    if use_rules_dir():
+        return _load_dir(format_filter)
+    data = _read_json(RULES_FILE)
+    rules = data.get("rules", [])
+    if format_filter is not None:
+        rules = [r for r in rules if format_filter in rule_formats(r)]
+    return rules, data.get("connectives", {})
+
+
+def _load_dir(format_filter: str | None) -> tuple[list[dict], dict]:
+    _warn_if_stale()
+    manifest = _read_json(os.path.join(RULES_DIR, MANIFEST))
+    rules = []
+    for shard in manifest.get("shards", []):
+        if format_filter is not None and format_filter not in shard.get("format", []):
+            continue
+        shard_rules = _read_json(os.path.join(RULES_DIR, shard["file"]))
+        if format_filter is not None:
+            # 分片按格式归类，但手工编辑后可能混入其他格式的规则
+            shard_rules = [r for r in shard_rules if format_filter in rule_formats(r)]
+        rules.extend(shard_rules)
+
+    connectives = {}
+    entry = manifest.get("connectives")
+    if entry and (format_filter is None or format_filter in entry.get("format", [])):
+        connectives = _read_json(os.path.join(RULES_DIR, entry["file"]))
+    return rules, connectives
+
+
+def load_environments() -> dict:
+    """加载 LaTeX 环境类别：{"skip": [...], "protected": [...], "math": [...]}
+
+    skip 内整体跳过检查，protected 内只检查 CITE/LATEX，math 内跳过 AIGC/PUNCT。
+    分片目录未登记 environments.json 时（旧目录）回退到 rules.json。
+    """
+    if use_rules_dir():
+        _warn_if_stale()
+        entry = _read_json(os.path.join(RULES_DIR, MANIFEST)).get("environments")
+        if entry:
+            return _read_json(os.path.join(RULES_DIR, entry["file"]))
+        if not os.path.exists(RULES_FILE):
+            return {}
+    return _read_json(RULES_FILE).get("environments", {})
+
+
+def source_files() -> list[str]:
+    """当前规则来源涉及的全部文件（目录模式下只含索引登记的分片）"""
+    if not use_rules_dir():
+        return [RULES_FILE]
+    manifest = _read_json(os.path.join(RULES_DIR, MANIFEST))
+    files = [MANIFEST]
+    for key in ("connectives", "environments"):
+        if manifest.get(key):
+            files.append(manifest[key]["file"])
+    files.extend(shard["file"] for shard in manifest.get("shards", []))
+    return [os.path.join(RULES_DIR, f) for f in files]
+
+
+def rules_fingerprint() -> str:
+    """规则内容的 sha1（单文件时与 rules.json 的 sha1 相同），供各类缓存做失效判断"""
+    import hashlib
+
+    paths = source_files()
+    if len(paths) == 1:
+        with open(paths[0], "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    h = hashlib.sha1()
+    for path in paths:
+        h.update(os.path.relpath(path, RULES_DIR).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            h.update(f.read())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def rules_signature():
+    """规则文件的 (路径, mtime, 大小) 签名，--watch 据此判断是否需要重新加载"""
+    sig = []
+    try:
+        for path in source_files():
+            st = os.stat(path)
+            sig.append((path, st.st_mtime_ns, st.st_size))
+    except (OSError, SystemExit):
+        return None
+    return tuple(sig)
+
+
+# ── 分片与索引 ──────────────────────────────────────────────
+
+
+def rule_category(rule: dict) -> str:
+    rule_id = rule.get("id", "")
+    return rule_id.split("-")[0] if "-" in rule_id else (rule_id or "MISC")
+
+
+def shard_name(category: str, formats: list[str]) -> str:
+    return f"{category.lower()}-{'-'.join(formats)}.json"
+
+
+def _canonical_formats(formats) -> list[str]:
+    known = [f for f in FORMATS if f in formats]
+    return known + sorted(set(formats) - set(FORMATS))
+
+
+def _shard_entry(name: str, rules: list[dict]) -> dict:
+    import hashlib
+
+    with open(os.path.join(RULES_DIR, name), "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    categories = sorted({rule_category(r) for r in rules})
+    formats = set()
+    for r in rules:
+        formats.update(rule_formats(r))
+    return {
+        "file": name,
+        "category": categories[0] if len(categories) == 1 else "+".join(categories),
+        "format": _canonical_formats(formats),
+        "rules": len(rules),
+        "sha1": digest,
+    }
+
+
+def build_manifest(order: list[str] | None = None) -> dict:
+    """扫描 rules/ 下的分片文件生成索引；order 指定的分片排在前面（保持原顺序）"""
+    names = sorted(
+        f
+        for f in os.listdir(RULES_DIR)
+        if f.endswith(".json")
+        and f not in (MANIFEST, CONNECTIVES_FILE, ENVIRONMENTS_FILE)
+    )
+    if order:
+        rank = {name: i for i, name in enumerate(order)}
+        names.sort(key=lambda n: (rank.get(n, len(rank)), n))
+    shards = [
+        _shard_entry(name, _read_json(os.path.join(RULES_DIR, name))) for name in names
+    ]
+    manifest = {"version": MANIFEST_VERSION, "shards": shards}
+    conn_path = os.path.join(RULES_DIR, CONNECTIVES_FILE)
+    if os.path.exists(conn_path):
+        conn = _read_json(conn_path)
+        manifest["connectives"] = {
+            "file": CONNECTIVES_FILE,
+            "format": conn.get("format", list(FORMATS)),
+        }
+    env_path = os.path.join(RULES_DIR, ENVIRONMENTS_FILE)
+    if os.path.exists(env_path):
+        envs = _read_json(env_path)
+        manifest["environments"] = {
+            "file": ENVIRONMENTS_FILE,
+            "format": envs.get("format", ["latex"]),
+        }
+    return manifest
+
+
+def _rule_key(rule: dict) -> str:
+    return json.dumps(rule, sort_keys=True, ensure_ascii=False)
+
+
+def drift_from_source(src: str = RULES_FILE) -> list[str]:
+    """比较 rules.json 与 rules/ 分片的内容，返回不一致项的说明（一致时为空）
+
+    规则按多重集比较（分片会改变顺序）；连接词和环境类别整体比较。
+    """
+    data = _read_json(src)
+    problems = []
+    shard_rules, connectives = _load_dir(None)
+    expected: dict[str, int] = {}
+    for rule in data.get("rules", []):
+        key = _rule_key(rule)
+        expected[key] = expected.get(key, 0) + 1
+    for rule in shard_rules:
+        key = _rule_key(rule)
+        expected[key] = expected.get(key, 0) - 1
+    missing = sum(n for n in expected.values() if n > 0)
+    extra = sum(-n for n in expected.values() if n < 0)
+    if missing:
+        problems.append(f"{missing} 条规则只在 rules.json 中")
+    if extra:
+        problems.append(f"{extra} 条规则只在 rules/ 分片中")
+    if connectives != data.get("connectives", {}):
+        problems.append("连接词表不一致")
+    if load_environments() != data.get("environments", {}):
+        problems.append("环境类别不一致")
+    return problems
+
+
+def split(src: str = RULES_FILE) -> dict:
+    """把单文件规则拆成 rules/ 分片并写索引；分片按首次出现的顺序排列"""
+    data = _read_json(src)
+    groups: dict[str, list[dict]] = {}
+    for rule in data.get("rules", []):
+        name = shard_name(rule_category(rule), _canonical_formats(rule_formats(rule)))
+        groups.setdefault(name, []).append(rule)
+
+    os.makedirs(RULES_DIR, exist_ok=True)
+    # 只清理旧索引登记过、这次不再生成的分片，不动目录里的其他文件
+    manifest_path = os.path.join(RULES_DIR, MANIFEST)
+    if os.path.exists(manifest_path):
+        for shard in _read_json(manifest_path).get("shards", []):
+            path = os.path.join(RULES_DIR, shard["file"])
+            if shard["file"] not in groups and os.path.exists(path):
+                os.unlink(path)
+    for name, rules in groups.items():
+        _write_json(os.path.join(RULES_DIR, name), rules)
+    if data.get("connectives"):
+        _write_json(os.path.join(RULES_DIR, CONNECTIVES_FILE), data["connectives"])
+    if data.get("environments"):
+        _write_json(os.path.join(RULES_DIR, ENVIRONMENTS_FILE), data["environments"])
+
+    manifest = build_manifest(order=list(groups))
+    _write_json(os.path.join(RULES_DIR, MANIFEST), manifest)
+    return manifest
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="规则分片与索引维护")
+    sub = parser.add_subparsers(dest="command")
+    p_split = sub.add_parser("split", help="把 rules.json 拆成 rules/ 分片目录")
+    p_split.add_argument("--src", default=RULES_FILE, help="源规则文件（默认: rules.json）")
+    p_index = sub.add_parser("index", help="扫描 rules/ 下的分片重建 manifest.json")
+    p_index.add_argument(
+        "--check", action="store_true", help="只检查索引是否最新，过期时返回 1"
+    )
+    args = parser.parse_args()
+
+    if args.command == "split":
+        manifest = split(args.src)
+        total = sum(s["rules"] for s in manifest["shards"])
+        print(
+            f"[OK] 已拆分 {total} 条规则为 {len(manifest['shards'])} 个分片: {RULES_DIR}"
+        )
+    elif args.command == "index":
+        if not os.path.isdir(RULES_DIR):
+            print(f"[ERROR] 规则目录不存在: {RULES_DIR}", file=sys.stderr)
+            sys.exit(1)
+        manifest_path = os.path.join(RULES_DIR, MANIFEST)
+        old = _read_json(manifest_path) if os.path.exists(manifest_path) else {}
+        manifest = build_manifest(order=[s["file"] for s in old.get("shards", [])])
+        if args.check:
+            if manifest != old:
+                print("[FAIL] manifest.json 已过期，请运行 aigc_rules.py index")
+                sys.exit(1)
+            drift = drift_from_source() if os.path.exists(RULES_FILE) else []
+            if drift:
+                print(
+                    f"[FAIL] rules/ 分片与 rules.json 不一致（{'；'.join(drift)}），"
+                    "请运行 aigc_rules.py split 或删除 rules.json"
+                )
+                sys.exit(1)
+            print("[OK] manifest.json 与分片一致")
+            return
+        _write_json(manifest_path, manifest)
+        print(f"[OK] 已重建索引：{len(manifest['shards'])} 个分片")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
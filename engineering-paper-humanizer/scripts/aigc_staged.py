@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""check_aigc.py --staged 的实现：直接检查暂存区（index）中的文件内容
+
+供 pre-commit 钩子使用。工作区与暂存区可能不同（只暂存了部分修改），
+因此不读工作区文件，而是：
+
+- 一次 `git diff --cached --name-only -z` 列出已暂存的新增/修改/重命名文件
+- 一个常驻 `git cat-file --batch` 进程（git_plumbing.GitSession）依次读出
+  各文件在暂存区中的 blob
+- 用内存检查器逐个检查，每种格式的规则只加载、编译一次；暂存内容很多时
+  （如首次提交整本论文）按文件分给进程池
+
+整个钩子只启动两个 git 进程，与暂存文件数量无关。
+存在 error 级诊断时退出码为 1，可直接阻止提交。
+
+用法:
+    python3 scripts/check_aigc.py --staged                   # 检查全部已暂存的 .tex/.md/.txt
+    python3 scripts/check_aigc.py --staged chapters/         # 只检查指定路径下的暂存文件
+    python3 scripts/check_aigc.py --staged --severity error  # 钩子中只显示错误
+
+.git/hooks/pre-commit 示例:
+    #!/bin/sh
+    exec python3 path/to/scripts/check_aigc.py --staged --severity error
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+
+import check_aigc
+from check_aigc import SEVERITY_LEVELS
+from git_plumbing import GitSession, run_git
+
+
+def format_of(path: str, target_format: str | None) -> str | None:
+    """按扩展名判断格式；指定了 target_format 时只接受该格式的文件"""
+    fmt = check_aigc.infer_format(path, None)
+    return fmt if target_format in (None, fmt) else None
+
+
+def staged_paths(pathspecs: list[str] | None = None) -> list[str] | None:
+    """已暂存的新增/复制/修改/重命名文件（相对仓库根目录）；不在仓库内时返回 None"""
+    args = ["diff", "--cached", "--name-only", "-z", "--diff-filter=ACMR"]
+    if pathspecs:
+        args += ["--", *pathspecs]
+    result = run_git(*args)
+    if result.returncode != 0:
+        return None
+    return [p for p in result.stdout.split("\0") if p]
+
+
+def check_blob(text: str, fmt: str) -> list[dict]:
+    """检查一个暂存文件的内容（每个进程每种格式只编译一次规则）"""
+    rules, connectives = check_aigc.compile_rules(fmt)
+    lines = text.splitlines()
+    in_block_math, in_protected_env = check_aigc.precompute_envs(lines, fmt)
+    return check_aigc.check_lines(
+        lines,
+        0,
+        len(lines),
+        rules,
+        connectives,
+        fmt,
+        in_block_math,
+        in_protected_env,
+    )
+
+
+def read_staged(targets: list[tuple[str, str]]) -> list[tuple[str, str, str]]:
+    """经同一个 cat-file --batch 进程读出各文件的暂存内容：[(路径, 格式, 文本)]"""
+    blobs = []
+    with GitSession() as git:
+        for path, fmt in targets:
+            # ":路径"（相对仓库根目录，与 diff 输出一致）即暂存区 0 号槽位中的
+            # blob；冲突未解决的文件没有 0 号槽位
+            obj = git.read_object(f":{path}") if "\n" not in path else None
+            if obj is None or obj[0].type != "blob":
+                print(f"[WARN] 无法从暂存区读取 {path}，已跳过", file=sys.stderr)
+                continue
+            try:
+                blobs.append((path, fmt, check_aigc.decode_source(obj[1])[0]))
+            except UnicodeDecodeError:
+                print(f"[WARN] 无法识别 {path} 的编码，已跳过", file=sys.stderr)
+    return blobs
+
+
+def _check_parallel(blobs: list[tuple[str, str, str]], jobs: int | None):
+    """文件多、总量大时按文件分给进程池；无法创建进程池时返回 None"""
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(jobs or os.cpu_count() or 1, len(blobs))
+    if workers < 2:
+        return None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(
+                pool.map(
+                    check_blob,
+                    [text for _, _, text in blobs],
+                    [fmt for _, fmt, _ in blobs],
+                    chunksize=max(1, len(blobs) // (workers * 4)),
+                )
+            )
+    except (OSError, NotImplementedError, AssertionError):
+        # 受限环境（无 /dev/shm、守护进程内等）退回串行
+        return None
+
+
+def check_staged(
+    pathspecs: list[str] | None = None,
+    target_format: str | None = None,
+    jobs: int | None = None,
+) -> list[dict]:
+    """检查暂存区中的文件，返回 [{"file": 路径, "diagnostics": [...]}]
+
+    参数:
+        pathspecs: 限定检查范围的 git pathspec（默认全部已暂存文件）
+        target_format: 只检查该格式的文件；None 时按扩展名推断，三种格式都检查
+        jobs: 进程数；1 为串行，None 为按 CPU 核数。暂存内容合计不少于
+            PARALLEL_MIN_LINES 行时才开进程池（常见的小提交始终串行）
+    """
+    paths = staged_paths(pathspecs)
+    if paths is None:
+        print("Error: 不在 Git 仓库内，无法使用 --staged", file=sys.stderr)
+        sys.exit(1)
+
+    targets = [(p, format_of(p, target_format)) for p in paths]
+    blobs = read_staged([(p, fmt) for p, fmt in targets if fmt])
+
+    outputs = None
+    total_lines = sum(text.count("\n") for _, _, text in blobs)
+    if jobs != 1 and len(blobs) > 1 and total_lines >= check_aigc.PARALLEL_MIN_LINES:
+        outputs = _check_parallel(blobs, jobs)
+    if outputs is None:
+        outputs = [check_blob(text, fmt) for _, fmt, text in blobs]
+    return [
+        {"file": path, "diagnostics": diagnostics}
+        for (path, _, _), diagnostics in zip(blobs, outputs)
+    ]
+
+
+def run_staged(
+    pathspecs: list[str] | None = None,
+    target_format: str | None = None,
+    severity: str | None = None,
+    as_json: bool = False,
+    jobs: int | None = None,
+) -> int:
+    """--staged 入口：输出结果并返回退出码（有 error 级诊断时为 1）"""
+    results = check_staged(pathspecs, target_format, jobs)
+    threshold = SEVERITY_LEVELS[severity] if severity else 0
+    for r in results:
+        r["diagnostics"] = [
+            d
+            for d in r["diagnostics"]
+            if SEVERITY_LEVELS.get(d["severity"], 0) >= threshold
+        ]
+    errors = sum(
+        1 for r in results for d in r["diagnostics"] if d["severity"] == "error"
+    )
+
+    if as_json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    elif not results:
+        print("[STAGED] 暂存区中没有需要检查的文件")
+    else:
+        for r in results:
+            if r["diagnostics"]:
+                print(check_aigc.format_text(r["diagnostics"], r["file"]))
+        total = sum(len(r["diagnostics"]) for r in results)
+        print(
+            f"[STAGED] 检查 {len(results)} 个暂存文件，共 {total} 条诊断，{errors} 个错误"
+        )
+    if errors:
+        print("[STAGED] 存在 error 级问题，提交已被阻止", file=sys.stderr)
+    return 1 if errors else 0
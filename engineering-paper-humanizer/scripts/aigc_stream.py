@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""check_aigc.py --stream 的实现：一个进程连续检查多份内存文本（NDJSON）
+
+改写 agent 会在内存中生成多个候选段落，挑出最好的一个再落盘。逐个写临时
+文件再各起一个进程检查，大部分时间花在进程启动和规则编译上。流模式从
+标准输入（或指定文件）逐行读取请求，每行一个 JSON 对象：
+
+    {"id": "cand-1", "text": "……", "format": "latex", "section": 2}
+
+id 原样回传（可为任意 JSON 值）；format 缺省时使用命令行 --format；
+section 可选。每处理完一行立即输出一行结果并刷新，可边写边读：
+
+    {"id": "cand-1", "format": "latex", "counts": {"error": 0, "warning": 1, "info": 3},
+     "diagnostics": [...]}
+
+配合 --group 时 diagnostics 换成 groups（见 check_aigc.group_diagnostics）。
+某一行无法解析时输出 {"id": …, "error": "…"} 并继续处理后续行。每种格式的
+规则只在首次用到时加载、编译一次。
+
+用法:
+    producer | python3 scripts/check_aigc.py --stream
+    python3 scripts/check_aigc.py --stream requests.ndjson --group --severity warning
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+
+import check_aigc
+from aigc_rules import FORMATS
+from check_aigc import SEVERITY_LEVELS
+
+
+def check_document(text: str, fmt: str, section: int | None = None) -> list[dict]:
+    """检查一份内存文本（每种格式只编译一次规则）"""
+    rules, connectives = check_aigc.compile_rules(fmt)
+    lines = text.splitlines()
+    in_block_math, in_protected_env = check_aigc.precompute_envs(lines, fmt)
+    start, end = check_aigc.section_range(lines, section, fmt)
+    return check_aigc.check_lines(
+        lines, start, end, rules, connectives, fmt, in_block_math, in_protected_env
+    )
+
+
+def parse_request(line: str, default_format: str) -> tuple[object, str, str, int | None]:
+    """解析一行请求，返回 (id, text, format, section)
+
+    不合法时抛出 ValueError，异常的第二个参数为能取到的 id（取不到为 None）
+    """
+    try:
+        doc = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"不是合法的 JSON: {e}", None) from None
+    if not isinstance(doc, dict):
+        raise ValueError("每行须为 JSON 对象", None)
+    doc_id = doc.get("id")
+    text = doc.get("text")
+    if not isinstance(text, str):
+        raise ValueError("缺少字符串字段 text", doc_id)
+    fmt = doc.get("format") or default_format
+    if fmt not in FORMATS:
+        raise ValueError(f"未知格式: {fmt}", doc_id)
+    section = doc.get("section")
+    if section is not None and (type(section) is not int or section < 1):
+        raise ValueError("section 须为正整数", doc_id)
+    return doc_id, text, fmt, section
+
+
+def run_stream(
+    source: str | None = None,
+    default_format: str = "latex",
+    severity: str | None = None,
+    group: bool = False,
+    context_hits: int = check_aigc.GROUP_CONTEXT_HITS,
+) -> int:
+    """--stream 入口：逐行读请求、逐行写结果；有无法处理的请求时返回 1"""
+    threshold = SEVERITY_LEVELS[severity] if severity else 0
+    # 协议固定为 UTF-8，不随终端 locale 变化
+    for stream in (sys.stdin, sys.stdout):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8")
+    if source in (None, "-"):
+        infile = sys.stdin
+    else:
+        try:
+            infile = open(source, encoding="utf-8")
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    out = sys.stdout
+    failed = 0
+    try:
+        for line in infile:
+            if not line.strip():
+                continue
+            try:
+                doc_id, text, fmt, section = parse_request(line, default_format)
+            except ValueError as e:
+                failed += 1
+                result = {"id": e.args[1], "error": e.args[0]}
+            else:
+                diagnostics = [
+                    d
+                    for d in check_document(text, fmt, section)
+                    if SEVERITY_LEVELS.get(d["severity"], 0) >= threshold
+                ]
+                counts = {s: 0 for s in SEVERITY_LEVELS}
+                for d in diagnostics:
+                    counts[d["severity"]] = counts.get(d["severity"], 0) + 1
+                result = {"id": doc_id, "format": fmt, "counts": counts}
+                if group:
+                    result["groups"] = check_aigc.group_diagnostics(
+                        diagnostics, context_hits
+                    )
+                else:
+                    result["diagnostics"] = diagnostics
+            out.write(json.dumps(result, ensure_ascii=False, separators=(",", ":")))
+            out.write("\n")
+            out.flush()
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+    return 1 if failed else 0
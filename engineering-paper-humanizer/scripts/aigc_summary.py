@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""check_aigc.py --summary 的实现：只计数、不出明细的 AIGC 密度摘要
+
+agent 往往只需要知道“哪一节、哪几段最严重”，好从那里开始改，而不需要
+上千条逐行诊断。摘要模式与完整检查共用同一套匹配（check_aigc.iter_rule_hits
+等），但不构造诊断字典和上下文字符串，只维护按 规则 / 严重级别 / 行 的
+计数器，再一次性汇总为：
+
+- 各章节的命中数与密度（每千汉字命中数）
+- 最需要处理的 Top-K 段落（按严重级别加权的密度，用定长小根堆选出）
+- 命中最多的规则
+
+用法:
+    python3 scripts/check_aigc.py <file.tex> --summary            # 文本摘要
+    python3 scripts/check_aigc.py <file.tex> --summary --top 10   # 列出 10 个最差段落
+    python3 scripts/check_aigc.py <file.tex> --summary --json     # 结构化摘要
+"""
+
+from __future__ import annotations
+
+import re
+import heapq
+from collections import Counter, defaultdict
+
+import check_aigc
+from check_aigc import SEVERITY_LEVELS
+
+# 段落排序时分母的下限（汉字数）：一两行的短段落命中一次就会因分母过小排到最前
+MIN_PARAGRAPH_CHARS = 100
+
+# 文本输出最多列出的章节行数；超出时只列密度最高的几节（--json 保留全部）
+MAX_SECTION_ROWS = 20
+
+_LATEX_SECTION = re.compile(r"\\section\b\*?(?:\[[^\]]*\])?(?:\{([^}]*)\})?")
+_MD_HEADING = re.compile(r"#{1,2}\s+(.*)")
+
+
+def section_starts(lines: list[str], target_format: str) -> list[tuple[int, str]]:
+    """章节起始行与标题：LaTeX 按 \\section（与 --section 编号一致），
+    Markdown 按一、二级标题；纯文本不分节"""
+    starts = []
+    for i, line in enumerate(lines):
+        if target_format == "latex":
+            m = _LATEX_SECTION.search(line)
+            if m:
+                starts.append((i, (m.group(1) or "").strip()))
+        elif target_format == "markdown":
+            m = _MD_HEADING.match(line)
+            if m:
+                starts.append((i, m.group(1).strip()))
+    return starts
+
+
+def _density(hits: int, chars: int) -> float | None:
+    return round(hits * 1000 / chars, 1) if chars else None
+
+
+def summarize_text(
+    text: str,
+    target_format: str = "latex",
+    section: int | None = None,
+    severity: str | None = None,
+    top_k: int = 5,
+) -> dict:
+    """一次扫描统计命中，返回摘要字典（字段见 format_summary）"""
+    lines = text.splitlines()
+    rules, connectives = check_aigc.compile_rules(target_format)
+    threshold = SEVERITY_LEVELS[severity] if severity else 0
+    if threshold:
+        # 低于阈值的规则直接不跑，比事后过滤更省
+        rules = [
+            r for r in rules if SEVERITY_LEVELS.get(r["severity"], 0) >= threshold
+        ]
+    info_enabled = threshold <= SEVERITY_LEVELS["info"]
+    in_block_math, in_protected_env = check_aigc.precompute_envs(lines, target_format)
+    start, end = check_aigc.section_range(lines, section, target_format)
+
+    # ── 计数：行 → {规则: 次数} ──
+    line_hits: dict[int, Counter] = defaultdict(Counter)
+    rule_severity = {"AIGC-CONN": "info", "BURST-001": "info"}
+    for i, _, rule in check_aigc.iter_rule_hits(
+        lines, start, end, rules, target_format, in_block_math, in_protected_env
+    ):
+        line_hits[i][rule["id"]] += 1
+        rule_severity[rule["id"]] = rule["severity"]
+    if info_enabled:
+        if connectives:
+            for hit in check_aigc.iter_connective_hits(
+                lines,
+                start,
+                end,
+                connectives,
+                target_format,
+                in_block_math,
+                in_protected_env,
+            ):
+                line_hits[hit[0]]["AIGC-CONN"] += 1
+        for d in check_aigc.check_burstiness(
+            lines, start, end, target_format, in_protected_env
+        ):
+            line_hits[d["line"] - 1]["BURST-001"] += 1
+
+    cjk = check_aigc.cjk_counts(lines, start, end, target_format, in_protected_env)
+
+    def tally(lo: int, hi: int) -> tuple[Counter, Counter]:
+        rules_c, sev_c = Counter(), Counter()
+        for i in range(lo, hi):
+            c = line_hits.get(i)
+            if c:
+                rules_c.update(c)
+                for rule_id, n in c.items():
+                    sev_c[rule_severity[rule_id]] += n
+        return rules_c, sev_c
+
+    # ── 章节 ──
+    starts = section_starts(lines, target_format)
+    bounds = [s for s in starts if start <= s[0] < end]
+    if not bounds or bounds[0][0] > start:
+        bounds.insert(0, (start, ""))
+    all_starts = [s[0] for s in starts]
+    sections = []
+    for k, (lo, title) in enumerate(bounds):
+        hi = bounds[k + 1][0] if k + 1 < len(bounds) else end
+        rules_c, sev_c = tally(lo, hi)
+        chars = sum(cjk[lo:hi])
+        if not chars and not rules_c:
+            continue
+        number = all_starts.index(lo) + 1 if lo in all_starts else 0
+        hits = sum(rules_c.values())
+        sections.append(
+            {
+                "section": number,
+                "title": title or ("（首节之前）" if number == 0 else ""),
+                "line": lo + 1,
+                "cjk_chars": chars,
+                "hits": hits,
+                "severity": {s: sev_c[s] for s in SEVERITY_LEVELS},
+                "density": _density(hits, chars),
+            }
+        )
+
+    # ── 段落：定长小根堆保留加权密度最高的 top_k 个 ──
+    heap: list[tuple] = []
+
+    def flush(order: int, para_lo: int, para_hi: int):
+        rules_c, sev_c = tally(para_lo, para_hi + 1)
+        if not rules_c:
+            return
+        chars = sum(cjk[para_lo : para_hi + 1])
+        weighted = sum(SEVERITY_LEVELS.get(s, 1) * n for s, n in sev_c.items())
+        score = weighted * 1000 / max(chars, MIN_PARAGRAPH_CHARS)
+        # order 唯一，元组比较不会走到 Counter
+        entry = (score, -para_lo, order, para_hi, rules_c, sev_c, chars)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    if top_k > 0:
+        for order, (lo, hi) in enumerate(
+            check_aigc.paragraph_ranges(
+                lines, start, end, target_format, in_protected_env
+            )
+        ):
+            flush(order, lo, hi)
+
+    section_of = lambda i: max(  # noqa: E731
+        (k + 1 for k, s in enumerate(all_starts) if s <= i), default=0
+    )
+    paragraphs = []
+    for score, neg_lo, _, hi, rules_c, sev_c, chars in sorted(heap, reverse=True):
+        lo = -neg_lo
+        hits = sum(rules_c.values())
+        paragraphs.append(
+            {
+                "start": lo + 1,
+                "end": hi + 1,
+                "section": section_of(lo),
+                "cjk_chars": chars,
+                "hits": hits,
+                "severity": {s: sev_c[s] for s in SEVERITY_LEVELS},
+                "density": _density(hits, chars),
+                "score": round(score, 1),
+                "rules": dict(rules_c.most_common()),
+                "preview": lines[lo].strip()[:40],
+            }
+        )
+
+    rules_total, sev_total = tally(start, end)
+    chars_total = sum(cjk[start:end])
+    hits_total = sum(rules_total.values())
+    return {
+        "cjk_chars": chars_total,
+        "hits": hits_total,
+        "severity": {s: sev_total[s] for s in SEVERITY_LEVELS},
+        "density": _density(hits_total, chars_total),
+        "sections": sections,
+        "paragraphs": paragraphs,
+        "rules": [
+            {"rule": r, "severity": rule_severity[r], "hits": n}
+            for r, n in rules_total.most_common()
+        ],
+    }
+
+
+def summarize_file(
+    filepath: str,
+    target_format: str = "latex",
+    section: int | None = None,
+    severity: str | None = None,
+    top_k: int = 5,
+) -> dict:
+    text = check_aigc.read_source(filepath)
+    return summarize_text(text, target_format, section, severity, top_k)
+
+
+def _fmt_density(d: float | None) -> str:
+    return "-" if d is None else f"{d:.1f}"
+
+
+def format_summary(summary: dict, filepath: str, top_rules: int = 8) -> str:
+    """格式化为紧凑的文本摘要"""
+    sev = summary["severity"]
+    out = [
+        "=" * 60,
+        f"  AIGC 密度摘要: {filepath}",
+        "=" * 60,
+        f"  全文 {summary['cjk_chars']} 汉字，{summary['hits']} 处命中"
+        f"（{sev['error']} 错误 | {sev['warning']} 警告 | {sev['info']} 提示），"
+        f"{_fmt_density(summary['density'])} 次/千字",
+    ]
+
+    sections = summary["sections"]
+    if sections:
+        shown = sections
+        if len(sections) > MAX_SECTION_ROWS:
+            densest = sorted(sections, key=lambda s: -(s["density"] or 0))
+            keep = {id(s) for s in densest[:MAX_SECTION_ROWS]}
+            shown = [s for s in sections if id(s) in keep]
+        out.append("")
+        title = "  章节密度（次/千字）:"
+        if len(shown) < len(sections):
+            title = f"  章节密度（次/千字，共 {len(sections)} 节，只列最高的 {len(shown)} 节）:"
+        out.append(title)
+        out.append(f"  {'节':>3} {'起始行':>6} {'汉字':>7} {'命中':>5} {'错/警/提':>10} {'密度':>7}  标题")
+        worst = max(
+            (s for s in sections if s["density"] is not None),
+            key=lambda s: s["density"],
+            default=None,
+        )
+        for s in shown:
+            sv = s["severity"]
+            mark = " ◀" if s is worst and len(sections) > 1 else ""
+            counts = f"{sv['error']}/{sv['warning']}/{sv['info']}"
+            out.append(
+                f"  {s['section']:>3} {'L' + str(s['line']):>6} {s['cjk_chars']:>7} "
+                f"{s['hits']:>5} {counts:>10} {_fmt_density(s['density']):>7}  "
+                f"{s['title'][:24]}{mark}"
+            )
+
+    if summary["paragraphs"]:
+        out.append("")
+        out.append(f"  最需要处理的段落（Top {len(summary['paragraphs'])}，按加权密度）:")
+        for k, p in enumerate(summary["paragraphs"], 1):
+            rules = ", ".join(f"{r}×{n}" for r, n in list(p["rules"].items())[:4])
+            where = f"§{p['section']} " if p["section"] else ""
+            out.append(
+                f"  {k}. {where}L{p['start']}-L{p['end']}  {p['hits']} 处命中，"
+                f"{_fmt_density(p['density'])} 次/千字：{rules}"
+            )
+            out.append(f"     {p['preview']}")
+
+    if summary["rules"]:
+        out.append("")
+        out.append("  命中最多的规则:")
+        for r in summary["rules"][:top_rules]:
+            out.append(f"    {r['rule']:<10} ×{r['hits']:<5} {r['severity']}")
+
+    out.append("=" * 60)
+    return "\n".join(out)
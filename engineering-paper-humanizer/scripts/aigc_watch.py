@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""check_aigc.py --watch 的实现：轮询文件变化，按段落增量复查
+
+只用 os.stat 轮询 mtime/size（纯标准库），一次保存风暴在静默 debounce 秒后
+合并处理；未变化的文件不会被重新读取。变化文件按“非保护环境内的空行”切成
+段落块，以 (块文本, 块内环境标记) 为键缓存诊断，只对新块重新跑规则。
+每轮只输出与上一轮相比新增/消除的诊断。
+
+用法:
+    python3 scripts/check_aigc.py --watch thesis/              # 监视整个目录
+    python3 scripts/check_aigc.py --watch a.tex b.tex --json   # 每轮输出一行 JSON
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+import aigc_rules
+import check_aigc
+from check_aigc import FORMAT_SUFFIXES, SEVERITY_LEVELS
+
+
+def iter_watch_files(paths: list[str], target_format: str):
+    """展开监视路径：显式文件原样保留，目录递归收集对应格式的文件（跳过隐藏目录）"""
+    suffixes = FORMAT_SUFFIXES[target_format]
+    for p in paths:
+        if os.path.isdir(p):
+            for dirpath, dirnames, filenames in os.walk(p):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+                for name in sorted(filenames):
+                    if name.endswith(suffixes):
+                        yield os.path.join(dirpath, name)
+        else:
+            yield p
+
+
+def stat_files(paths: list[str], target_format: str) -> dict[str, tuple[int, int]]:
+    """一次 stat 扫描：{路径: (mtime_ns, size)}，不存在的文件不出现在结果中"""
+    sigs = {}
+    for f in iter_watch_files(paths, target_format):
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        sigs[os.path.normpath(f)] = (st.st_mtime_ns, st.st_size)
+    return sigs
+
+
+def diag_key(d: dict) -> tuple:
+    """与行号无关的诊断标识：上方插入/删除行不会被误报为新增+消除"""
+    return (d["rule"], d["column"], d["message"], d["context"])
+
+
+class FileState:
+    """单个文件的增量检查状态：段落块缓存 + 上一轮诊断"""
+
+    def __init__(self):
+        self.chunks: dict[tuple, list[dict]] = {}
+        self.diagnostics: list[dict] = []
+
+
+class Watcher:
+    def __init__(
+        self,
+        paths: list[str],
+        target_format: str = "latex",
+        severity: str | None = None,
+        interval: float = 0.5,
+        debounce: float = 0.3,
+        as_json: bool = False,
+    ):
+        self.paths = paths
+        self.format = target_format
+        self.threshold = SEVERITY_LEVELS[severity] if severity else 0
+        self.interval = interval
+        self.debounce = debounce
+        self.as_json = as_json
+        self.rules, self.connectives = check_aigc.compile_rules(target_format)
+        self.states: dict[str, FileState] = {}
+        self.sigs: dict[str, tuple[int, int]] = {}
+
+    # ── 检查 ──
+
+    def check(self, path: str, state: FileState) -> tuple[list[dict], int, int]:
+        """增量检查一个文件，返回 (诊断列表, 块总数, 重新检查的块数)"""
+        text, _ = check_aigc.decode_source(Path(path).read_bytes())
+        lines = text.splitlines()
+        in_block_math, in_protected_env = check_aigc.precompute_envs(lines, self.format)
+
+        chunks, diagnostics, misses = {}, [], 0
+        for start, end in check_aigc.split_chunks(lines, in_protected_env):
+            key = (
+                "\n".join(lines[start:end]),
+                bytes(in_block_math[start:end]),
+                bytes(in_protected_env[start:end]),
+            )
+            rel = chunks.get(key)
+            if rel is None:
+                rel = state.chunks.get(key)
+            if rel is None:
+                misses += 1
+                rel = [
+                    {**d, "line": d["line"] - start}
+                    for d in check_aigc.check_lines(
+                        lines,
+                        start,
+                        end,
+                        self.rules,
+                        self.connectives,
+                        self.format,
+                        in_block_math,
+                        in_protected_env,
+                    )
+                ]
+            chunks[key] = rel
+            diagnostics.extend({**d, "line": d["line"] + start} for d in rel)
+
+        # 只保留当前文件仍存在的块，缓存不会随编辑无限增长
+        state.chunks = chunks
+        if self.threshold:
+            diagnostics = [
+                d
+                for d in diagnostics
+                if SEVERITY_LEVELS.get(d["severity"], 0) >= self.threshold
+            ]
+        return diagnostics, len(chunks), misses
+
+    # ── 输出 ──
+
+    def emit(self, path: str, new: list[dict], resolved: list[dict], stats: str):
+        if self.as_json:
+            print(
+                json.dumps(
+                    {"file": path, "new": new, "resolved": resolved},
+                    ensure_ascii=False,
+                ),
+                flush=True,
+            )
+            return
+        if not new and not resolved:
+            print(f"[WATCH] {path}: 诊断无变化（{stats}）", flush=True)
+            return
+        if not os.path.exists(path):
+            # 文件被删除：逐条列出没有意义，只报数量
+            print(f"[WATCH] {path}: -{len(resolved)} 消除（{stats}）", flush=True)
+            return
+        out = [f"[WATCH] {path}: +{len(new)} 新增 / -{len(resolved)} 消除（{stats}）"]
+        for d in new:
+            icon = check_aigc.SEVERITY_ICONS.get(d["severity"], "[INFO]")
+            out.append(f"  + {icon} [{d['rule']}] L{d['line']}:{d['column']}  {d['message']}")
+            out.append(f"      上下文: {d['context'][:80]}")
+        for d in resolved:
+            out.append(f"  - [{d['rule']}] L{d['line']}:{d['column']}  {d['message']}")
+        print("\n".join(out), flush=True)
+
+    def diff(self, old: list[dict], new: list[dict]) -> tuple[list[dict], list[dict]]:
+        """按多重集比较前后两轮诊断，返回 (新增, 消除)"""
+        old_left = Counter(diag_key(d) for d in old)
+        added = []
+        for d in new:
+            k = diag_key(d)
+            if old_left[k] > 0:
+                old_left[k] -= 1
+            else:
+                added.append(d)
+        new_left = Counter(diag_key(d) for d in new)
+        resolved = []
+        for d in old:
+            k = diag_key(d)
+            if new_left[k] > 0:
+                new_left[k] -= 1
+            else:
+                resolved.append(d)
+        return added, resolved
+
+    # ── 主循环 ──
+
+    def rules_sig(self):
+        return aigc_rules.rules_signature()
+
+    def baseline(self):
+        """首轮：全量检查并只打印每个文件的汇总（之后只打印差异）"""
+        self.sigs = stat_files(self.paths, self.format)
+        total = Counter()
+        for path in sorted(self.sigs):
+            state = self.states.setdefault(path, FileState())
+            try:
+                state.diagnostics, _, _ = self.check(path, state)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"[WARN] 无法读取 {path}: {e}", file=sys.stderr)
+                continue
+            counts = Counter(d["severity"] for d in state.diagnostics)
+            total += counts
+            if self.as_json:
+                self.emit(path, state.diagnostics, [], "")
+            else:
+                print(
+                    f"[WATCH] {path}: {counts['error']} 错误 | "
+                    f"{counts['warning']} 警告 | {counts['info']} 提示",
+                    flush=True,
+                )
+        if not self.as_json:
+            print(
+                f"[WATCH] 监视 {len(self.sigs)} 个文件，共 {total['error']} 错误 | "
+                f"{total['warning']} 警告 | {total['info']} 提示；Ctrl+C 退出",
+                flush=True,
+            )
+
+    def process(self, changed: set[str], current: dict[str, tuple[int, int]]):
+        for path in sorted(changed):
+            state = self.states.setdefault(path, FileState())
+            if path not in current:
+                self.emit(path, [], state.diagnostics, "文件已删除")
+                del self.states[path]
+                continue
+            start = time.perf_counter()
+            try:
+                diagnostics, n_chunks, misses = self.check(path, state)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"[WARN] 无法读取 {path}: {e}", file=sys.stderr)
+                continue
+            added, resolved = self.diff(state.diagnostics, diagnostics)
+            state.diagnostics = diagnostics
+            elapsed = (time.perf_counter() - start) * 1000
+            self.emit(
+                path, added, resolved, f"复查 {misses}/{n_chunks} 段，{elapsed:.1f} ms"
+            )
+
+    def run(self):
+        rules_sig = self.rules_sig()
+        self.baseline()
+        pending: set[str] = set()
+        last_change = 0.0
+        while True:
+            time.sleep(self.interval if not pending else min(self.interval, self.debounce))
+
+            # 规则文件（rules.json 或 rules/ 分片）变化：重新加载规则并让所有文件全量复查
+            sig = self.rules_sig()
+            if sig != rules_sig:
+                rules_sig = sig
+                print("[WATCH] 规则文件已变化，重新加载规则", flush=True)
+                check_aigc.reload_rules()
+                self.rules, self.connectives = check_aigc.compile_rules(self.format)
+                for state in self.states.values():
+                    state.chunks.clear()
+                pending.update(self.states)
+                last_change = time.monotonic()
+
+            current = stat_files(self.paths, self.format)
+            changed = {
+                p for p in current.keys() | self.sigs.keys()
+                if current.get(p) != self.sigs.get(p)
+            }
+            self.sigs = current
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+                continue
+            # 静默 debounce 秒后才处理，合并编辑器的连续写入
+            if pending and time.monotonic() - last_change >= self.debounce:
+                self.process(pending, current)
+                pending = set()
+
+
+def watch(paths: list[str], target_format: str = "latex", **kwargs) -> None:
+    """监视入口（由 check_aigc.py --watch 调用），Ctrl+C 正常退出"""
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"Error: file not found: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        Watcher(paths, target_format, **kwargs).run()
+    except KeyboardInterrupt:
+        print("\n[WATCH] 已停止", file=sys.stderr)
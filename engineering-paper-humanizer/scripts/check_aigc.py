@@ -3,6 +3,7 @@
 """engineering-paper-humanizer AIGC 检测脚本
 
 扫描 LaTeX (.tex)、Markdown (.md) 或纯文本文件，检测 AIGC 残留格式问题和规范违规。
+文件编码自动识别（UTF-8、带 BOM 的 UTF-8/UTF-16、GBK/GB18030）。
 输出结构化的逐行诊断结果，供 agent 或人工快速定位修复。
 
 用法:
@@ -12,28 +13,61 @@
     python3 scripts/check_aigc.py <file.tex> --section 3        # 只检查指定章节
     python3 scripts/check_aigc.py <file.tex> --json             # JSON 格式输出
     python3 scripts/check_aigc.py <file.tex> --severity error   # 只显示错误
+    python3 scripts/check_aigc.py <file.tex> --group --json     # 按规则分组（省 token）
+    python3 scripts/check_aigc.py <file.tex> --fix              # 自动修复机械式问题
+    python3 scripts/check_aigc.py <file.tex> --summary          # 只输出章节密度与最差段落
+    python3 scripts/check_aigc.py <a.tex> <b.tex> --estimate    # 抽样估计密度（批量筛查）
+    python3 scripts/check_aigc.py <book.tex> --jobs 8           # 超大文件分块并行
+    python3 scripts/check_aigc.py --watch <dir|file...>         # 监视并增量复查
+    python3 scripts/check_aigc.py --staged                      # 检查暂存区（pre-commit 钩子）
+    python3 scripts/check_aigc.py - --json < draft.tex          # 从标准输入读取
+    python3 scripts/check_aigc.py --stream < requests.ndjson    # 一个进程检查多份候选文本
 """
 
 from __future__ import annotations
 
+# 启动耗时敏感（agent 每分钟会对短片段调用多次）：顶层只导入 re/sys/os/json
+# （functools 已由 re 导入），argparse、pathlib、进程池等按需在函数内导入，
+# 正则在首次可能命中时才编译。改动导入时请运行 scripts/check_startup.py 做回归检查。
 import re
 import sys
 import json
-import argparse
-from pathlib import Path
+import os
+from functools import lru_cache
 
 # ── Windows GBK 兼容：强制 stdout/stderr 使用 UTF-8 ────────
-import io, os
+# 本模块也会被其他脚本 import，重复包装会导致旧包装器回收时关闭底层缓冲
+if os.name == "nt" and (sys.stdout.encoding or "").lower() != "utf-8":
+    import io
 
-if os.name == "nt":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
 
-# ── 从 rules.json 加载规则 ──────────────────────────────────
+# 严重级别：--severity 过滤阈值，也是 --summary 段落排序的权重
+SEVERITY_LEVELS = {"error": 3, "warning": 2, "info": 1}
+
+# 格式 → 扩展名（目录扫描、--staged、语料统计、按扩展名推断格式共用这一张表）
+FORMAT_SUFFIXES = {
+    "latex": (".tex",),
+    "markdown": (".md", ".markdown"),
+    "plain": (".txt",),
+}
+
+
+def infer_format(path: str, default: str | None = "latex") -> str | None:
+    """按扩展名推断文件格式；扩展名不认识时返回 default"""
+    lower = path.lower()
+    for fmt, suffixes in FORMAT_SUFFIXES.items():
+        if lower.endswith(suffixes):
+            return fmt
+    return default
+
+
+# ── 加载规则 ────────────────────────────────────────────────
 
 
 def load_rules(format_filter: str = "latex") -> tuple[list[dict], list[str]]:
-    """从 rules.json 加载规则和连接词，按 format 过滤
+    """加载适用于 format 的规则和连接词（rules.json 或 rules/ 分片目录，见 aigc_rules）
 
     参数:
         format_filter: "latex" | "markdown" | "plain"
@@ -41,29 +75,9 @@ def load_rules(format_filter: str = "latex") -> tuple[list[dict], list[str]]:
     返回:
         (rules, connectives_words)
     """
-    script_dir = Path(__file__).parent
-    rules_path = script_dir / "rules.json"
-
-    if not rules_path.exists():
-        print(f"[ERROR] 规则文件不存在: {rules_path}", file=sys.stderr)
-        sys.exit(1)
-
-    try:
-        data = json.loads(rules_path.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"[ERROR] 无法加载 rules.json: {e}", file=sys.stderr)
-        sys.exit(1)
+    from aigc_rules import load_rules as load_rule_store
 
-    # 过滤规则
-    all_rules = data.get("rules", [])
-    rules = []
-    for rule in all_rules:
-        formats = rule.get("format", ["latex"])
-        if format_filter in formats:
-            rules.append(rule)
-
-    # 连接词（如果 format 匹配）
-    connectives = data.get("connectives", {})
+    rules, connectives = load_rule_store(format_filter)
     connectives_words = []
     if format_filter in connectives.get("format", ["latex", "markdown", "plain"]):
         connectives_words = connectives.get("words", [])
@@ -106,64 +120,135 @@ def is_in_math_env(line: str, match_start: int) -> bool:
     return depth % 2 == 1
 
 
-def precompute_block_math(lines: list[str]) -> list[bool]:
-    """预计算每一行是否处于块级数学环境内（仅 LaTeX）"""
-    math_envs = (
-        "equation",
-        "align",
-        "gather",
-        "multline",
-        "eqnarray",
-        "math",
-        "displaymath",
-    )
-    begin_pats = [re.compile(rf"\\begin\{{{env}\*?\}}") for env in math_envs]
-    end_pats = [re.compile(rf"\\end\{{{env}\*?\}}") for env in math_envs]
-    depth = 0
-    result = []
-    for line in lines:
-        had_begin = False
-        for bp, ep in zip(begin_pats, end_pats):
-            begins = len(bp.findall(line))
-            ends = len(ep.findall(line))
-            if begins > 0:
-                had_begin = True
-            depth += begins
-            depth -= ends
-        # 同行包含 begin 时，该行也视为数学环境内部
-        result.append(depth > 0 or had_begin)
-    return result
-
-
-def precompute_protected_envs(lines: list[str]) -> list[bool]:
-    """预计算每一行是否处于受保护的 LaTeX 环境内（tikzpicture, table, figure）
-
-    这些环境内的 AIGC/PUNCT/STYLE 规则应被跳过（仅检查 CITE/LATEX）。
+# 环境标记取值（precompute_envs 返回的第二个列表）：受保护环境内只检查 CITE/LATEX，
+# 整体跳过的环境（代码、算法、verbatim 等）内不做任何检查
+ENV_PROTECTED = 1
+ENV_SKIPPED = 2
+
+_env_matcher = None
+
+
+def env_matcher(reload: bool = False):
+    """把 rules.json 的 environments 编译为一个 begin/end 正则，返回 (正则, {环境名: 类别})
+
+    类别为 "skip" / "protected" / "math"；环境名后可带 *（如 table*、align*）。
     """
-    protected_envs = ("tikzpicture", "table", "figure")
-    begin_pats = [re.compile(rf"\\begin\{{{env}\*?\}}") for env in protected_envs]
-    end_pats = [re.compile(rf"\\end\{{{env}\*?\}}") for env in protected_envs]
-    depth = 0
-    result = []
-    for line in lines:
-        had_begin = False
-        for bp, ep in zip(begin_pats, end_pats):
-            begins = len(bp.findall(line))
-            ends = len(ep.findall(line))
-            if begins > 0:
-                had_begin = True
-            depth += begins
-            depth -= ends
-        # 同行包含 begin 时，该行也视为受保护环境内部
-        result.append(depth > 0 or had_begin)
-    return result
+    global _env_matcher
+    if _env_matcher is None or reload:
+        from aigc_rules import load_environments
+
+        classes = {}
+        for cls, names in load_environments().items():
+            if cls in ("skip", "protected", "math"):
+                for name in names:
+                    classes.setdefault(name, cls)
+        if classes:
+            alts = "|".join(re.escape(n) for n in sorted(classes, key=len, reverse=True))
+            regex = re.compile(rf"\\(begin|end)\{{({alts})(\*?)\}}")
+        else:
+            regex = None
+        _env_matcher = (regex, classes)
+    return _env_matcher
+
+
+_VERB = re.compile(r"\\verb\*?([^\sa-zA-Z*])(.*?)\1")
+
+
+def _env_scan_text(line: str, pos: int) -> str:
+    """line[pos:] 中注释和 \\verb|...| 置空后的文本（前 pos 个字符原样保留）
+
+    只截断或等长替换，下标与原行一致；被注释掉的 \\begin{lstlisting} 等不再
+    改变环境状态。
+    """
+    rest = line[pos:]
+    if "%" in rest:
+        rest = strip_latex_comment(rest)
+    if "\\verb" in rest:
+        rest = _VERB.sub(lambda m: " " * len(m.group(0)), rest)
+    return line[:pos] + rest
+
+
+def precompute_latex_envs(lines: list[str]) -> tuple[list[bool], list[int]]:
+    """一遍扫描标记每一行的环境状态（仅 LaTeX），返回 (是否在块级数学环境内, 环境标记)
+
+    环境标记为 0、ENV_PROTECTED 或 ENV_SKIPPED。同行包含 \\begin 时该行也视为
+    环境内部。注释和 \\verb 里的 \\begin/\\end 不计。整体跳过的环境内部只查找
+    它自己的 \\end（str.find），其中出现的 \\begin{...}（如代码清单里的 LaTeX
+    示例）不计入嵌套；到文末仍未闭合时在 stderr 给出警告。
+    """
+    regex = classes = None
+    math_depth = protected_depth = 0
+    opaque = None  # 所在整体跳过环境的结束标记，如 "\\end{lstlisting}"
+    opaque_line = 0
+    block_math: list[bool] = []
+    marks: list[int] = []
+    for i, line in enumerate(lines):
+        pos = 0
+        had_math = had_protected = had_skip = False
+        if opaque is not None:
+            k = line.find(opaque)
+            if k == -1:
+                block_math.append(False)
+                marks.append(ENV_SKIPPED)
+                continue
+            had_skip = True
+            pos = k + len(opaque)
+            opaque = None
+        # 绝大多数行不含环境边界，字面量预筛选后直接沿用当前深度
+        if "\\begin" in line or "\\end" in line:
+            if classes is None:
+                regex, classes = env_matcher()
+            scan = _env_scan_text(line, pos)
+            m = regex.search(scan, pos) if regex is not None else None
+            while m:
+                begin, cls = m.group(1) == "begin", classes[m.group(2)]
+                pos = m.end()
+                if cls == "skip":
+                    if begin:
+                        had_skip = True
+                        end = f"\\end{{{m.group(2)}{m.group(3)}}}"
+                        # 环境内容按原样查找结束标记（代码里的 % 不是注释）
+                        k = line.find(end, pos)
+                        if k == -1:
+                            opaque, opaque_line = end, i
+                            break
+                        pos = k + len(end)
+                        scan = _env_scan_text(line, pos)
+                elif cls == "math":
+                    had_math = had_math or begin
+                    math_depth = math_depth + 1 if begin else max(0, math_depth - 1)
+                else:
+                    had_protected = had_protected or begin
+                    protected_depth = (
+                        protected_depth + 1 if begin else max(0, protected_depth - 1)
+                    )
+                m = regex.search(scan, pos)
+        block_math.append(math_depth > 0 or had_math)
+        if had_skip or opaque is not None:
+            marks.append(ENV_SKIPPED)
+        elif protected_depth > 0 or had_protected:
+            marks.append(ENV_PROTECTED)
+        else:
+            marks.append(0)
+    if opaque is not None:
+        name = opaque[len("\\end{") : -1]
+        print(
+            f"[WARN] 第 {opaque_line + 1} 行的 \\begin{{{name}}} 到文末仍未闭合，"
+            f"从该行到文末共 {len(lines) - opaque_line} 行均未检查",
+            file=sys.stderr,
+        )
+    return block_math, marks
 
 
 def strip_latex_comment(line: str) -> str:
     """剥离 LaTeX 行内注释，返回处理后的行
 
     截断 % 后的内容，但保留转义的 \\% 或 \\%{} 等。
+    紧跟数字且后面仍有正文的 %（如 50%以上）视为漏写转义而非注释，
+    予以保留，交给 LATEX-001 报告/修复。
     """
+    if "%" not in line:
+        return line
     # 找到第一个未转义的 %
     # 排除 \% 和 \%{ 的情况
     result = []
@@ -182,6 +267,10 @@ def strip_latex_comment(line: str) -> str:
             result.append("\\%{")
             i += 3
         elif line[i] == "%":
+            if i > 0 and line[i - 1].isdigit() and line[i + 1 :].strip():
+                result.append("%")
+                i += 1
+                continue
             # 遇到未转义的 %，截断后面所有内容
             break
         else:
@@ -191,43 +280,127 @@ def strip_latex_comment(line: str) -> str:
 
 
 def check_file(
-    filepath: str, target_format: str = "latex", section: int | None = None
+    filepath: str,
+    target_format: str = "latex",
+    section: int | None = None,
+    jobs: int | None = 1,
 ) -> list[dict]:
     """执行全部检查规则，返回诊断列表
 
     参数:
-        filepath: 文件路径
+        filepath: 文件路径；"-" 表示从标准输入读取
         target_format: "latex" | "markdown" | "plain"
         section: 只检查指定章节（仅 LaTeX 有效）
+        jobs: 并行进程数（见 check_text）
 
     返回:
         诊断列表
     """
-    path = Path(filepath)
-    if not path.exists():
-        print(f"Error: file not found: {filepath}", file=sys.stderr)
+    return check_text(read_source(filepath), target_format, section, jobs)
+
+
+def decode_source(data: bytes) -> tuple[str, str]:
+    """识别编码并解码，返回 (文本, 编码名)；编码名可直接用于原样写回
+
+    依次尝试：BOM（UTF-8 / UTF-16）→ 严格 UTF-8 → GB18030。不少中文模板仍以
+    GBK 保存，GB18030 是 GBK/GB2312 的超集。换行符原样保留。都失败时抛出
+    UnicodeDecodeError。
+    """
+    if data.startswith(b"\xef\xbb\xbf"):
+        return data[3:].decode("utf-8"), "utf-8-sig"
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16"), "utf-16"
+    try:
+        return data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return data.decode("gb18030"), "gb18030"
+
+
+def load_source(filepath: str) -> str:
+    """读取待检查文本（自动识别编码，见 decode_source）；"-" 表示标准输入
+
+    文件不存在等抛出 OSError，编码无法识别时抛出 UnicodeDecodeError，
+    批量处理时由调用方逐个文件报告。
+    """
+    if filepath == "-":
+        return decode_source(sys.stdin.buffer.read())[0]
+    with open(filepath, "rb") as f:
+        return decode_source(f.read())[0]
+
+
+def source_error(filepath: str, e: Exception) -> str:
+    """load_source 失败时的说明文字"""
+    if isinstance(e, FileNotFoundError):
+        return f"file not found: {filepath}"
+    if isinstance(e, UnicodeDecodeError):
+        return f"无法识别 {filepath} 的编码（已尝试 UTF-8、GB18030）"
+    return f"无法读取 {filepath}: {e}"
+
+
+def read_source(filepath: str) -> str:
+    """命令行读取待检查文本（见 load_source），失败时打印错误并退出"""
+    try:
+        return load_source(filepath)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error: {source_error(filepath, e)}", file=sys.stderr)
         sys.exit(1)
 
-    text = path.read_text(encoding="utf-8")
+
+def check_text(
+    text: str,
+    target_format: str = "latex",
+    section: int | None = None,
+    jobs: int | None = 1,
+) -> list[dict]:
+    """对内存中的文本执行全部检查规则，返回诊断列表（check_file 的内存版本）
+
+    参数:
+        text: 待检查的完整文本
+        target_format: "latex" | "markdown" | "plain"
+        section: 只检查指定章节（仅 LaTeX 有效）
+        jobs: 并行进程数；1 为串行（默认），None 为按 CPU 核数。
+            只有检查范围不少于 PARALLEL_MIN_LINES 行时才真正开进程池
+
+    返回:
+        诊断列表
+    """
     lines = text.splitlines()
 
     # 加载规则（按 format 过滤）
-    rules, connectives_words = load_rules(target_format)
-
-    # 预编译正则表达式（避免每行重复编译）
-    for rule in rules:
-        rule["_compiled"] = re.compile(rule["pattern"])
+    rules, connectives_words = compile_rules(target_format)
+    in_block_math, in_protected_env = precompute_envs(lines, target_format)
+
+    start_line, end_line = section_range(lines, section, target_format)
+
+    if jobs != 1 and end_line - start_line >= PARALLEL_MIN_LINES:
+        diagnostics = check_lines_parallel(
+            lines,
+            start_line,
+            end_line,
+            target_format,
+            in_block_math,
+            in_protected_env,
+            jobs,
+        )
+        if diagnostics is not None:
+            return diagnostics
+
+    return check_lines(
+        lines,
+        start_line,
+        end_line,
+        rules,
+        connectives_words,
+        target_format,
+        in_block_math,
+        in_protected_env,
+    )
 
-    # 数学环境检测（仅 LaTeX）
-    if target_format == "latex":
-        in_block_math = precompute_block_math(lines)
-        # 受保护环境检测（tikzpicture, table, figure）
-        in_protected_env = precompute_protected_envs(lines)
-    else:
-        in_block_math = [False] * len(lines)
-        in_protected_env = [False] * len(lines)
 
-    # 如果指定了 section，定位范围（仅 LaTeX）
+def section_range(
+    lines: list[str], section: int | None, target_format: str = "latex"
+) -> tuple[int, int]:
+    """定位 --section 指定章节的行范围 [start, end)；未指定或越界时为全文"""
     start_line, end_line = 0, len(lines)
     if section is not None and target_format == "latex":
         sec_pattern = re.compile(rf"\\section\b")
@@ -248,11 +421,409 @@ def check_file(
             )
     elif section is not None and target_format != "latex":
         print(f"[WARN] --section 参数仅对 LaTeX 文件有效，已忽略", file=sys.stderr)
+    return start_line, end_line
 
-    diagnostics = []
 
-    # 逐行规则匹配
-    for i in range(start_line, end_line):
+@lru_cache(maxsize=None)
+def compile_rules(target_format: str = "latex") -> tuple[list[dict], list[str]]:
+    """加载规则并准备匹配，返回 (rules, connectives_words)
+
+    每条规则附带 "_literals"（任何匹配都必然包含其中之一的字面量，行内一个
+    都不含就不必跑正则），提取不到字面量时退而附带 "_class"（任何匹配都必然
+    包含的字符类）；正则本身延迟到 rule_regex 首次调用时才编译，短文本只为真正
+    可能命中的少数规则付编译开销。
+
+    结果按格式缓存（每个进程每种格式只加载、编译一次），调用方共享同一份列表，
+    不要原地修改；规则文件变化后调用 reload_rules。
+    """
+    rules, connectives_words = load_rules(target_format)
+    for rule in rules:
+        rule["_literals"] = required_literals(rule["pattern"])
+        rule["_class"] = None if rule["_literals"] else required_class(rule["pattern"])
+        rule["_compiled"] = None
+    return rules, connectives_words
+
+
+def reload_rules() -> None:
+    """丢弃已缓存的规则和环境匹配器（--watch 发现规则文件变化时调用）"""
+    compile_rules.cache_clear()
+    env_matcher(reload=True)
+
+
+def rule_regex(rule: dict) -> re.Pattern:
+    """取规则的已编译正则（首次调用时编译并缓存在规则字典上）"""
+    compiled = rule.get("_compiled")
+    if compiled is None:
+        compiled = rule["_compiled"] = re.compile(rule["pattern"])
+    return compiled
+
+
+_QUANTIFIER_BRACE = re.compile(r"\{(\d*)(?:,\d*)?\}")
+_INLINE_FLAGS = re.compile(r"\(\?[aiLmsux-]+[:)]")
+
+# 字面字符类最多展开为多少个候选字面量
+MAX_CLASS_LITERALS = 8
+
+
+def _may_skip(pattern: str, i: int) -> bool:
+    """pattern[i:] 开头的量词是否允许重复 0 次（?、*、{0,n}、{,n}）"""
+    c = pattern[i : i + 1]
+    if c in ("?", "*"):
+        return True
+    m = _QUANTIFIER_BRACE.match(pattern, i) if c == "{" else None
+    return bool(m) and int(m.group(1) or 0) == 0
+
+
+def _class_chars(body: str) -> tuple[str, ...] | None:
+    """字符类内部只由字面字符组成时返回这些字符（无范围、非取反、不含换行）"""
+    if not body or body.startswith("^"):
+        return None
+    chars, i = [], 0
+    while i < len(body):
+        c = body[i]
+        if c == "\\":
+            nxt = body[i + 1 : i + 2]
+            if not nxt or nxt.isalnum():
+                return None  # \s \d \uXXXX 等
+            chars.append(nxt)
+            i += 2
+            continue
+        if c == "-" and 0 < i < len(body) - 1:
+            return None  # 范围
+        if c in "\n[":
+            return None
+        chars.append(c)
+        i += 1
+    chars = list(dict.fromkeys(chars))
+    return tuple(chars) if len(chars) <= MAX_CLASS_LITERALS else None
+
+
+def _skip_class(pattern: str, i: int) -> int:
+    """pattern[i] 为 [，返回字符类结束后的位置（开头的 ] 或 ^] 属于类内字符）"""
+    n = len(pattern)
+    i += 1
+    if i < n and pattern[i] == "^":
+        i += 1
+    if i < n and pattern[i] == "]":
+        i += 1
+    while i < n and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def _scan_groups(pattern: str):
+    """逐个产出 (位置, 字符, 深度)，跳过转义与字符类内部，供切分分支/配对括号用"""
+    depth, i, n = 0, 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            i = _skip_class(pattern, i)
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        yield i, c, depth
+        i += 1
+
+
+def _split_branches(pattern: str) -> list[str]:
+    """按最外层的 | 切分分支"""
+    parts, start = [], 0
+    for i, c, depth in _scan_groups(pattern):
+        if c == "|" and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def _group_end(pattern: str, i: int) -> int:
+    """pattern[i] 为 (，返回配对的 ) 的位置"""
+    for j, c, depth in _scan_groups(pattern[i:]):
+        if c == ")" and depth == 0:
+            return i + j
+    return len(pattern)
+
+
+def required_literals(pattern: str) -> tuple[str, ...]:
+    """提取预筛选字面量：任何匹配都必然包含其中至少一个，无法确定时返回 ()
+
+    取最外层未被量词修饰的连续字面字符，或最外层非可选分组中各分支的
+    字面量集合，挑最短候选最长的一组；带内联标志（如忽略大小写）时放弃，
+    保证预筛选不会漏报。
+    """
+    if _INLINE_FLAGS.search(pattern):
+        return ()
+    branches = _split_branches(pattern)
+    if len(branches) > 1:
+        alternatives = []
+        for branch in branches:
+            lits = required_literals(branch)
+            if not lits:
+                return ()
+            alternatives.extend(lits)
+        return tuple(dict.fromkeys(alternatives))
+
+    candidates: list[tuple[str, ...]] = []
+    run: list[str] = []
+
+    def flush():
+        if run:
+            candidates.append(("".join(run),))
+            run.clear()
+
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            nxt = pattern[i + 1] if i + 1 < n else ""
+            if nxt and not nxt.isalnum():
+                run.append(nxt)  # 转义的标点是字面量
+                i += 2
+                continue
+            # \s \d \b \uXXXX \xXX 反向引用等：整段跳过并打断字面量
+            flush()
+            if nxt == "u":
+                i += 6
+            elif nxt == "U":
+                i += 10
+            elif nxt == "x":
+                i += 4
+            elif nxt.isdigit():
+                i += 2
+                while i < n and pattern[i].isdigit():
+                    i += 1
+            else:
+                i += 2
+            continue
+        if c == "[":
+            flush()
+            end = _skip_class(pattern, i)
+            chars = _class_chars(pattern[i + 1 : end - 1])
+            if chars and not _may_skip(pattern, end):
+                candidates.append(chars)
+            i = end
+            continue
+        if c == "(":
+            flush()
+            end = _group_end(pattern, i)
+            body = pattern[i + 1 : end]
+            optional = _may_skip(pattern, end + 1)
+            if body.startswith("?:"):
+                body = body[2:]
+            elif body.startswith("?P<"):
+                body = body[body.index(">") + 1 :]
+            elif body.startswith("?"):
+                body = None  # 断言、注释等不消耗字符的分组
+            if body is not None and not optional:
+                lits = required_literals(body)
+                if lits:
+                    candidates.append(lits)
+            i = end + 1
+            continue
+        if c in "*+?":
+            # 量词修饰前一个字符：它不再是必然出现的
+            if run:
+                run.pop()
+            flush()
+        elif c == "{" and _QUANTIFIER_BRACE.match(pattern, i):
+            if run:
+                run.pop()
+            flush()
+            i = _QUANTIFIER_BRACE.match(pattern, i).end()
+            continue
+        elif c in ".^$)":
+            flush()
+        else:
+            run.append(c)
+        i += 1
+    flush()
+    candidates = [lits for lits in candidates if not any("\n" in lit for lit in lits)]
+    if not candidates:
+        return ()
+    return max(candidates, key=lambda lits: (min(map(len, lits)), -len(lits)))
+
+
+def required_class(pattern: str) -> str | None:
+    """任何匹配都必然包含的最外层字符类（如 emoji 范围），供无字面量的规则预筛选
+
+    只取未被可省略量词修饰、非取反、不含 \\s/\\W 等可能匹配换行的类；
+    有分支或内联标志时放弃。
+    """
+    if _INLINE_FLAGS.search(pattern) or len(_split_branches(pattern)) > 1:
+        return None
+    depth, i, n = 0, 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "[":
+            end = _skip_class(pattern, i)
+            body = pattern[i + 1 : end - 1]
+            if (
+                depth == 0
+                and not body.startswith("^")
+                and "\n" not in body
+                and not re.search(r"\\[sSwWdDnbB]", body)
+                and not _may_skip(pattern, end)
+            ):
+                return pattern[i:end]
+            i = end
+            continue
+        i += 1
+    return None
+
+
+def precompute_envs(
+    lines: list[str], target_format: str = "latex"
+) -> tuple[list[bool], list[int]]:
+    """逐行标记 (是否在块级数学环境内, 环境标记)；非 LaTeX 全为 False/0
+
+    环境标记为真即在受保护或整体跳过的环境内（环境类别见 rules.json 的
+    environments），需要区分时与 ENV_SKIPPED 比较。
+    """
+    if target_format == "latex":
+        return precompute_latex_envs(lines)
+    return [False] * len(lines), [0] * len(lines)
+
+
+def rule_skipped(
+    rule_id: str,
+    i: int,
+    target_format: str,
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+) -> bool:
+    """第 i 行是否整行跳过该规则
+
+    整体跳过的环境（lstlisting/verbatim/algorithm…）内跳过全部规则；
+    受保护环境（tikzpicture/table/figure…）内只检查 CITE/LATEX；
+    块级数学环境内跳过 AIGC/PUNCT，CITE/LATEX/STYLE 仍然检查。
+    """
+    if target_format == "latex" and in_protected_env[i]:
+        if in_protected_env[i] == ENV_SKIPPED:
+            return True
+        return rule_id.startswith(("AIGC", "PUNCT", "STYLE"))
+    if in_block_math[i]:
+        return rule_id.startswith(("AIGC", "PUNCT"))
+    return False
+
+
+def match_masked(
+    i: int,
+    line_for_check: str,
+    pos: int,
+    target_format: str,
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+) -> bool:
+    """普通行上的匹配是否落在行内数学环境内（块级/受保护环境行不做此判断）"""
+    if target_format != "latex" or in_protected_env[i] or in_block_math[i]:
+        return False
+    return is_in_math_env(line_for_check, pos)
+
+
+# 检查范围不少于该行数时，规则预筛选改为在整段文本上进行
+PREFILTER_MIN_LINES = 200
+
+
+def _find_lines(text: str, starts: list[int], needles, regex=None) -> set[int]:
+    """在拼接后的整段文本中查找，返回含任一 needle（或 regex 匹配）的行号集合
+
+    每行命中一次后直接跳到下一行行首继续找，循环次数只与候选行数有关。
+    """
+    from bisect import bisect_right
+
+    found: set[int] = set()
+    n = len(starts)
+    for lit in needles:
+        pos = text.find(lit)
+        while pos != -1:
+            k = bisect_right(starts, pos) - 1
+            found.add(k)
+            if k + 1 >= n:
+                break
+            pos = text.find(lit, starts[k + 1])
+    if regex is not None:
+        m = regex.search(text)
+        while m:
+            k = bisect_right(starts, m.start()) - 1
+            found.add(k)
+            if k + 1 >= n:
+                break
+            m = regex.search(text, starts[k + 1])
+    return found
+
+
+def prefilter_plan(
+    lines: list[str],
+    start_line: int,
+    end_line: int,
+    rules: list[dict],
+    env_marks: list[int] | None = None,
+) -> dict[int, list[dict]]:
+    """{行下标: 该行需要运行的规则（保持规则顺序）}，不在其中的行没有候选规则
+
+    把范围内的行用换行拼成一段文本，对每条规则用 str.find（C 层）查找其预筛选
+    字面量或字符类，代替逐行逐规则的 `lit in line`。字面量不含换行，查找结果与
+    逐行判断一致；对行内注释等只会多出候选，不会漏报。整体跳过的环境内的行
+    以空行参与拼接，不会成为候选。
+    """
+    body = lines[start_line:end_line]
+    if env_marks is not None:
+        body = [
+            "" if env_marks[start_line + k] == ENV_SKIPPED else line
+            for k, line in enumerate(body)
+        ]
+    text = "\n".join(body)
+    starts, pos = [], 0
+    for line in body:
+        starts.append(pos)
+        pos += len(line) + 1
+
+    plan: dict[int, list[dict]] = {}
+    for rule in rules:
+        literals, cls = rule["_literals"], rule["_class"]
+        if literals or cls:
+            regex = re.compile(cls) if cls else None
+            hit_lines = sorted(_find_lines(text, starts, literals, regex))
+        else:
+            hit_lines = range(len(starts))
+        for k in hit_lines:
+            plan.setdefault(start_line + k, []).append(rule)
+    return plan
+
+
+def iter_rule_hits(
+    lines: list[str],
+    start_line: int,
+    end_line: int,
+    rules: list[dict],
+    target_format: str,
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+):
+    """逐行规则匹配，按行、规则顺序产出 (行下标, 匹配起点, rule)
+
+    只产出位置不构造诊断字典，check_lines 与 --summary 共用。
+    范围较大时先在整段文本上做预筛选（见 prefilter_plan），只访问有候选规则的行。
+    """
+    plan = None
+    if end_line - start_line >= PREFILTER_MIN_LINES:
+        plan = prefilter_plan(lines, start_line, end_line, rules, in_protected_env)
+    for i in sorted(plan) if plan is not None else range(start_line, end_line):
+        # 整体跳过的环境（代码清单等）：不剥注释、不跑规则
+        if in_protected_env[i] == ENV_SKIPPED:
+            continue
         line = lines[i]
 
         # 跳过注释行（LaTeX: %, Markdown/Plain: 无注释语法需跳过）
@@ -266,114 +837,126 @@ def check_file(
         else:
             line_for_check = line
 
-        # 检查是否在受保护环境内（tikzpicture/table/figure）
-        if target_format == "latex" and in_protected_env[i]:
-            # 受保护环境内：跳过 AIGC/PUNCT/STYLE 规则，只检查 CITE/LATEX 规则
-            for rule in rules:
-                if rule["id"].startswith(("AIGC", "PUNCT", "STYLE")):
-                    continue
-                for m in rule["_compiled"].finditer(line_for_check):
-                    diagnostics.append(
-                        {
-                            "line": i + 1,
-                            "column": m.start() + 1,
-                            "rule": rule["id"],
-                            "severity": rule["severity"],
-                            "message": rule["message"],
-                            "fix": rule["fix"],
-                            "context": line.strip(),
-                        }
-                    )
-        # 检查是否在块级数学环境内
-        elif in_block_math[i]:
-            # 块级数学环境内：跳过 AIGC/PUNCT 规则，CITE/LATEX 规则仍然检查
-            for rule in rules:
-                if rule["id"].startswith(("AIGC", "PUNCT")):
+        for rule in plan[i] if plan is not None else rules:
+            literals = rule["_literals"]
+            if literals and not any(lit in line_for_check for lit in literals):
+                continue
+            if rule_skipped(
+                rule["id"], i, target_format, in_block_math, in_protected_env
+            ):
+                continue
+            for m in rule_regex(rule).finditer(line_for_check):
+                if match_masked(
+                    i,
+                    line_for_check,
+                    m.start(),
+                    target_format,
+                    in_block_math,
+                    in_protected_env,
+                ):
                     continue
-                for m in rule["_compiled"].finditer(line_for_check):
-                    diagnostics.append(
-                        {
-                            "line": i + 1,
-                            "column": m.start() + 1,
-                            "rule": rule["id"],
-                            "severity": rule["severity"],
-                            "message": rule["message"],
-                            "fix": rule["fix"],
-                            "context": line.strip(),
-                        }
-                    )
+                yield i, m.start(), rule
+
+
+def iter_connective_hits(
+    lines: list[str],
+    start_line: int,
+    end_line: int,
+    connectives_words: list[str],
+    target_format: str,
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+):
+    """连接词泛滥统计，产出 (行下标, 列号, 连接词, 是否句内句首, 去缩进的行)"""
+    for i in range(start_line, end_line):
+        line = lines[i]
+
+        # 对 LaTeX 文件剥离行内注释
+        if target_format == "latex":
+            line_for_conn = strip_latex_comment(line)
         else:
-            # 普通行：正常检查，但跳过行内数学环境
-            for rule in rules:
-                for m in rule["_compiled"].finditer(line_for_check):
-                    if target_format == "latex" and is_in_math_env(
-                        line_for_check, m.start()
-                    ):
-                        continue  # 跳过行内数学环境
-                    diagnostics.append(
-                        {
-                            "line": i + 1,
-                            "column": m.start() + 1,
-                            "rule": rule["id"],
-                            "severity": rule["severity"],
-                            "message": rule["message"],
-                            "fix": rule["fix"],
-                            "context": line.strip(),
-                        }
-                    )
+            line_for_conn = line
 
-    # 连接词泛滥统计（仅当有连接词列表时）
-    if connectives_words:
-        connective_hits = []
-        for i in range(start_line, end_line):
-            line = lines[i]
+        stripped = line_for_conn.lstrip()
 
-            # 对 LaTeX 文件剥离行内注释
-            if target_format == "latex":
-                line_for_conn = strip_latex_comment(line)
-            else:
-                line_for_conn = line
+        # 跳过整行注释（LaTeX）
+        if target_format == "latex" and stripped.startswith("%"):
+            continue
+        # 跳过块级数学和受保护环境
+        if in_block_math[i] or in_protected_env[i]:
+            continue
 
-            stripped = line_for_conn.lstrip()
+        for word in connectives_words:
+            # 检查行首
+            if stripped.startswith(word):
+                yield i, 1, word, False, stripped
+            # 检查句内句首（中文句号/问号/叹号后紧跟连接词）
+            for sep in ("。", "！", "？"):
+                idx = stripped.find(sep + word)
+                if idx != -1:
+                    col = len(line_for_conn) - len(stripped) + idx + len(sep) + 1
+                    yield i, col, word, True, stripped
+
+
+def check_lines(
+    lines: list[str],
+    start_line: int,
+    end_line: int,
+    rules: list[dict],
+    connectives_words: list[str],
+    target_format: str,
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+) -> list[dict]:
+    """对 lines[start_line:end_line] 执行逐行规则、连接词与突发性检查
 
-            # 跳过整行注释（LaTeX）
-            if target_format == "latex" and stripped.startswith("%"):
-                continue
-            # 跳过块级数学和受保护环境
-            if in_block_math[i] or in_protected_env[i]:
-                continue
+    规则与环境标记由调用方预先计算，便于监视模式按段落增量复查。
+    """
+    # 逐行规则匹配
+    diagnostics = [
+        {
+            "line": i + 1,
+            "column": pos + 1,
+            "rule": rule["id"],
+            "severity": rule["severity"],
+            "message": rule["message"],
+            "fix": rule["fix"],
+            "context": lines[i].strip(),
+        }
+        for i, pos, rule in iter_rule_hits(
+            lines,
+            start_line,
+            end_line,
+            rules,
+            target_format,
+            in_block_math,
+            in_protected_env,
+        )
+    ]
 
-            for word in connectives_words:
-                # 检查行首
-                if stripped.startswith(word):
-                    connective_hits.append(
-                        {
-                            "line": i + 1,
-                            "column": 1,
-                            "rule": "AIGC-CONN",
-                            "severity": "info",
-                            "message": f"段/句首连接词“{word}”（连接词泛滥检测）",
-                            "fix": "评估是否可删除，目标削减 ≥ 50%",
-                            "context": stripped[:60],
-                        }
-                    )
-                # 检查句内句首（中文句号/问号/叹号后紧跟连接词）
-                for sep in ("。", "！", "？"):
-                    idx = stripped.find(sep + word)
-                    if idx != -1:
-                        col = len(line_for_conn) - len(stripped) + idx + len(sep) + 1
-                        connective_hits.append(
-                            {
-                                "line": i + 1,
-                                "column": col,
-                                "rule": "AIGC-CONN",
-                                "severity": "info",
-                                "message": f"句首连接词“{word}”（连接词泛滥检测）",
-                                "fix": "评估是否可删除，目标削减 ≥ 50%",
-                                "context": stripped[:60],
-                            }
-                        )
-        diagnostics.extend(connective_hits)
+    # 连接词泛滥统计（仅当有连接词列表时）
+    if connectives_words:
+        for i, col, word, inner, stripped in iter_connective_hits(
+            lines,
+            start_line,
+            end_line,
+            connectives_words,
+            target_format,
+            in_block_math,
+            in_protected_env,
+        ):
+            where = "句首" if inner else "段/句首"
+            diagnostics.append(
+                {
+                    "line": i + 1,
+                    "column": col,
+                    "rule": "AIGC-CONN",
+                    "severity": "info",
+                    "message": f"{where}连接词“{word}”（连接词泛滥检测）",
+                    "fix": "评估是否可删除，目标削减 ≥ 50%",
+                    "context": stripped[:60],
+                }
+            )
 
     # 突发性粗评（段落内句长方差）
     burstiness_warnings = check_burstiness(
@@ -386,29 +969,130 @@ def check_file(
     return diagnostics
 
 
-def check_burstiness(
-    lines: list[str], start: int, end: int, target_format: str, in_protected_env=None
+# ── 单文件分块并行 ──────────────────────────────────────────
+
+# 少于该行数时进程池的启动开销大于收益，直接串行
+PARALLEL_MIN_LINES = 4000
+
+
+def split_chunks(
+    lines: list[str],
+    in_protected_env: list[int],
+    start: int = 0,
+    end: int | None = None,
+):
+    """在 [start, end) 内按非保护环境内的空行切块，产出 (起始行, 结束行)
+
+    iter_paragraphs 在这些空行处必然断段，逐行规则与连接词只看单行，
+    环境状态由预计算的标记携带，因此逐块检查与整篇检查结果一致。
+    """
+    end = len(lines) if end is None else end
+    chunk_start = start
+    for i in range(start, end):
+        if not lines[i].strip() and not in_protected_env[i]:
+            yield chunk_start, i + 1
+            chunk_start = i + 1
+    if chunk_start < end:
+        yield chunk_start, end
+
+
+def _init_chunk_worker(target_format: str) -> None:
+    compile_rules(target_format)
+
+
+def _check_chunk(
+    lines: list[str],
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+    target_format: str,
 ) -> list[dict]:
-    warnings, para_start, para_sentences = [], None, []
+    """工作进程：检查一个片段（行号相对片段起点）"""
+    rules, connectives_words = compile_rules(target_format)
+    return check_lines(
+        lines,
+        0,
+        len(lines),
+        rules,
+        connectives_words,
+        target_format,
+        in_block_math,
+        in_protected_env,
+    )
 
-    def _eval_para(p_start, sents):
-        if len(sents) < 4:
-            return None
-        avg = sum(sents) / len(sents)
-        variance = sum((s - avg) ** 2 for s in sents) / len(sents)
-        # 方差过低 → 句长过于均匀 → 低突发性
-        if avg > 0 and (variance**0.5) / avg < 0.20:
-            return {
-                "line": p_start + 1,
-                "column": 1,
-                "rule": "BURST-001",
-                "severity": "info",
-                "message": f"该段落句长方差过低（CV={((variance**0.5) / avg):.2f}），疑似低突发性",
-                "fix": "插入极短句（3~5字）或超长参数句（20+字）以提升顿挫感",
-                "context": f"段落起始行，含 {len(sents)} 句，平均句长 {avg:.0f} 字",
-            }
+
+def check_lines_parallel(
+    lines: list[str],
+    start_line: int,
+    end_line: int,
+    target_format: str,
+    in_block_math: list[bool],
+    in_protected_env: list[int],
+    jobs: int | None = None,
+) -> list[dict] | None:
+    """把 [start_line, end_line) 在段落边界切成若干片段，在进程池中并行检查
+
+    片段开头的块级数学/受保护环境状态直接取自整篇预计算的标记，
+    合并后按行序拼接，结果与串行 check_lines 完全一致。
+    无法创建进程池（如已在守护进程内）时返回 None，由调用方退回串行。
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if multiprocessing.current_process().daemon:
         return None
+    workers = jobs or os.cpu_count() or 1
+    if workers < 2:
+        return None
+
+    # 每个进程约分到 4 个片段，兼顾负载均衡与序列化开销
+    target = max(1, (end_line - start_line) // (workers * 4))
+    segments, seg_start = [], start_line
+    for _, chunk_end in split_chunks(lines, in_protected_env, start_line, end_line):
+        if chunk_end - seg_start >= target:
+            segments.append((seg_start, chunk_end))
+            seg_start = chunk_end
+    if seg_start < end_line:
+        segments.append((seg_start, end_line))
 
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_chunk_worker,
+            initargs=(target_format,),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _check_chunk,
+                    lines[a:b],
+                    in_block_math[a:b],
+                    in_protected_env[a:b],
+                    target_format,
+                )
+                for a, b in segments
+            ]
+            diagnostics = []
+            for (a, _), fut in zip(segments, futures):
+                for d in fut.result():
+                    d["line"] += a
+                    diagnostics.append(d)
+    except (OSError, NotImplementedError):
+        return None
+    return diagnostics
+
+
+_SENTENCE_END = re.compile(r"[。！？]")
+_LATEX_CMD_ARG = re.compile(r"\\[a-zA-Z]+\{[^}]*\}")
+_NON_CJK = re.compile(r"[^\u4e00-\u9fff]")
+
+
+def iter_text_lines(
+    lines: list[str], start: int, end: int, target_format: str, in_protected_env=None
+):
+    """逐行产出 (行号, 去首尾空白的正文行)；段落分隔处产出 (行号, None)
+
+    空行与 \\section/\\subsection 视为段落分隔；受保护环境、注释行和
+    \\begin/\\end 行被跳过但不打断段落。
+    """
     for i in range(start, end):
         # 如果在受保护环境内，跳过该行
         if (
@@ -421,56 +1105,182 @@ def check_burstiness(
         line = lines[i].strip()
         # 空行或环境边界视为段落分隔
         if not line:
-            if para_sentences:
-                w = _eval_para(para_start, para_sentences)
-                if w:
-                    warnings.append(w)
-            para_start = None
-            para_sentences = []
+            yield i, None
             continue
 
-        # LaTeX 特定分隔符
         if target_format == "latex":
+            # LaTeX 特定分隔符
             if line.startswith("\\section") or line.startswith("\\subsection"):
-                if para_sentences:
-                    w = _eval_para(para_start, para_sentences)
-                    if w:
-                        warnings.append(w)
-                para_start = None
-                para_sentences = []
+                yield i, None
+                continue
+            if line.startswith(("%", "\\begin", "\\end")):
                 continue
 
-        if (
-            (target_format == "latex" and line.startswith("%"))
-            or (target_format == "latex" and line.startswith("\\begin"))
-            or (target_format == "latex" and line.startswith("\\end"))
-        ):
-            continue
+        yield i, line
+
+
+def split_sentences(line: str, target_format: str):
+    """按中文句号/问号/叹号分句，逐句产出 (句内起始偏移, 原句, 只留汉字的文本)"""
+    pos = 0
+    for sentence in _SENTENCE_END.split(line):
+        # 移除 LaTeX 命令（仅 LaTeX）
+        if target_format == "latex":
+            clean = _LATEX_CMD_ARG.sub("", sentence)
+        else:
+            clean = sentence
+        yield pos, sentence, _NON_CJK.sub("", clean)
+        pos += len(sentence) + 1
+
+
+def iter_paragraphs(
+    lines: list[str], start: int, end: int, target_format: str, in_protected_env=None
+):
+    """按检查器统一的规则切分段落，逐段产出 (段落起始行号, 各句中文字数列表)
 
+    空行与 \\section/\\subsection 视为段落分隔；受保护环境、注释行和
+    \\begin/\\end 行被跳过但不打断段落。突发性检测、摘要与抽样估计共用此切分。
+    """
+    para_start, para_sentences = None, []
+    for i, line in iter_text_lines(lines, start, end, target_format, in_protected_env):
+        if line is None:
+            if para_start is not None:
+                yield para_start, para_sentences
+            para_start, para_sentences = None, []
+            continue
         if para_start is None:
             para_start = i
-
-        # 按中文句号/问号/叹号分句
-        sentences = re.split(r"[。！？]", line)
-        for s in sentences:
-            # 移除 LaTeX 命令（仅 LaTeX）
-            if target_format == "latex":
-                clean = re.sub(r"\\[a-zA-Z]+\{[^}]*\}", "", s)
-            else:
-                clean = s
-            clean = re.sub(r"[^\u4e00-\u9fff]", "", clean)  # 只留中文字
+        for _, _, clean in split_sentences(line, target_format):
             if len(clean) >= 2:
                 para_sentences.append(len(clean))
 
     # 处理最后一个段落
-    if para_sentences:
-        w = _eval_para(para_start, para_sentences)
-        if w:
-            warnings.append(w)
+    if para_start is not None:
+        yield para_start, para_sentences
+
+
+def paragraph_ranges(
+    lines: list[str], start: int, end: int, target_format: str, in_protected_env=None
+):
+    """与 iter_paragraphs 相同的切分规则，逐段产出 (首行, 末行) 下标（含正文的首末行）"""
+    para_lo = para_hi = None
+    for i, line in iter_text_lines(lines, start, end, target_format, in_protected_env):
+        if line is None:
+            if para_lo is not None:
+                yield para_lo, para_hi
+            para_lo = None
+            continue
+        if para_lo is None:
+            para_lo = i
+        para_hi = i
+    if para_lo is not None:
+        yield para_lo, para_hi
+
+
+def cjk_counts(
+    lines: list[str], start: int, end: int, target_format: str, in_protected_env=None
+) -> list[int]:
+    """每行汉字数（--summary / --estimate 的密度分母），范围外为 0
 
+    跳过 LaTeX 注释行和整体跳过的环境（如代码清单）。
+    """
+    cjk = [0] * len(lines)
+    for i in range(start, end):
+        line = lines[i]
+        if target_format == "latex" and (
+            line.lstrip().startswith("%")
+            or (in_protected_env is not None and in_protected_env[i] == ENV_SKIPPED)
+        ):
+            continue
+        cjk[i] = len(_NON_CJK.sub("", line))
+    return cjk
+
+
+def iter_sentences(
+    lines: list[str], start: int, end: int, target_format: str, in_protected_env=None
+):
+    """与 iter_paragraphs 相同的切分规则，逐句产出 (行号, 列号, 原句, 只留汉字的文本)
+
+    行号、列号从 1 开始，指向原句在原始行中的位置。
+    """
+    for i, line in iter_text_lines(lines, start, end, target_format, in_protected_env):
+        if line is None:
+            continue
+        indent = len(lines[i]) - len(lines[i].lstrip())
+        for offset, sentence, clean in split_sentences(line, target_format):
+            if clean:
+                lead = len(sentence) - len(sentence.lstrip())
+                yield i + 1, indent + offset + lead + 1, sentence.strip(), clean
+
+
+def sentence_cv(sents: list[int]) -> float | None:
+    """句长变异系数（标准差 / 均值）；不足 4 句时返回 None"""
+    if len(sents) < 4:
+        return None
+    avg = sum(sents) / len(sents)
+    if avg <= 0:
+        return None
+    variance = sum((s - avg) ** 2 for s in sents) / len(sents)
+    return (variance**0.5) / avg
+
+
+def check_burstiness(
+    lines: list[str], start: int, end: int, target_format: str, in_protected_env=None
+) -> list[dict]:
+    warnings = []
+    for p_start, sents in iter_paragraphs(
+        lines, start, end, target_format, in_protected_env
+    ):
+        cv = sentence_cv(sents)
+        # 方差过低 → 句长过于均匀 → 低突发性
+        if cv is not None and cv < 0.20:
+            avg = sum(sents) / len(sents)
+            warnings.append(
+                {
+                    "line": p_start + 1,
+                    "column": 1,
+                    "rule": "BURST-001",
+                    "severity": "info",
+                    "message": f"该段落句长方差过低（CV={cv:.2f}），疑似低突发性",
+                    "fix": "插入极短句（3~5字）或超长参数句（20+字）以提升顿挫感",
+                    "context": f"段落起始行，含 {len(sents)} 句，平均句长 {avg:.0f} 字",
+                }
+            )
     return warnings
 
 
+def text_metrics(text: str, diagnostics: list[dict], target_format: str = "latex") -> dict:
+    """汇总一份文本的 AIGC 指标（供备份时间线等横向对比使用）
+
+    返回:
+        {"error", "warning", "info": 各级别数量,
+         "cjk_chars": 中文字数,
+         "connective_density": 每千中文字的句首连接词数,
+         "burstiness": 各段句长变异系数的均值（越高越有顿挫感，无可评段落时为 None）}
+    """
+    counts = {"error": 0, "warning": 0, "info": 0}
+    connectives = 0
+    for d in diagnostics:
+        counts[d["severity"]] = counts.get(d["severity"], 0) + 1
+        if d["rule"] == "AIGC-CONN":
+            connectives += 1
+    cjk_chars = len(re.findall(r"[\u4e00-\u9fff]", text))
+
+    lines = text.splitlines()
+    protected = precompute_envs(lines, target_format)[1] if target_format == "latex" else None
+    cvs = [
+        cv
+        for _, sents in iter_paragraphs(lines, 0, len(lines), target_format, protected)
+        for cv in (sentence_cv(sents),)
+        if cv is not None
+    ]
+    return {
+        **counts,
+        "cjk_chars": cjk_chars,
+        "connective_density": connectives * 1000 / cjk_chars if cjk_chars else 0.0,
+        "burstiness": sum(cvs) / len(cvs) if cvs else None,
+    }
+
+
 # ── 输出格式化 ────────────────────────────────────────────
 
 SEVERITY_ICONS = {
@@ -510,19 +1320,150 @@ def format_text(diagnostics: list[dict], filepath: str) -> str:
     return "\n".join(lines)
 
 
+# 分组输出中每组默认附带上下文的命中数
+GROUP_CONTEXT_HITS = 1
+
+_SEVERITY_ORDER = {"error": 0, "warning": 1, "info": 2}
+
+
+def group_diagnostics(
+    diagnostics: list[dict], context_hits: int = GROUP_CONTEXT_HITS
+) -> list[dict]:
+    """按 (规则, 提示信息) 合并诊断：message/fix 只出现一次，位置压缩为 "行:列"
+
+    同一条规则的提示信息含命中内容时（如连接词、句长 CV）按信息分开成组，
+    不丢失信息。只有每组前 context_hits 个位置附带上下文。组按严重级别、
+    首次出现位置排序。
+    """
+    groups: dict[tuple[str, str], dict] = {}
+    for d in diagnostics:
+        key = (d["rule"], d["message"])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "rule": d["rule"],
+                "severity": d.get("severity", "info"),
+                "message": d["message"],
+                "fix": d["fix"],
+                "count": 0,
+                "positions": [],
+                "context": {},
+            }
+        pos = f"{d['line']}:{d['column']}"
+        group["count"] += 1
+        group["positions"].append(pos)
+        if len(group["context"]) < context_hits:
+            group["context"][pos] = d["context"][:80]
+    return sorted(
+        groups.values(),
+        key=lambda g: (
+            _SEVERITY_ORDER.get(g["severity"], 3),
+            tuple(map(int, g["positions"][0].split(":"))),
+        ),
+    )
+
+
+def format_grouped(groups: list[dict], filepath: str) -> str:
+    """分组诊断的文本报告（每组一块，位置列在一行内）"""
+    if not groups:
+        return f"[OK] {filepath}: 未发现问题"
+
+    counts: dict[str, int] = {"error": 0, "warning": 0, "info": 0}
+    lines = [f"{'=' * 60}", f"  检查文件: {filepath}", f"{'=' * 60}"]
+    for g in groups:
+        sev = g["severity"]
+        counts[sev] = counts.get(sev, 0) + g["count"]
+        icon = SEVERITY_ICONS.get(sev, f"[{sev.upper()}]")
+        lines.append("")
+        lines.append(f"{icon} [{g['rule']}] ×{g['count']}  {g['message']}")
+        lines.append(f"   位置: {', '.join('L' + p for p in g['positions'])}")
+        for pos, context in g["context"].items():
+            lines.append(f"   上下文 L{pos}: {context}")
+        lines.append(f"   修复建议: {g['fix']}")
+
+    lines.append("")
+    lines.append(f"{'=' * 60}")
+    lines.append(
+        f"  汇总: {counts['error']} 错误 | {counts['warning']} 警告 | {counts['info']} 提示"
+        f"（{len(groups)} 组）"
+    )
+    lines.append(f"{'=' * 60}")
+    return "\n".join(lines)
+
+
 # ── 入口 ──────────────────────────────────────────────────
 
 
-def main():
+# 快速路径能处理的选项：{选项: 合法取值（None 表示开关，() 表示非负整数）}
+_FAST_OPTIONS = {
+    "--json": None,
+    "--group": None,
+    "--format": ("latex", "markdown", "plain"),
+    "--severity": ("error", "warning", "info"),
+    "--section": (),
+    "--context": (),
+}
+
+
+def _parse_args_fast(argv: list[str]):
+    """最常见的“单文件 + 少量选项”调用不导入 argparse（省下约 6 ms 启动时间）
+
+    只要出现无法确定处理方式的参数（--help、未知选项、取值非法、多个文件等）
+    就返回 None，交给 argparse 给出完整的解析与报错。
+    """
+    from types import SimpleNamespace
+
+    args = SimpleNamespace(
+        file=None, format="latex", section=None, json=False, severity=None,
+        watch=False, interval=0.5, debounce=0.3, fix=False, jobs=None,
+        group=False, context=GROUP_CONTEXT_HITS,
+    )
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in _FAST_OPTIONS:
+            choices = _FAST_OPTIONS[arg]
+            if choices is None:
+                setattr(args, arg[2:], True)
+                i += 1
+                continue
+            if i + 1 >= len(argv):
+                return None
+            value = argv[i + 1]
+            if choices == ():
+                if not value.isdigit():
+                    return None
+                setattr(args, arg[2:], int(value))
+            elif value in choices:
+                setattr(args, arg[2:], value)
+            else:
+                return None
+            i += 2
+        elif (arg.startswith("-") and arg != "-") or args.file is not None:
+            return None
+        else:
+            args.file = arg
+            i += 1
+    return args if args.file is not None else None
+
+
+def _build_parser():
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="engineering-paper-humanizer AIGC 检测"
     )
-    parser.add_argument("file", help="要检查的文件路径")
+    parser.add_argument(
+        "file",
+        nargs="*",
+        help="要检查的文件路径，- 表示标准输入（--watch 时可给多个文件或目录；"
+        "--staged 时为可选的 pathspec；--stream 时为 NDJSON 请求文件，默认标准输入）",
+    )
     parser.add_argument(
         "--format",
         choices=["latex", "markdown", "plain"],
-        default="latex",
-        help="文件格式（默认: latex）",
+        default=None,
+        help="文件格式（默认: latex；--staged/--estimate 时默认按扩展名推断）",
     )
     parser.add_argument(
         "--section",
@@ -539,24 +1480,235 @@ def main():
         choices=["error", "warning", "info"],
         help="只显示指定严重级别及以上",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--group",
+        action="store_true",
+        help="按规则分组输出：提示与修复建议每组只出现一次，命中位置压缩为 行:列 列表",
+    )
+    parser.add_argument(
+        "--context",
+        type=int,
+        default=GROUP_CONTEXT_HITS,
+        metavar="N",
+        help=f"--group 时每组前 N 个命中附带上下文（默认: {GROUP_CONTEXT_HITS}，0 表示不附带）",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="监视文件/目录，保存后增量复查并只输出新增/消除的诊断",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="--watch 轮询间隔秒数（默认: 0.5）",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.3,
+        help="--watch 静默多少秒后才复查，合并连续保存（默认: 0.3）",
+    )
+    parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="一次性应用全部安全的机械式修复（原子写回），并输出剩余诊断",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"大文件分块并行的进程数（默认按 CPU 核数，1 表示串行；"
+        f"少于 {PARALLEL_MIN_LINES} 行的范围始终串行）",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="检查 Git 暂存区中的文件内容（供 pre-commit 钩子使用，有错误时退出码为 1）",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="NDJSON 流模式：每行输入 {id, text, format} 检查一份文本，逐行输出诊断",
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="不输出逐条诊断，只输出各章节命中密度（次/千字）与最需要处理的段落",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        metavar="K",
+        help="--summary 列出的最差段落数（默认: 5）",
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="按章节分层抽样段落，估计各项命中密度及 95%% 置信区间（可给多个文件，批量筛查用）",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        default=10,
+        metavar="PCT",
+        help="--estimate 的目标精度：总密度区间半宽不超过估计值的 PCT%%，"
+        "据此决定抽样段落数（默认: 10；0 表示全抽）",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="--estimate 的随机种子（默认: 0，同一文件结果可复现）",
+    )
+    return parser
+
+
+def main():
+    args = _parse_args_fast(sys.argv[1:])
+    if args is None:
+        parser = _build_parser()
+        args = parser.parse_args()
+        if args.summary and (args.watch or args.fix or args.staged):
+            parser.error("--summary 不能与 --watch/--fix/--staged 同时使用")
+        if args.group and (args.watch or args.summary or args.staged):
+            parser.error("--group 不能与 --watch/--summary/--staged 同时使用")
+        if args.context < 0:
+            parser.error("--context 不能为负数")
+        if args.estimate and (
+            args.watch or args.fix or args.staged or args.stream or args.summary or args.group
+        ):
+            parser.error(
+                "--estimate 不能与 --watch/--fix/--staged/--stream/--summary/--group 同时使用"
+            )
+        if args.precision < 0:
+            parser.error("--precision 不能为负数")
+        if args.stream:
+            if args.watch or args.fix or args.summary or args.staged:
+                parser.error("--stream 不能与 --watch/--fix/--summary/--staged 同时使用")
+            if args.section is not None:
+                parser.error("--stream 的章节请在每行请求的 section 字段中指定")
+            if len(args.file) > 1:
+                parser.error("--stream 只接受一个请求文件")
+            from aigc_stream import run_stream
+
+            sys.exit(
+                run_stream(
+                    args.file[0] if args.file else None,
+                    args.format or "latex",
+                    args.severity,
+                    args.group,
+                    args.context,
+                )
+            )
+        if args.staged:
+            if args.watch or args.fix or args.section is not None:
+                parser.error("--staged 不能与 --watch/--fix/--section 同时使用")
+            from aigc_staged import run_staged
+
+            sys.exit(
+                run_staged(
+                    args.file, args.format, args.severity, args.json, args.jobs
+                )
+            )
+        if not args.file:
+            parser.error("缺少要检查的文件路径")
+        if args.estimate:
+            from aigc_estimate import estimate_file, format_estimates
+
+            results = [
+                estimate_file(
+                    path,
+                    args.format,
+                    args.section,
+                    args.severity,
+                    args.precision,
+                    args.seed,
+                )
+                for path in args.file
+            ]
+            if args.json:
+                print(json.dumps(results, ensure_ascii=False, indent=2))
+            else:
+                print(format_estimates(results))
+            if any("error" in r for r in results):
+                sys.exit(1)
+            return
+        args.format = args.format or "latex"
+        if args.watch:
+            if args.section is not None:
+                parser.error("--watch 不支持 --section")
+            if "-" in args.file:
+                parser.error("--watch 不支持标准输入")
+            if args.fix:
+                parser.error("--watch 不能与 --fix 同时使用")
+            from aigc_watch import watch
+
+            watch(
+                args.file,
+                args.format,
+                severity=args.severity,
+                interval=args.interval,
+                debounce=args.debounce,
+                as_json=args.json,
+            )
+            return
+        if len(args.file) > 1:
+            parser.error("一次只能检查一个文件（多文件/目录请配合 --watch 或 --estimate）")
+        args.file = args.file[0]
+        if args.fix and args.file == "-":
+            parser.error("--fix 需要写回文件，不支持标准输入")
+        if args.summary:
+            from aigc_summary import format_summary, summarize_file
+
+            summary = summarize_file(
+                args.file, args.format, args.section, args.severity, args.top
+            )
+            if args.json:
+                print(json.dumps(summary, ensure_ascii=False, indent=2))
+            else:
+                print(format_summary(summary, args.file))
+            return
 
-    diagnostics = check_file(args.file, args.format, args.section)
+    changes = None
+    if args.fix:
+        from aigc_fix import fix_file, format_changes
+
+        fixed_text, changes = fix_file(args.file, args.format, args.section)
+        diagnostics = check_text(fixed_text, args.format, args.section, args.jobs)
+    else:
+        diagnostics = check_file(args.file, args.format, args.section, args.jobs)
 
     # 过滤严重级别
     if args.severity:
-        levels = {"error": 3, "warning": 2, "info": 1}
-        threshold = levels[args.severity]
+        threshold = SEVERITY_LEVELS[args.severity]
         diagnostics = [
             d
             for d in diagnostics
-            if levels.get(d.get("severity", "info"), 0) >= threshold
+            if SEVERITY_LEVELS.get(d.get("severity", "info"), 0) >= threshold
         ]
 
+    key, report = "diagnostics", diagnostics
+    if args.group:
+        key, report = "groups", group_diagnostics(diagnostics, args.context)
+
     if args.json:
-        print(json.dumps(diagnostics, ensure_ascii=False, indent=2))
+        # 分组模式面向 agent，省掉缩进空白
+        layout = {"separators": (",", ":")} if args.group else {"indent": 2}
+        if changes is not None:
+            payload = {"file": args.file, "fixed": changes, key: report}
+            print(json.dumps(payload, ensure_ascii=False, **layout))
+        else:
+            print(json.dumps(report, ensure_ascii=False, **layout))
     else:
-        print(format_text(diagnostics, args.file))
+        if changes is not None:
+            print(format_changes(changes, args.file))
+        if args.group:
+            print(format_grouped(report, args.file))
+        else:
+            print(format_text(diagnostics, args.file))
 
 
 if __name__ == "__main__":
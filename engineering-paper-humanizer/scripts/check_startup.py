@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""check_aigc.py 启动开销回归检查
+
+agent 会对短片段高频调用 check_aigc.py，启动时间主要花在模块导入与规则
+编译上。本脚本用 `python -X importtime` 跑一次典型调用（单个短文件 + --json），
+确认没有重新引入重量级模块，并报告多次运行中最快的一次耗时。
+
+用法:
+    python3 scripts/check_startup.py                   # 检查导入 + 报告耗时
+    python3 scripts/check_startup.py --budget-ms 60    # 耗时超过预算也视为失败
+    python3 scripts/check_startup.py --top 10          # 列出自身耗时最多的模块
+
+退出码：0 通过，1 出现禁止导入的模块或超出耗时预算。
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "check_aigc.py")
+
+# 快速路径不应导入的模块（只在 --watch/--fix/--jobs 等路径按需导入）
+FORBIDDEN = (
+    "argparse",
+    "pathlib",
+    "concurrent",
+    "multiprocessing",
+    "shutil",
+    "tempfile",
+    "subprocess",
+    "locale",
+    "gettext",
+)
+
+SAMPLE = "\\section{引言}\n本文旨在研究一种新的方法\\cite{a}。\n"
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """解析 -X importtime 输出：[(模块名, 自身耗时 us, 累计耗时 us)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+        except ValueError:
+            continue
+    return rows
+
+
+def run_once(sample: str, importtime: bool = False) -> tuple[float, str]:
+    """运行一次典型调用，返回 (墙钟毫秒, stderr)"""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += [SCRIPT, sample, "--json"]
+    start = time.perf_counter()
+    proc = subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0 and not importtime:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(f"[FAIL] check_aigc.py 退出码 {proc.returncode}")
+    return elapsed, proc.stderr
+
+
+def time_interpreter() -> float:
+    """空解释器启动耗时（毫秒），用来区分脚本自身开销与 Python 本身的开销"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"])
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="check_aigc.py 启动开销回归检查")
+    parser.add_argument(
+        "--runs", type=int, default=10, help="计时运行次数，取最快一次（默认: 10）"
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=None,
+        help="最快一次的耗时上限（毫秒）；不指定时只报告不判定",
+    )
+    parser.add_argument(
+        "--top", type=int, default=0, help="列出自身导入耗时最多的 N 个模块"
+    )
+    args = parser.parse_args()
+
+    fd, sample = tempfile.mkstemp(suffix=".tex", prefix="humanizer-startup-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(SAMPLE)
+
+        _, stderr = run_once(sample, importtime=True)
+        rows = parse_importtime(stderr)
+        if not rows:
+            print("[FAIL] 未能解析 -X importtime 输出", file=sys.stderr)
+            sys.exit(1)
+        forbidden = sorted(
+            {name for name, _, _ in rows if name.split(".")[0] in FORBIDDEN}
+        )
+        total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+
+        best = min(run_once(sample)[0] for _ in range(max(args.runs, 1)))
+        baseline = min(time_interpreter() for _ in range(max(args.runs, 1)))
+    finally:
+        os.unlink(sample)
+
+    print(f"导入模块 {len(rows)} 个，导入自身耗时合计 {total_ms:.1f} ms")
+    print(
+        f"最快一次调用耗时 {best:.1f} ms（{args.runs} 次；"
+        f"空解释器 {baseline:.1f} ms，脚本自身约 {best - baseline:.1f} ms）"
+    )
+    if args.top:
+        print(f"自身耗时最多的 {args.top} 个模块：")
+        for name, self_us, cum_us in sorted(rows, key=lambda r: -r[1])[: args.top]:
+            print(f"  {self_us / 1000:6.2f} ms  (累计 {cum_us / 1000:6.2f} ms)  {name}")
+
+    failed = False
+    if forbidden:
+        print(f"[FAIL] 快速路径导入了重量级模块：{', '.join(forbidden)}")
+        failed = True
+    if args.budget_ms is not None and best > args.budget_ms:
+        print(f"[FAIL] 耗时 {best:.1f} ms 超出预算 {args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("[OK] 启动开销检查通过")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,15 @@
 生成 Markdown 格式的敏感词替换字典，可用于文档或快速参考。
 不用于实际检测，仅用于人类阅读。
 
+敏感词一栏由正则的语法树（sre_parse）渲染：分支展开为词表，字符类概括为
+〈数字〉〈表情/符号〉等，可省略部分用 [ ] 标出，任意文字用 … 表示。
+渲染结果按规则内容与本脚本的哈希缓存；--output 时只有内容确实
+变化才会改写目标文件，规则未变时重复生成是空操作。
+
 用法:
     python3 scripts/generate_dict.py > dict.md
     python3 scripts/generate_dict.py --format latex > dict-latex.md
+    python3 scripts/generate_dict.py --format latex --output dict-latex.md
 """
 
 from __future__ import annotations
@@ -17,30 +23,32 @@ import io
 import os
 import re
 import json
+import hashlib
+import unicodedata
 from pathlib import Path
 
+import aigc_rules
+
+try:  # Python 3.11 起 sre_parse 改名为 re._parser（旧名仍可用但会告警）
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# 一条正则展开后的最多词数，超出时改为 (a/b)[c] 的紧凑写法
+MAX_ALTERNATIVES = 8
+
 # ── Windows GBK 兼容：强制 stdout/stderr 使用 UTF-8 ────────
 if os.name == "nt":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
 
 
-def load_rules() -> tuple[list[dict], dict]:
-    """从 rules.json 加载规则和连接词"""
-    script_dir = Path(__file__).parent
-    rules_path = script_dir / "rules.json"
+def load_rules(format_filter: str = "all") -> tuple[list[dict], dict]:
+    """加载规则和连接词（与 check_aigc 共用 aigc_rules 加载器）
 
-    if not rules_path.exists():
-        print(f"[ERROR] 规则文件不存在: {rules_path}", file=sys.stderr)
-        sys.exit(1)
-
-    try:
-        data = json.loads(rules_path.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"[ERROR] 无法加载 rules.json: {e}", file=sys.stderr)
-        sys.exit(1)
-
-    return data.get("rules", []), data.get("connectives", {})
+    指定格式时只读取该格式用得到的分片。
+    """
+    return aigc_rules.load_rules(None if format_filter == "all" else format_filter)
 
 
 def categorize_rules(rules: list[dict]) -> dict[str, list[dict]]:
@@ -64,6 +72,157 @@ def categorize_rules(rules: list[dict]) -> dict[str, list[dict]]:
     return {k: v for k, v in categories.items() if v}
 
 
+# ── 正则 → 可读词表 ─────────────────────────────────────
+
+# 字符区间的可读名称；不在表内的区间按 首-尾 显示，高位符号区统一归为表情/符号
+RANGE_NAMES = {
+    (0x30, 0x39): "数字",
+    (0x41, 0x5A): "大写字母",
+    (0x61, 0x7A): "小写字母",
+    (0x4E00, 0x9FFF): "汉字",
+}
+
+CATEGORY_NAMES = {
+    sre_parse.CATEGORY_DIGIT: "数字",
+    sre_parse.CATEGORY_NOT_DIGIT: "非数字",
+    sre_parse.CATEGORY_SPACE: "空白",
+    sre_parse.CATEGORY_NOT_SPACE: "非空白",
+    sre_parse.CATEGORY_WORD: "字母数字",
+    sre_parse.CATEGORY_NOT_WORD: "非字母数字",
+}
+
+
+def _fold_width(chars: list[str]) -> list[str]:
+    """全角/半角写法相同的字符只保留第一个（如 [）)] 只显示 ）"""
+    seen, out = set(), []
+    for c in chars:
+        key = unicodedata.normalize("NFKC", c)
+        if key not in seen:
+            seen.add(key)
+            out.append(c)
+    return out
+
+
+def _render_class(items) -> list[str]:
+    """字符类：纯字面字符展开为候选，区间/类别概括为 〈名称〉，取反类视为任意文字"""
+    if items and items[0][0] is sre_parse.NEGATE:
+        return ["…"]
+    if items == [(sre_parse.CATEGORY, sre_parse.CATEGORY_SPACE)]:
+        return [" "]
+    chars, names = [], []
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            chars.append(chr(av))
+        elif op is sre_parse.RANGE:
+            lo, hi = av
+            if (lo, hi) in RANGE_NAMES:
+                names.append(RANGE_NAMES[(lo, hi)])
+            elif lo >= 0x2190 and not 0x4E00 <= lo <= 0x9FFF:
+                names.append("表情/符号")
+            else:
+                names.append(f"{chr(lo)}-{chr(hi)}")
+        elif op is sre_parse.CATEGORY:
+            names.append(CATEGORY_NAMES.get(av, "字符"))
+        else:
+            names.append("字符")
+    if not names:
+        return _fold_width(chars)
+    # 混有区间时整体概括：高位符号区里零散的单字符也归入表情/符号
+    if any(ord(c) >= 0x2190 and not 0x4E00 <= ord(c) <= 0x9FFF for c in chars):
+        names.append("表情/符号")
+        chars = [c for c in chars if ord(c) < 0x2190]
+    names = list(dict.fromkeys(names + chars))
+    return ["〈" + "/".join(names) + "〉"]
+
+
+def _collapse(alternatives: list[str]) -> str:
+    """把一组候选收拢成一个写法：(a/b) 任选其一，[a/b] 可省略"""
+    words = [a for a in alternatives if a]
+    if not words:
+        return ""
+    body = "/".join(words)
+    if len(words) < len(alternatives):
+        return f"[{body}]"
+    return body if len(words) == 1 else f"({body})"
+
+
+def _render_repeat(lo: int, hi: int, sub) -> list[str]:
+    alternatives = _render_seq(sub)
+    if alternatives == ["…"]:
+        return ["…"]
+    if alternatives == [" "]:
+        return [""] if lo == 0 else [" "]
+    if lo == 0:
+        # 可省略：候选少时直接展开出“有/无”两种写法
+        if len(alternatives) + 1 <= MAX_ALTERNATIVES and hi == 1:
+            return [""] + alternatives
+        return [_collapse([""] + alternatives)]
+    if lo == hi and lo > 1:
+        return [f"{_collapse(alternatives)}（×{lo}）"]
+    if hi > lo:
+        return [_collapse(alternatives) + "…"]
+    return alternatives
+
+
+def _render_node(op, av) -> list[str]:
+    if op is sre_parse.LITERAL:
+        return [chr(av)]
+    if op is sre_parse.NOT_LITERAL or op is sre_parse.ANY:
+        return ["…"]
+    if op is sre_parse.IN:
+        return _render_class(av)
+    if op is sre_parse.BRANCH:
+        out = []
+        for seq in av[1]:
+            out.extend(_render_seq(seq))
+        return list(dict.fromkeys(out))
+    if op is sre_parse.SUBPATTERN:
+        return _render_seq(av[-1])
+    if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+        return _render_repeat(*av)
+    if op is sre_parse.ASSERT:
+        # 肯定的前后文断言是命中条件的一部分，照常显示
+        return _render_seq(av[1])
+    if op is sre_parse.AT or op is sre_parse.ASSERT_NOT:
+        return [""]
+    return ["…"]
+
+
+def _render_seq(seq) -> list[str]:
+    """渲染一个节点序列，返回候选写法
+
+    全部组合不超过 MAX_ALTERNATIVES 个时逐一展开，否则整条收拢为一个
+    (a/b)[c] 式的紧凑写法，避免组合爆炸（单个分支节点本身不会爆炸，照常列出）。
+    """
+    nodes = [_render_node(op, av) for op, av in seq]
+    total = 1
+    for alternatives in nodes:
+        total *= len(alternatives)
+    if total > MAX_ALTERNATIVES and len(nodes) > 1:
+        out = ["".join(_collapse(alternatives) for alternatives in nodes)]
+    else:
+        out = [""]
+        for alternatives in nodes:
+            out = [a + b for a in out for b in alternatives]
+    # 相邻的任意文字合并为一个 …
+    return list(dict.fromkeys(re.sub("…+", "…", a) for a in out))
+
+
+def render_pattern(pattern: str) -> list[str]:
+    """把规则正则渲染为可读词表；无法解析时原样返回"""
+    try:
+        tree = sre_parse.parse(pattern)
+    except (re.error, RecursionError):
+        return [pattern]
+    words = [w.strip() for w in _render_seq(list(tree)) if w.strip()]
+    return words or [pattern]
+
+
+def _code_span(word: str) -> str:
+    # 表格内的 | 需转义，否则会被当作列分隔符
+    return "`" + word.replace("|", "\\|") + "`"
+
+
 def format_markdown_table(rules: list[dict]) -> str:
     """生成 Markdown 表格"""
     if not rules:
@@ -74,28 +233,9 @@ def format_markdown_table(rules: list[dict]) -> str:
     lines.append("|-------------------|-----------|----------|----------|")
 
     for rule in rules:
-        # 提取敏感词（从 pattern 中提取人类可读部分）
         pattern = rule.get("pattern", "")
         message = rule.get("message", "")
-
-        # 简化 pattern 显示
-        display_pattern = pattern
-        if len(pattern) > 40:
-            display_pattern = pattern[:37] + "..."
-
-        # 清理正则元字符
-        display_pattern = display_pattern.replace("\\", "")
-        display_pattern = display_pattern.replace("(?:", "")
-        display_pattern = display_pattern.replace(")", "")
-        display_pattern = display_pattern.replace(".*?", "…")
-        display_pattern = display_pattern.replace("?", "")
-        display_pattern = display_pattern.replace("*", "")
-        display_pattern = display_pattern.replace("+", "")
-        display_pattern = display_pattern.replace("[", "")
-        display_pattern = display_pattern.replace("]", "")
-        display_pattern = display_pattern.replace("^", "")
-        display_pattern = display_pattern.replace("$", "")
-        display_pattern = display_pattern.replace("|", " 或 ")
+        display_pattern = " / ".join(_code_span(w) for w in render_pattern(pattern))
 
         # 提取替换建议
         fix = rule.get("fix", "")
@@ -116,7 +256,7 @@ def format_markdown_table(rules: list[dict]) -> str:
         format_str = ", ".join(formats)
 
         lines.append(
-            f"| `{display_pattern}` | {fix} | {severity_icon} {severity} | {format_str} |"
+            f"| {display_pattern} | {fix} | {severity_icon} {severity} | {format_str} |"
         )
 
     return "\n".join(lines)
@@ -124,7 +264,7 @@ def format_markdown_table(rules: list[dict]) -> str:
 
 def generate_markdown(format_filter: str = "all") -> str:
     """生成完整的 Markdown 文档"""
-    rules, connectives = load_rules()
+    rules, connectives = load_rules(format_filter)
     categories = categorize_rules(rules)
 
     lines = []
@@ -132,6 +272,10 @@ def generate_markdown(format_filter: str = "all") -> str:
     lines.append("")
     lines.append("> 本文件由 `scripts/generate_dict.py` 从 `rules.json` 自动生成。")
     lines.append("> 实际检测请使用 `python3 scripts/check_aigc.py <file>`。")
+    lines.append(
+        "> 词条写法：`(a/b)` 任选其一，`[a]` 可省略，`…` 任意文字，"
+        "`〈数字〉` 等表示一类字符。"
+    )
     lines.append("")
     lines.append("## 连接词泛滥检测")
     lines.append("")
@@ -190,6 +334,74 @@ def generate_markdown(format_filter: str = "all") -> str:
     return "\n".join(lines)
 
 
+# ── 渲染缓存 ──────────────────────────────────────────────
+
+
+def cache_dir() -> Path:
+    """用户级缓存目录（不写进 skill 目录，避免污染仓库）"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "engineering-paper-humanizer"
+
+
+def cache_key(format_filter: str) -> str | None:
+    """规则内容 + 本脚本 + Python 版本 + 格式 的哈希；规则文件不可读时返回 None"""
+    h = hashlib.sha256()
+    try:
+        h.update(aigc_rules.rules_fingerprint().encode())
+        h.update(Path(__file__).read_bytes())
+    except OSError:
+        return None
+    h.update(f"{sys.version_info[:2]}|{format_filter}".encode())
+    return h.hexdigest()
+
+
+def cached_markdown(format_filter: str = "all", use_cache: bool = True) -> str:
+    """生成速查表：缓存命中时直接返回，否则渲染后写入缓存（缓存失败不影响结果）"""
+    key = cache_key(format_filter) if use_cache else None
+    path = cache_dir() / f"dict-{format_filter}.json"
+    if key:
+        try:
+            cached = json.loads(path.read_text(encoding="utf-8"))
+            if cached.get("key") == key:
+                return cached["markdown"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    markdown = generate_markdown(format_filter)
+    if key:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(
+                json.dumps({"key": key, "markdown": markdown}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(tmp, path)
+        except OSError:
+            if tmp.exists():
+                tmp.unlink()
+    return markdown
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """内容与现有文件相同时不写（保留 mtime，CI 中 make 等工具不会误判），返回是否写入"""
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    return True
+
+
 def main():
     import argparse
 
@@ -204,16 +416,23 @@ def main():
         "--output",
         type=str,
         default=None,
-        help="输出文件路径（默认: stdout）",
+        help="输出文件路径（默认: stdout）；内容未变化时不改写",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="忽略渲染缓存，强制重新生成",
     )
     args = parser.parse_args()
 
-    markdown = generate_markdown(args.format)
+    markdown = cached_markdown(args.format, use_cache=not args.no_cache)
 
     if args.output:
         output_path = Path(args.output)
-        output_path.write_text(markdown, encoding="utf-8")
-        print(f"[OK] 已生成: {output_path}", file=sys.stderr)
+        if write_if_changed(output_path, markdown):
+            print(f"[OK] 已生成: {output_path}", file=sys.stderr)
+        else:
+            print(f"[OK] 内容未变化，跳过写入: {output_path}", file=sys.stderr)
     else:
         print(markdown)
 
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""engineering-paper-humanizer Git 底层访问层
+
+把备份脚本需要的 git 读操作收拢到少数几个长驻进程中，减少进程创建开销
+（Windows 与容器环境下 spawn 一个 git 进程的耗时往往超过命令本身）：
+
+- GitSession.object_info / read_object：复用同一个 `git cat-file --batch-check`
+  / `git cat-file --batch` 进程查询任意对象，整个脚本调用期间只启动一次
+- GitSession.for_each_ref：一次 `git for-each-ref` 取回全部引用及所需字段，
+  代替逐分支的 `git log` / `git rev-parse`
+- hash_blob：在进程内计算 blob 哈希（与 `git hash-object --no-filters` 一致）
+- update_refs / delete_refs / create_ref：带旧值校验（比较并交换）的批量引用更新
+- RepoLock：仓库级锁文件，保护列举 + 淘汰这类读改写序列
+- LooseObjectStore：用 zlib + SHA-1 直接写松散对象、编辑 tree、生成 commit，
+  备份快照的写入路径只需一次 `git update-ref`；非常规仓库自动回退
+
+本模块只依赖标准库，可被同目录下的其他脚本直接 import。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import subprocess
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+
+ZERO_SHA = "0" * 40  # update-ref 中表示“引用必须不存在”的旧值
+
+
+# ── 一次性命令 ─────────────────────────────────────────────
+
+
+def run_git(
+    *args: str,
+    check: bool = False,
+    input: str | None = None,
+    env: dict | None = None,
+) -> subprocess.CompletedProcess:
+    """执行 git 命令并返回结果"""
+    return subprocess.run(
+        ["git", *args],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=check,
+        input=input,
+        env=env,
+    )
+
+
+def update_refs(updates: list[tuple[str, str, str]]) -> subprocess.CompletedProcess:
+    """在一个 `git update-ref --stdin` 事务中更新/删除多个引用
+
+    参数:
+        updates: [(完整引用名, 新值, 期望的旧值)]；新值为 ZERO_SHA 表示删除，
+                 旧值为 ZERO_SHA 表示引用必须尚不存在。任一引用的当前值与旧值
+                 不符时整个事务失败，不会留下改了一半的状态
+
+    返回:
+        update-ref 的执行结果
+    """
+    commands = "".join(f"update {ref} {new} {old}\n" for ref, new, old in updates)
+    return run_git("update-ref", "--stdin", input=commands)
+
+
+def delete_refs(refs: list[tuple[str, str]]) -> subprocess.CompletedProcess:
+    """在一个事务中删除多个引用（refs 为 [(完整引用名, 期望的旧值)]）"""
+    return update_refs([(ref, ZERO_SHA, old) for ref, old in refs])
+
+
+def write_object(obj_type: str, data: bytes) -> str | None:
+    """通过 `git hash-object -w --stdin` 写入任意对象（以字节传递，不做换行转换）"""
+    result = subprocess.run(
+        ["git", "hash-object", "-t", obj_type, "-w", "--stdin"],
+        input=data,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode("ascii").strip()
+
+
+def create_ref(refname: str, sha: str) -> subprocess.CompletedProcess:
+    """创建新引用（比较并交换：旧值为全零，引用已存在时失败而不是覆盖）"""
+    return run_git("update-ref", refname, sha, ZERO_SHA)
+
+
+class RepoLock:
+    """仓库级互斥锁（`<git-common-dir>/humanizer-backup.lock`）
+
+    用 O_CREAT | O_EXCL 创建锁文件实现跨进程互斥，不依赖平台特有的 fcntl/msvcrt；
+    同一仓库的多个 worktree 共享同一把锁。持有者异常退出留下的锁文件
+    超过 stale_after 秒后视为失效并被接管。
+    """
+
+    def __init__(
+        self, common_dir: Path, timeout: float = 30.0, stale_after: float = 120.0
+    ):
+        self.path = common_dir / "humanizer-backup.lock"
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._fd: int | None = None
+
+    def acquire(self) -> None:
+        deadline = time.monotonic() + self.timeout
+        delay = 0.005
+        while True:
+            try:
+                self._fd = os.open(
+                    str(self.path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644
+                )
+                os.write(self._fd, f"{os.getpid()}\n".encode("ascii"))
+                return
+            except FileExistsError:
+                try:
+                    age = time.time() - self.path.stat().st_mtime
+                    if age > self.stale_after:
+                        self.path.unlink()
+                        continue
+                except OSError:
+                    continue  # 锁刚被释放，立即重试
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"等待仓库锁超时：{self.path}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        os.close(self._fd)
+        self._fd = None
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+    def __enter__(self) -> "RepoLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def hash_blob(data: bytes) -> str:
+    """在进程内计算 blob 对象哈希（不写入对象库）"""
+    header = f"blob {len(data)}\0".encode("ascii")
+    return hashlib.sha1(header + data).hexdigest()
+
+
+# ── 长驻 cat-file 进程 ────────────────────────────────────
+
+
+class ObjectInfo(NamedTuple):
+    """cat-file 返回的对象头信息"""
+
+    sha: str
+    type: str
+    size: int
+
+
+class _CatFileProcess:
+    """对单个 `git cat-file --batch[-check]` 进程的薄封装（按需启动）"""
+
+    def __init__(self, mode: str):
+        self._mode = mode  # "--batch" 或 "--batch-check"
+        self._proc: subprocess.Popen | None = None
+
+    def _ensure(self) -> subprocess.Popen:
+        if self._proc is None:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", self._mode],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def request(self, rev: str) -> tuple[ObjectInfo | None, bytes | None]:
+        """查询一个对象；不存在时返回 (None, None)"""
+        if "\n" in rev:
+            return None, None
+        proc = self._ensure()
+        proc.stdin.write(rev.encode("utf-8") + b"\n")
+        proc.stdin.flush()
+        header = proc.stdout.readline()
+        if not header:
+            raise RuntimeError(f"git cat-file {self._mode} 进程意外退出")
+        parts = header.decode("utf-8", errors="replace").rstrip("\n").split(" ")
+        # 不存在的对象返回 "<rev> missing" / "<rev> ambiguous"
+        if len(parts) != 3 or not parts[2].isdigit():
+            return None, None
+        info = ObjectInfo(parts[0], parts[1], int(parts[2]))
+        if self._mode != "--batch":
+            return info, None
+        data = proc.stdout.read(info.size)
+        proc.stdout.read(1)  # 内容后紧跟的换行符
+        return info, data
+
+    def close(self) -> None:
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+        self._proc = None
+
+
+class GitSession:
+    """一次脚本调用内共享的 git 访问上下文
+
+    cat-file 进程在首次查询时启动，之后所有查询复用同一进程；
+    用 `with GitSession() as git:` 确保退出时回收子进程。
+    """
+
+    def __init__(self):
+        self._check = _CatFileProcess("--batch-check")
+        self._batch = _CatFileProcess("--batch")
+
+    def __enter__(self) -> "GitSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._check.close()
+        self._batch.close()
+
+    def object_info(self, rev: str) -> ObjectInfo | None:
+        """解析任意 revision 表达式（如 `HEAD^{tree}`、`branch:path`），不读取内容"""
+        info, _ = self._check.request(rev)
+        return info
+
+    def read_object(self, rev: str) -> tuple[ObjectInfo, bytes] | None:
+        """读取对象内容；不存在时返回 None"""
+        info, data = self._batch.request(rev)
+        if info is None:
+            return None
+        return info, data
+
+    def for_each_ref(
+        self, patterns: str | tuple[str, ...], fields: tuple[str, ...]
+    ) -> list[dict[str, str]] | None:
+        """一次取回若干前缀下所有引用的指定字段
+
+        参数:
+            patterns: 引用前缀（一个或多个），如 "refs/heads/backup/humanizer/"
+            fields: for-each-ref 字段名，如 ("refname:short", "objectname")；
+                    允许多行字段（如 "contents:body"）
+
+        返回:
+            每个引用一个 {字段名: 值} 字典；git 调用失败（如不在仓库内）时返回 None
+        """
+        result = run_git(*for_each_ref_args(patterns, fields))
+        if result.returncode != 0:
+            return None
+        return parse_for_each_ref(result.stdout, fields)
+
+
+def for_each_ref_args(
+    patterns: str | tuple[str, ...], fields: tuple[str, ...]
+) -> list[str]:
+    """拼出 for-each-ref 的命令参数（同步与 asyncio 调用方共用）"""
+    if isinstance(patterns, str):
+        patterns = (patterns,)
+    # 字段间以 NUL 分隔，记录以 0x1e 结尾，多行字段也能安全拆分
+    fmt = "%00".join(f"%({f})" for f in fields) + "%1e"
+    return ["for-each-ref", f"--format={fmt}", *patterns]
+
+
+def parse_for_each_ref(stdout: str, fields: tuple[str, ...]) -> list[dict[str, str]]:
+    """解析 for_each_ref_args 格式的输出：每个引用一个 {字段名: 值} 字典"""
+    refs = []
+    for record in stdout.split("\x1e"):
+        record = record.lstrip("\n")
+        if not record:
+            continue
+        values = record.split("\0")
+        refs.append(dict(zip(fields, values)))
+    return refs
+
+
+# ── 进程内对象库（快速路径） ──────────────────────────────
+
+
+def read_git_config(path: Path) -> dict[str, str]:
+    """极简 git config 解析，返回 {"section.sub.key": value}（节名与键名小写）
+
+    仅覆盖本工具需要的字段，进程内读取免去 `git config` 调用；
+    遇到 include 等复杂语法时由调用方回退到 git。
+    """
+    values: dict[str, str] = {}
+    try:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return values
+    section = ""
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            header = line[1 : line.find("]")].strip()
+            if '"' in header:
+                name, _, sub = header.partition(" ")
+                sub = sub.strip().strip('"')
+                section = f"{name.lower()}.{sub}"
+            else:
+                section = header.lower()
+            continue
+        key, sep, value = line.partition("=")
+        value = value.strip() if sep else "true"
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        values[f"{section}.{key.strip().lower()}"] = value
+    return values
+
+
+class LooseObjectStore:
+    """直接读写 `.git/objects` 下松散对象的进程内后端
+
+    - blob 哈希与写入、tree 编辑、commit 生成全部在进程内完成；引用仍由
+      `git update-ref`（create_ref）创建，以便检查 packed-refs 并写入 reflog
+    - 只有被编辑路径上的 tree 会被读取和重写；松散对象直接解压读取，
+      已打包的对象通过 GitSession 的常驻 cat-file 进程读取
+    - sha256 仓库、reftable 引用存储、带 include 的配置等非常规情况下
+      `available` 为 False，调用方应回退到 git 子进程
+    """
+
+    def __init__(self, git_dir: Path, common_dir: Path, git: GitSession):
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        self.objects_dir = common_dir / "objects"
+        self._git = git
+        self._config = read_git_config(common_dir / "config")
+        self.ident = self._resolve_ident()
+        self.available = self._check_available()
+
+    # ── 环境检测 ──
+
+    def _check_available(self) -> bool:
+        cfg = self._config
+        if cfg.get("core.repositoryformatversion", "0") not in ("0", "1"):
+            return False
+        if cfg.get("extensions.objectformat", "sha1").lower() != "sha1":
+            return False
+        if "extensions.refstorage" in cfg:
+            return False
+        if any(k.startswith("include") for k in cfg):
+            return False
+        if self.ident is None:
+            return False
+        return self.objects_dir.is_dir()
+
+    def _resolve_ident(self) -> tuple[str, str] | None:
+        """按 git 的优先级解析提交者身份：环境变量 > 仓库配置 > 全局配置"""
+        if os.environ.get("GIT_AUTHOR_DATE") or os.environ.get("GIT_COMMITTER_DATE"):
+            return None  # 自定义时间戳交给 git 处理
+        name = os.environ.get("GIT_COMMITTER_NAME")
+        email = os.environ.get("GIT_COMMITTER_EMAIL")
+        home = Path.home()
+        xdg = Path(os.environ.get("XDG_CONFIG_HOME") or home / ".config")
+        for cfg in (
+            self._config,
+            read_git_config(home / ".gitconfig"),
+            read_git_config(xdg / "git" / "config"),
+        ):
+            if any(k.startswith("include") for k in cfg):
+                return None
+            name = name or cfg.get("user.name")
+            email = email or cfg.get("user.email")
+        if not name or not email:
+            return None
+        return name, email
+
+    # ── 对象读写 ──
+
+    def _object_path(self, sha: str) -> Path:
+        return self.objects_dir / sha[:2] / sha[2:]
+
+    def read(self, sha: str) -> tuple[str, bytes] | None:
+        """读取对象：松散对象直接解压，否则经由 cat-file 读取打包对象"""
+        try:
+            raw = zlib.decompress(self._object_path(sha).read_bytes())
+        except (OSError, zlib.error):
+            obj = self._git.read_object(sha)
+            if obj is None:
+                return None
+            return obj[0].type, obj[1]
+        header, _, data = raw.partition(b"\0")
+        obj_type = header.split(b" ", 1)[0].decode("ascii")
+        return obj_type, data
+
+    def write(self, obj_type: str, data: bytes) -> str:
+        """写入松散对象并返回其哈希（已存在时直接返回）"""
+        raw = f"{obj_type} {len(data)}\0".encode("ascii") + data
+        sha = hashlib.sha1(raw).hexdigest()
+        path = self._object_path(sha)
+        if path.exists():
+            return sha
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix="tmp_obj_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(raw, 1))
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return sha
+
+    # ── tree 编辑 ──
+
+    @staticmethod
+    def _parse_tree(data: bytes) -> dict[bytes, tuple[bytes, bytes]]:
+        """解析 tree 对象为 {name: (mode, sha_bin)}"""
+        entries = {}
+        pos = 0
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            mode, name = data[pos:space], data[space + 1 : nul]
+            entries[name] = (mode, data[nul + 1 : nul + 21])
+            pos = nul + 21
+        return entries
+
+    @staticmethod
+    def _format_tree(entries: dict[bytes, tuple[bytes, bytes]]) -> bytes:
+        """按 git 规则排序（目录名视为带尾随 /）并序列化 tree"""
+
+        def sort_key(item):
+            name, (mode, _) = item
+            return name + b"/" if mode == b"40000" else name
+
+        return b"".join(
+            mode + b" " + name + b"\0" + sha
+            for name, (mode, sha) in sorted(entries.items(), key=sort_key)
+        )
+
+    def update_tree(self, tree_sha: str | None, updates: dict[str, str]) -> str:
+        """在 tree 上替换/添加若干文件，只重写受影响路径上的 tree
+
+        参数:
+            tree_sha: 基础 tree（None 表示空目录）
+            updates: {仓库相对路径: blob 哈希}
+
+        返回:
+            新 tree 的哈希；路径与现有非目录条目冲突时抛出 ValueError
+        """
+        entries: dict[bytes, tuple[bytes, bytes]] = {}
+        if tree_sha is not None:
+            obj = self.read(tree_sha)
+            if obj is None or obj[0] != "tree":
+                raise ValueError(f"无法读取 tree {tree_sha}")
+            entries = self._parse_tree(obj[1])
+
+        subdirs: dict[str, dict[str, str]] = {}
+        for rel_path, blob in updates.items():
+            head, sep, rest = rel_path.partition("/")
+            if sep:
+                subdirs.setdefault(head, {})[rest] = blob
+                continue
+            name = head.encode("utf-8")
+            old_mode = entries.get(name, (b"100644", b""))[0]
+            if old_mode not in (b"100644", b"100755"):
+                raise ValueError(f"{rel_path} 与现有条目类型冲突")
+            entries[name] = (old_mode, bytes.fromhex(blob))
+
+        for head, sub_updates in subdirs.items():
+            name = head.encode("utf-8")
+            sub_sha = None
+            if name in entries:
+                mode, sha_bin = entries[name]
+                if mode != b"40000":
+                    raise ValueError(f"{head} 与现有条目类型冲突")
+                sub_sha = sha_bin.hex()
+            new_sub = self.update_tree(sub_sha, sub_updates)
+            entries[name] = (b"40000", bytes.fromhex(new_sub))
+
+        return self.write("tree", self._format_tree(entries))
+
+    # ── commit ──
+
+    def commit(self, tree: str, parents: list[str], message: str) -> str:
+        """生成 commit 对象（作者与提交者均为当前身份、当前时间）"""
+        name, email = self.ident
+        author_name = os.environ.get("GIT_AUTHOR_NAME") or name
+        author_email = os.environ.get("GIT_AUTHOR_EMAIL") or email
+        now = datetime.now().astimezone()
+        offset = int(now.utcoffset().total_seconds()) // 60
+        sign = "+" if offset >= 0 else "-"
+        tz = f"{sign}{abs(offset) // 60:02d}{abs(offset) % 60:02d}"
+        stamp = f"{int(now.timestamp())} {tz}"
+        lines = [f"tree {tree}"]
+        lines += [f"parent {p}" for p in parents]
+        lines.append(f"author {author_name} <{author_email}> {stamp}")
+        lines.append(f"committer {name} <{email}> {stamp}")
+        body = "\n".join(lines) + "\n\n" + message
+        if not body.endswith("\n"):
+            body += "\n"
+        return self.write("commit", body.encode("utf-8"))
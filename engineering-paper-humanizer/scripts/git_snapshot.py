@@ -8,12 +8,20 @@
 
 用法:
     python3 scripts/git_snapshot.py main.tex           # 创建分支备份
+    python3 scripts/git_snapshot.py a.tex b.tex chapters/ # 多个文件/目录合并为一个备份
     python3 scripts/git_snapshot.py --list             # 列出所有备份分支
     python3 scripts/git_snapshot.py --rollback         # 从最近备份恢复文件
     python3 scripts/git_snapshot.py --rollback <branch># 从指定备份恢复文件
     python3 scripts/git_snapshot.py --diff main.tex    # 对比与最近备份的差异
+    python3 scripts/git_snapshot.py --diff --backup <branch> --word-diff # 整组文件逐字对比指定备份
+    python3 scripts/git_snapshot.py --diff chapters/ --stat # 每个改动段落的增删字数
+    python3 scripts/git_snapshot.py --diff --backup <branch> ch/c2.tex # 只对比指定备份中的某个文件
+    python3 scripts/git_snapshot.py --timeline main.tex # 各备份版本的 AIGC 指标时间线
     python3 scripts/git_snapshot.py --cleanup          # 删除所有备份分支（需确认）
     python3 scripts/git_snapshot.py --cleanup --yes    # 删除所有备份分支（跳过确认）
+    python3 scripts/git_snapshot.py --prune --keep-per-file 10 --keep-every 5 # 按策略淘汰
+    python3 scripts/git_snapshot.py --storage chain main.tex # 备份追加到单引用备份链
+    python3 scripts/git_snapshot.py --porcelain main.tex # 末行输出 JSON 结果；写入失败时退出码为 1
     python3 scripts/git_snapshot.py --dry-run main.tex # 模拟创建备份（不实际执行）
     python3 scripts/git_snapshot.py --rollback --dry-run # 模拟恢复文件（不实际执行）
 """
@@ -21,32 +29,82 @@
 from __future__ import annotations
 
 import argparse
-import subprocess
+import json
+import secrets
 import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
 import sys
 import io
 import os
 
+import aigc_rules
+from git_plumbing import (
+    GitSession,
+    LooseObjectStore,
+    RepoLock,
+    ZERO_SHA,
+    create_ref,
+    hash_blob,
+    read_git_config,
+    run_git,
+    update_refs,
+    write_object,
+)
+
 # Windows GBK 终端兼容：强制 UTF-8 输出
-if os.name == "nt":
+# 本模块也会被其他脚本 import，重复包装会导致旧包装器回收时关闭底层缓冲
+if os.name == "nt" and (sys.stdout.encoding or "").lower() != "utf-8":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
 
 
 BACKUP_PREFIX = "backup/humanizer/"
 MAX_BACKUPS = 5  # 保留的最大备份数量，超出自动淘汰最旧的
+BACKUP_FILE_TRAILER = "Backup-File: "  # 备份提交说明中记录文件集合的行前缀
+BACKUP_BASE_TRAILER = "Backup-Base: "  # 链式备份记录备份时 HEAD 的行前缀
 
+# 链式存储：所有备份串成一条父子相连的提交链，只占用一个引用（不出现在 git branch 中）
+CHAIN_REF = "refs/humanizer/history"
+CHAIN_NAME = "history@"  # 链上备份的名称前缀，如 history@20240101-120000-123456-a1b2
+# 链的截断边界：指向最近一个从最旧端淘汰的提交，它及其祖先不再列为备份。
+# 从最旧端淘汰只需移动该引用，不必重写整条链（见 _delete_backups）
+CHAIN_BASE_REF = "refs/humanizer/history-base"
+# 边界以下隐藏的提交数不少于链上存活的备份数（且不少于该值）时，
+# 重写一次链把它们真正摘掉，重写开销均摊到每次快照约为一个提交
+CHAIN_COMPACT_MIN = 16
 
-# ── 工具函数 ───────────────────────────────────────────────
 
+class SnapshotResult(NamedTuple):
+    """cmd_snapshot 的结果
 
-def run_git(*args: str, check: bool = False) -> subprocess.CompletedProcess:
-    """执行 git 命令并返回结果"""
-    return subprocess.run(
-        ["git", *args], capture_output=True, text=True, encoding="utf-8", check=check
-    )
+    status: "created" | "skipped"（内容未变、不在仓库内、无可备份文件等）
+            | "failed"（写入对象或更新引用失败）| "dry-run"
+    """
+
+    status: str
+    backup: str | None = None
+
+
+class RetentionPolicy(NamedTuple):
+    """备份保留策略（各项为 0 表示不启用）
+
+    - keep: 全局保留最新的 N 个
+    - keep_per_file: 每个文件保留最新的 N 个包含它的备份
+    - max_age_days: 超过 N 天的备份淘汰（最新的一个始终保留）
+    - keep_every: 超出上述窗口的旧备份每 N 个保留 1 个（稀疏化长期历史）
+    """
+
+    keep: int = MAX_BACKUPS
+    keep_per_file: int = 0
+    max_age_days: float = 0
+    keep_every: int = 0
+
+
+# ── 工具函数 ───────────────────────────────────────────────
 
 
 def is_git_repo() -> bool:
@@ -55,120 +113,303 @@ def is_git_repo() -> bool:
     return result.returncode == 0 and result.stdout.strip() == "true"
 
 
-def get_backup_branches() -> list[str]:
-    """获取所有备份分支名，按时间倒序（最新在前）"""
-    result = run_git(
-        "branch", "--list", f"{BACKUP_PREFIX}*", "--format=%(refname:short)"
+def get_repo_paths() -> tuple[Path, Path, Path] | None:
+    """一次 rev-parse 取得 (仓库根目录, .git 目录, 公共 .git 目录)
+
+    不在 Git 工作区内时返回 None（兼作仓库检测）。
+    公共目录在 worktree 下指向主仓库的 .git，对象库与引用都存放在那里。
+    """
+    result = run_git("rev-parse", "--show-toplevel", "--git-dir", "--git-common-dir")
+    lines = result.stdout.splitlines()
+    if result.returncode != 0 or len(lines) != 3:
+        return None
+    root, git_dir, common_dir = (Path(line.strip()) for line in lines)
+    return root, git_dir.resolve(), common_dir.resolve()
+
+
+def load_backup_config(common_dir: Path) -> tuple[RetentionPolicy, str]:
+    """从仓库本地配置读取保留策略与存储方式（进程内解析，无需 git config 调用）
+
+    支持的键（均可被命令行参数覆盖）：
+        humanizer.keep / humanizer.keepPerFile / humanizer.maxAgeDays /
+        humanizer.keepEvery / humanizer.storage（branch | chain）
+    """
+    cfg = read_git_config(common_dir / "config")
+
+    def number(key: str, default, cast=int):
+        try:
+            return cast(cfg.get(key, default))
+        except ValueError:
+            print(f"[WARN] 配置 {key} 的值无效，使用默认值 {default}")
+            return default
+
+    policy = RetentionPolicy(
+        keep=number("humanizer.keep", MAX_BACKUPS),
+        keep_per_file=number("humanizer.keepperfile", 0),
+        max_age_days=number("humanizer.maxagedays", 0, float),
+        keep_every=number("humanizer.keepevery", 0),
     )
-    if result.returncode != 0 or not result.stdout.strip():
-        return []
-    branches = result.stdout.strip().split("\n")
-    branches.sort(reverse=True)  # 分支名含时间戳，字典序倒排即时间倒序
-    return branches
+    storage = cfg.get("humanizer.storage", "branch").lower()
+    if storage not in ("branch", "chain"):
+        print(f"[WARN] 配置 humanizer.storage 的值无效：{storage}，使用 branch")
+        storage = "branch"
+    return policy, storage
+
+
+def _parse_backup_files(body: str) -> list[str]:
+    """从提交说明正文中解析 Backup-File 行"""
+    return [
+        line[len(BACKUP_FILE_TRAILER) :].strip()
+        for line in body.splitlines()
+        if line.startswith(BACKUP_FILE_TRAILER)
+    ]
+
+
+# list_backups 通过一次 for-each-ref 取回的引用与字段
+BACKUP_REF_PATTERNS = (f"refs/heads/{BACKUP_PREFIX}", CHAIN_REF, CHAIN_BASE_REF)
+BACKUP_REF_FIELDS = (
+    "refname",
+    "refname:short",
+    "objectname",
+    "authordate:unix",
+    "authordate:iso",
+    "subject",
+    "contents:body",
+)
+
+CHAIN_LOG_FORMAT = "--format=%H%x00%at%x00%ai%x00%s%x00%b%x1e"
+
+
+def chain_log_args(tip: str, base: str | None = None) -> list[str]:
+    """遍历备份链的 git log 参数；有截断边界时排除边界及其祖先"""
+    args = ["log", CHAIN_LOG_FORMAT, tip]
+    if base:
+        args.append(f"^{base}")
+    return args
+
+
+def split_backup_refs(refs: list[dict]) -> tuple[list[dict], str | None, str | None]:
+    """把 for-each-ref 记录分为 (备份分支记录, 链尾, 链截断边界)"""
+    branches, tip, base = [], None, None
+    for r in refs:
+        if r["refname"] == CHAIN_REF:
+            tip = r["objectname"]
+        elif r["refname"] == CHAIN_BASE_REF:
+            base = r["objectname"]
+        else:
+            branches.append(r)
+    return branches, tip, base
 
 
-# ── 核心功能 ───────────────────────────────────────────────
+def _list_chain(tip: str, base: str | None = None) -> list[dict]:
+    """一次 git log 遍历备份链，返回链上的全部备份（最新在前）"""
+    result = run_git(*chain_log_args(tip, base))
+    if result.returncode != 0:
+        print(f"[WARN] 无法读取备份链：{result.stderr.strip()}")
+        return []
+    return parse_chain_log(result.stdout)
+
+
+def parse_chain_log(stdout: str) -> list[dict]:
+    """解析 CHAIN_LOG_FORMAT 格式的 git log 输出"""
+    entries = []
+    for record in stdout.split("\x1e"):
+        record = record.lstrip("\n")
+        if not record:
+            continue
+        sha, unix, date, subject, body = record.split("\0", 4)
+        stamp = subject.rsplit(" @ ", 1)[-1]
+        entries.append(
+            {
+                "name": f"{CHAIN_NAME}{stamp}",
+                "storage": "chain",
+                "stamp": stamp,
+                "commit": sha,
+                "time": int(unix),
+                "date": date,
+                "subject": subject,
+                "files": _parse_backup_files(body),
+            }
+        )
+    return entries
 
 
-def cmd_snapshot(filepath: str, dry_run: bool = False) -> None:
-    """为指定文件创建备份分支（无需切换分支）
+def list_backups(git: GitSession) -> list[dict] | None:
+    """取回所有备份（备份分支 + 备份链），按时间倒序（最新在前）
 
-    流程：
-    1. 读取文件当前内容，与最近备份对比（跳过无变更的空提交）
-    2. 使用底层 git 命令直接创建备份分支（不切换分支，不影响工作区）
-    3. 自动淘汰超出 MAX_BACKUPS 限制的最旧备份
+    备份分支的名称、提交、日期、说明与文件集合由一次 for-each-ref 取回；
+    若存在备份链，再用一次 git log 遍历整条链。
 
-    参数：
-        filepath: 要备份的文件路径
-        dry_run: 模拟模式，仅显示将要进行的操作而不实际执行
+    返回:
+        每个备份一个字典（name/storage/stamp/commit/time/date/subject/files，
+        分支备份另有 ref）；不在仓库内时返回 None
     """
-    if dry_run:
-        print(f"[DRY-RUN] 模拟备份文件: {filepath}")
-        print(f"[DRY-RUN] 实际将执行以下操作：")
-        print(f"  1. 检查是否为 Git 仓库")
-        print(f"  2. 检查文件是否存在")
-        print(f"  3. 对比文件与最近备份的差异")
-        print(f"  4. 创建备份分支（跳过空提交）")
-        print(f"  5. 自动淘汰超出 {MAX_BACKUPS} 个限制的旧备份")
+    refs = git.for_each_ref(BACKUP_REF_PATTERNS, BACKUP_REF_FIELDS)
+    if refs is None:
+        return None
+    branches, tip, base = split_backup_refs(refs)
+    backups = [branch_backup(r) for r in branches]
+    if tip is not None:
+        backups.extend(_list_chain(tip, base))
+    return sort_backups(backups)
+
+
+def branch_backup(r: dict[str, str]) -> dict:
+    """把一条 for-each-ref 记录转换为备份分支字典"""
+    name = r["refname:short"]
+    return {
+        "name": name,
+        "storage": "branch",
+        "ref": r["refname"],
+        "stamp": name[len(BACKUP_PREFIX) :],
+        "commit": r["objectname"],
+        "time": int(r["authordate:unix"] or 0),
+        "date": r["authordate:iso"],
+        "subject": r["subject"],
+        "files": _parse_backup_files(r["contents:body"]),
+    }
+
+
+def sort_backups(backups: list[dict]) -> list[dict]:
+    """按时间倒序排列（时间戳字典序即时间序）"""
+    backups.sort(key=lambda b: b["stamp"], reverse=True)
+    return backups
 
-    if not is_git_repo():
-        print("[WARN] 当前目录不在 Git 仓库内，跳过分支备份（不影响后续流程）")
-        return
 
-    path = Path(filepath)
-    if not path.exists():
-        print(f"[WARN] 文件不存在: {filepath}，跳过分支备份")
-        return
+def get_backup_branches() -> list[str]:
+    """获取所有备份名称，按时间倒序（最新在前）"""
+    with GitSession() as git:
+        backups = list_backups(git) or []
+    return [b["name"] for b in backups]
 
-    # 获取文件相对于仓库根目录的路径
-    repo_root_result = run_git("rev-parse", "--show-toplevel")
-    if repo_root_result.returncode != 0:
-        print("[WARN] 无法获取仓库根目录，跳过分支备份")
-        return
-    repo_root = Path(repo_root_result.stdout.strip())
-    try:
-        rel_path = path.resolve().relative_to(repo_root.resolve()).as_posix()
-    except ValueError:
-        print(f"[WARN] 文件 {filepath} 不在仓库内，跳过分支备份")
-        return
 
-    # ── 跳过空提交：对比文件内容与最近备份 ──
-    branches = get_backup_branches()
-    if branches:
-        latest = branches[0]
-        # 获取最近备份中该文件的 blob hash
-        old_hash_result = run_git("rev-parse", f"{latest}:{rel_path}")
-        if old_hash_result.returncode == 0:
-            old_hash = old_hash_result.stdout.strip()
-            # 计算当前文件的 blob hash（不写入对象库）
-            new_hash_result = run_git("hash-object", str(path))
-            if new_hash_result.returncode == 0:
-                new_hash = new_hash_result.stdout.strip()
-                if old_hash == new_hash:
-                    print(f"[INFO] {filepath} 与最近备份 {latest} 内容相同，跳过备份")
-                    return
-
-    # ── 使用底层命令创建备份（无需切换分支） ──
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    backup_branch = f"{BACKUP_PREFIX}{timestamp}"
-
-    # 检测空仓库（无任何 commit）
-    head_check = run_git("rev-parse", "--verify", "HEAD")
-    if head_check.returncode != 0:
-        print(
-            "[WARN] 仓库尚无任何提交（空仓库），请先执行 git commit 后再使用备份功能",
+def select_evictions(
+    backups: list[dict], policy: RetentionPolicy, now: float | None = None
+) -> list[dict]:
+    """按保留策略挑出应淘汰的备份（backups 须按最新在前排列）
+
+    一个备份同时落在全局窗口（keep）与按文件窗口（keep_per_file）内时保留；
+    落在窗口之外的旧备份按 keep_every 稀疏保留；超过 max_age_days 的一律淘汰。
+    最新的备份始终保留。
+    """
+    now = time.time() if now is None else now
+    per_file: dict[str, int] = {}
+    overflow = 0  # 已落在窗口之外的备份数，用于 keep_every 稀疏化
+    evict = []
+    for i, b in enumerate(backups):
+        files = b["files"] or [b["name"]]  # 旧式备份无文件记录，视为独立分组
+        in_total = policy.keep <= 0 or i < policy.keep
+        in_file = policy.keep_per_file <= 0 or any(
+            per_file.get(f, 0) < policy.keep_per_file for f in files
         )
-        return
+        for f in files:
+            per_file[f] = per_file.get(f, 0) + 1
 
-    if dry_run:
-        print(f"[DRY-RUN] 将创建备份分支: {backup_branch}")
-        print(f"[DRY-RUN] 将执行以下 Git 命令：")
-        print(f"  - git hash-object -w {path}")
-        print(f"  - git read-tree HEAD^{{tree}}")
-        print(f"  - git update-index --add --cacheinfo 100644,<hash>,{rel_path}")
-        print(f"  - git write-tree")
-        print(
-            f"  - git commit-tree <tree> -p HEAD -m '[humanizer-backup] {path.name} @ {timestamp}'"
+        keep = in_total and in_file
+        if not keep:
+            keep = policy.keep_every > 0 and overflow % policy.keep_every == 0
+            overflow += 1
+        if policy.max_age_days > 0 and now - b["time"] > policy.max_age_days * 86400:
+            keep = False
+        if keep or i == 0:
+            continue
+        evict.append(b)
+    return evict
+
+
+# ── 核心功能 ───────────────────────────────────────────────
+
+
+def new_backup_stamp() -> str:
+    """生成备份分支时间戳：精确到微秒并带随机后缀
+
+    形如 20240101-120000-123456-a1b2，字典序仍按时间排列（兼容旧的
+    20240101-120000 格式），同一微秒内并发创建的备份也不会重名。
+    """
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{secrets.token_hex(2)}"
+
+
+def expand_snapshot_paths(
+    filepaths: list[str], repo_root: Path
+) -> list[tuple[Path, str]]:
+    """把命令行给出的文件/目录展开为 (本地路径, 仓库相对路径) 列表
+
+    目录通过一次 `git ls-files` 展开为其中已跟踪及未被忽略的文件，
+    不存在或位于仓库外的路径给出警告后跳过，重复路径只保留一次。
+    """
+    root = repo_root.resolve()
+    files: list[Path] = []
+    dirs: list[str] = []
+    for fp in filepaths:
+        path = Path(fp)
+        if path.is_dir():
+            dirs.append(fp)
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"[WARN] 文件不存在: {fp}，跳过分支备份")
+
+    if dirs:
+        result = run_git(
+            "ls-files", "-z", "--full-name", "-c", "-o", "--exclude-standard",
+            "--", *dirs,
         )
-        print(f"  - git update-ref refs/heads/{backup_branch} <commit>")
-        print(f"[DRY-RUN] 模拟完成，未实际创建备份分支")
-        return
+        if result.returncode != 0:
+            print(f"[WARN] 无法展开目录：{result.stderr.strip()}")
+        else:
+            for rel in result.stdout.split("\0"):
+                if rel and (repo_root / rel).is_file():
+                    files.append(repo_root / rel)
+
+    expanded: list[tuple[Path, str]] = []
+    seen: set[str] = set()
+    for path in files:
+        try:
+            rel_path = path.resolve().relative_to(root).as_posix()
+        except ValueError:
+            print(f"[WARN] 文件 {path} 不在仓库内，跳过分支备份")
+            continue
+        if rel_path not in seen:
+            seen.add(rel_path)
+            expanded.append((path, rel_path))
+    return expanded
+
+
+def backup_files(git: GitSession, commit: str) -> list[str]:
+    """读取备份提交中记录的文件集合（提交说明里的 Backup-File 行）"""
+    obj = git.read_object(commit)
+    if obj is None:
+        return []
+    message = obj[1].decode("utf-8", errors="replace").split("\n\n", 1)[-1]
+    return _parse_backup_files(message)
+
+
+def _backup_subject(rel_paths: list[str], timestamp: str) -> str:
+    """生成备份提交的标题行"""
+    names = [Path(p).name for p in rel_paths]
+    if len(names) > 3:
+        label = f"{', '.join(names[:3])} 等 {len(names)} 个文件"
+    else:
+        label = ", ".join(names)
+    return f"[humanizer-backup] {label} @ {timestamp}"
+
 
-    # Step 1: 将文件写入 git 对象库
-    blob_result = run_git("hash-object", "-w", str(path))
+def _write_backup_tree_git(head_tree: str, changed: list[tuple[Path, str]]) -> str | None:
+    """通过 git 子进程写入 blob，并基于 HEAD 的 tree 构建新 tree，返回 tree 哈希"""
+    if not changed:
+        return head_tree
+
+    # Step 1: 批量将有变化的文件写入 git 对象库（--no-filters 与进程内哈希一致）
+    blob_result = run_git(
+        "hash-object", "-w", "--no-filters", "--stdin-paths",
+        input="".join(f"{p}\n" for p, _ in changed),
+    )
     if blob_result.returncode != 0:
         print(f"[WARN] hash-object 失败：{blob_result.stderr.strip()}")
-        return
-    blob_hash = blob_result.stdout.strip()
+        return None
+    blob_hashes = blob_result.stdout.split()
 
     # Step 2: 基于当前 HEAD 的 tree 构建新 tree（替换/添加目标文件）
-    # 先读取 HEAD 的 tree
-    head_tree_result = run_git("rev-parse", "HEAD^{tree}")
-    if head_tree_result.returncode != 0:
-        print(f"[WARN] 无法读取 HEAD tree：{head_tree_result.stderr.strip()}")
-        return
-    head_tree = head_tree_result.stdout.strip()
-
     # 用 read-tree + update-index 在临时 index 中构建新 tree
     with tempfile.NamedTemporaryFile(delete=False, suffix=".idx") as tmp:
         tmp_index = tmp.name
@@ -178,48 +419,27 @@ def cmd_snapshot(filepath: str, dry_run: bool = False) -> None:
 
     try:
         # 读取 HEAD tree 到临时 index
-        r = subprocess.run(
-            ["git", "read-tree", head_tree],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            env=env,
-        )
+        r = run_git("read-tree", head_tree, env=env)
         if r.returncode != 0:
             print(f"[WARN] read-tree 失败：{r.stderr.strip()}")
-            return
+            return None
 
-        # 在临时 index 中更新目标文件
-        # 获取文件的 mode（通常是 100644）
-        r = subprocess.run(
-            [
-                "git",
-                "update-index",
-                "--add",
-                "--cacheinfo",
-                f"100644,{blob_hash},{rel_path}",
-            ],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            env=env,
+        # 一次 update-index 更新全部有变化的文件
+        index_info = "".join(
+            f"100644 {blob}\t{rel_path}\0"
+            for blob, (_, rel_path) in zip(blob_hashes, changed)
         )
+        r = run_git("update-index", "-z", "--index-info", input=index_info, env=env)
         if r.returncode != 0:
             print(f"[WARN] update-index 失败：{r.stderr.strip()}")
-            return
+            return None
 
         # 写出新 tree
-        r = subprocess.run(
-            ["git", "write-tree"],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            env=env,
-        )
+        r = run_git("write-tree", env=env)
         if r.returncode != 0:
             print(f"[WARN] write-tree 失败：{r.stderr.strip()}")
-            return
-        new_tree = r.stdout.strip()
+            return None
+        return r.stdout.strip()
     finally:
         # 清理临时 index
         try:
@@ -227,82 +447,485 @@ def cmd_snapshot(filepath: str, dry_run: bool = False) -> None:
         except OSError:
             pass
 
-    # Step 3: 创建 commit 对象（以 HEAD 为父提交）
-    head_result = run_git("rev-parse", "HEAD")
-    if head_result.returncode != 0:
-        print(f"[WARN] 无法获取 HEAD：{head_result.stderr.strip()}")
-        return
-    head_sha = head_result.stdout.strip()
 
-    commit_msg = f"[humanizer-backup] {path.name} @ {timestamp}"
-    commit_result = run_git("commit-tree", new_tree, "-p", head_sha, "-m", commit_msg)
-    if commit_result.returncode != 0:
-        print(f"[WARN] commit-tree 失败：{commit_result.stderr.strip()}")
-        return
-    commit_sha = commit_result.stdout.strip()
+def _write_commit(
+    store: LooseObjectStore | None, tree: str, parents: list[str], message: str
+) -> str | None:
+    """生成 commit 对象：有进程内对象库时直接写入，否则调用 commit-tree"""
+    if store is not None:
+        return store.commit(tree, parents, message)
+    parent_args = [arg for p in parents for arg in ("-p", p)]
+    result = run_git("commit-tree", tree, *parent_args, input=message)
+    if result.returncode != 0:
+        print(f"[WARN] commit-tree 失败：{result.stderr.strip()}")
+        return None
+    return result.stdout.strip()
 
-    # Step 4: 创建备份分支指向新 commit
-    ref_result = run_git("update-ref", f"refs/heads/{backup_branch}", commit_sha)
-    if ref_result.returncode != 0:
-        print(f"[WARN] 创建备份分支失败：{ref_result.stderr.strip()}")
-        return
 
-    print(f"[OK] 已创建备份分支：{backup_branch}")
+# 备份内容索引：{备份名: {仓库相对路径: blob 哈希}}，存于 .git 下
+BLOB_INDEX_FILE = "humanizer-blob-index.json"
 
-    # ── 自动淘汰超出限制的旧备份 ──
-    _auto_evict_old_backups(dry_run)
 
+def load_blob_index(
+    git: GitSession, common_dir: Path, backups: list[dict], save: bool = True
+) -> dict[str, dict[str, str]]:
+    """取得各备份所记录文件的 blob 哈希：{备份名: {路径: blob}}
 
-def _auto_evict_old_backups(dry_run: bool = False) -> None:
-    """当备份分支数超过 MAX_BACKUPS 时，自动删除最旧的备份
+    结果缓存在 .git/humanizer-blob-index.json 中，按备份名（分支名或
+    history@时间戳）而不是提交哈希索引：备份链淘汰中间条目时会重写其后的
+    提交、哈希随之改变，但名字和文件内容不变，缓存依然有效。只有缓存里没有
+    的新备份才经常驻 cat-file 进程查询（每个文件一次 batch-check，不另起 git
+    进程）。已淘汰备份的条目在写回时一并清除。
+    """
+    cache_path = common_dir / BLOB_INDEX_FILE
+    cached = _load_json_cache(cache_path).get("backups", {})
+    entries: dict[str, dict[str, str]] = {}
+    for b in backups:
+        files = cached.get(b["name"])
+        if not isinstance(files, dict):
+            files = {}
+            for rel in b["files"]:
+                info = git.object_info(f"{b['commit']}:{rel}")
+                if info is not None:
+                    files[rel] = info.sha
+        entries[b["name"]] = files
+    if save and entries.keys() != cached.keys():
+        _save_json_cache(cache_path, {"backups": entries})
+    return entries
+
+
+def save_blob_index(common_dir: Path, entries: dict[str, dict[str, str]]) -> None:
+    _save_json_cache(common_dir / BLOB_INDEX_FILE, {"backups": entries})
+
+
+def find_backup_with(
+    backups: list[dict], entries: dict[str, dict[str, str]], blobs: dict[str, str]
+) -> dict | None:
+    """找出已完整持有这组内容（每个路径的 blob 都相同）的最新备份，没有时返回 None"""
+    holders: dict[tuple[str, str], list[int]] = {}
+    for i, b in enumerate(backups):
+        for rel, blob in entries.get(b["name"], {}).items():
+            holders.setdefault((rel, blob), []).append(i)
+    common: set[int] | None = None
+    for rel, blob in blobs.items():
+        found = holders.get((rel, blob))
+        if not found:
+            return None
+        common = set(found) if common is None else common.intersection(found)
+        if not common:
+            return None
+    return backups[min(common)] if common else None
+
+
+def _read_ref(refname: str) -> str:
+    """读取引用当前值；不存在时返回 ZERO_SHA"""
+    result = run_git("rev-parse", "--verify", "-q", refname)
+    return result.stdout.strip() if result.returncode == 0 else ZERO_SHA
+
+
+def cmd_snapshot(
+    filepaths: list[str],
+    dry_run: bool = False,
+    backend: str = "auto",
+    policy: RetentionPolicy | None = None,
+    storage: str | None = None,
+) -> SnapshotResult:
+    """为一组文件创建一个备份（无需切换分支），返回结果状态
+
+    流程：
+    1. 逐个文件计算 blob 哈希，与最近备份中的同一文件对比；全部无变更时跳过。
+       再查备份内容索引（见 load_blob_index）：回滚后重新应用、在两个版本间
+       来回切换时，内容已由任一保留中的备份完整持有的也跳过，不挤占保留窗口
+    2. 写入有变化的 blob，基于 HEAD 的 tree 替换这些文件，生成一个提交
+       （整组文件原子备份）
+    3. branch 存储为其创建一个备份分支；chain 存储把它追加到备份链
+       （CHAIN_REF 单个引用，比较并交换更新，并发追加时自动重试）
+    4. 按保留策略自动淘汰旧备份
+
+    引用列表与对象查询分别由一次 for-each-ref 和一个常驻 cat-file 进程完成，
+    文件哈希在进程内计算，无变更时不再额外启动 git 进程。
+    写入默认走进程内对象库（zlib 直接写松散对象），非常规仓库或写入失败时
+    回退到 hash-object / read-tree / update-index --index-info / commit-tree。
+    提交说明中以 Backup-File 行记录整组文件，回滚时据此恢复整组。
 
     参数：
+        filepaths: 要备份的文件或目录路径
         dry_run: 模拟模式，仅显示将要进行的操作而不实际执行
+        backend: "auto" 优先进程内写入，"git" 强制使用 git 子进程
+        policy: 保留策略，None 时读取仓库配置（默认保留 MAX_BACKUPS 个）
+        storage: "branch" | "chain"，None 时读取仓库配置（默认 branch）
+
+    返回：
+        SnapshotResult；写入对象或更新引用失败时 status 为 "failed"
     """
-    branches = get_backup_branches()  # 最新在前
-    if len(branches) <= MAX_BACKUPS:
-        return
+    if dry_run:
+        print(f"[DRY-RUN] 模拟备份文件: {' '.join(filepaths)}")
+        print(f"[DRY-RUN] 实际将执行以下操作：")
+        print(f"  1. 检查是否为 Git 仓库")
+        print(f"  2. 检查文件是否存在（目录展开为其中的文件）")
+        print(f"  3. 逐个对比文件与最近备份的差异")
+        print(f"  4. 为整组文件创建一个备份（全部无变更时跳过）")
+        print(f"  5. 按保留策略自动淘汰旧备份")
+
+    # 获取仓库根目录与 .git 目录（同时完成 Git 仓库检测）
+    repo = get_repo_paths()
+    if repo is None:
+        print("[WARN] 当前目录不在 Git 仓库内，跳过分支备份（不影响后续流程）")
+        return SnapshotResult("skipped")
+    repo_root, git_dir, common_dir = repo
+
+    config_policy, config_storage = load_backup_config(common_dir)
+    policy = policy or config_policy
+    storage = storage or config_storage
+
+    targets = expand_snapshot_paths(filepaths, repo_root)
+    if not targets:
+        print("[WARN] 没有可备份的文件，跳过分支备份")
+        return SnapshotResult("skipped")
+    rel_paths = [rel for _, rel in targets]
+
+    with GitSession() as git:
+        backups = list_backups(git) or []
+
+        # 检测空仓库（无任何 commit），同时取得 HEAD 及其 tree
+        head = git.object_info("HEAD^{commit}")
+        head_tree = git.object_info("HEAD^{tree}")
+        if head is None or head_tree is None:
+            print(
+                "[WARN] 仓库尚无任何提交（空仓库），请先执行 git commit 后再使用备份功能",
+            )
+            return SnapshotResult("skipped")
+
+        # ── 跳过空提交：逐个文件对比内容与最近备份 ──
+        changed: list[tuple[Path, str]] = []  # 与 HEAD 不同、需写入 tree 的文件
+        blobs: dict[str, str] = {}
+        unchanged_vs_backup = 0
+        for path, rel_path in targets:
+            new_hash = blobs[rel_path] = hash_blob(path.read_bytes())
+            if backups:
+                old = git.object_info(f"{backups[0]['commit']}:{rel_path}")
+                if old is not None and old.sha == new_hash:
+                    unchanged_vs_backup += 1
+            in_head = git.object_info(f"{head.sha}:{rel_path}")
+            if in_head is None or in_head.sha != new_hash:
+                changed.append((path, rel_path))
+
+        label = targets[0][0] if len(targets) == 1 else f"{len(targets)} 个文件"
+        if backups and unchanged_vs_backup == len(targets):
+            print(f"[INFO] {label} 与最近备份 {backups[0]['name']} 内容相同，跳过备份")
+            return SnapshotResult("skipped")
+        blob_index = load_blob_index(git, common_dir, backups, save=not dry_run)
+        holder = find_backup_with(backups, blob_index, blobs)
+        if holder is not None:
+            print(
+                f"[INFO] {label} 与备份 {holder['name']}（{holder['date']}）内容相同，跳过备份"
+            )
+            return SnapshotResult("skipped")
+
+        # ── 创建备份（无需切换分支） ──
+        timestamp = new_backup_stamp()
+        if storage == "chain":
+            backup_name = f"{CHAIN_NAME}{timestamp}"
+            refname = CHAIN_REF
+        else:
+            backup_name = f"{BACKUP_PREFIX}{timestamp}"
+            refname = f"refs/heads/{backup_name}"
+        subject = _backup_subject(rel_paths, timestamp)
+        trailers = [f"{BACKUP_FILE_TRAILER}{rel}" for rel in rel_paths]
+        if storage == "chain":
+            trailers.append(f"{BACKUP_BASE_TRAILER}{head.sha}")
+        commit_msg = f"{subject}\n\n" + "\n".join(trailers) + "\n"
+
+        store = None
+        if backend == "auto":
+            store = LooseObjectStore(git_dir, common_dir, git)
+            if not store.available:
+                store = None
+
+        if dry_run:
+            target = f"备份链 {CHAIN_REF}" if storage == "chain" else "备份分支"
+            print(f"[DRY-RUN] 将创建{target}: {backup_name}（{len(targets)} 个文件）")
+            if store is not None:
+                print(f"[DRY-RUN] 将在进程内写入 {len(changed)} 个 blob、受影响的 tree 与 commit")
+                print(f"  - 写入松散对象到 {store.objects_dir}")
+                print(f"  - 更新引用 {refname}")
+            else:
+                print(f"[DRY-RUN] 将执行以下 Git 命令：")
+                print(f"  - git hash-object -w --no-filters --stdin-paths  # {len(changed)} 个有变化的文件")
+                print(f"  - git read-tree {head_tree.sha}")
+                print(f"  - git update-index -z --index-info")
+                print(f"  - git write-tree")
+                print(f"  - git commit-tree <tree> -p <parent> -m '{subject}'")
+                print(f"  - git update-ref {refname} <commit> <old>")
+            print(f"[DRY-RUN] 模拟完成，未实际创建备份")
+            return SnapshotResult("dry-run", backup_name)
+
+        new_tree = None
+        if store is not None:
+            try:
+                updates = {
+                    rel: store.write("blob", path.read_bytes()) for path, rel in changed
+                }
+                new_tree = store.update_tree(head_tree.sha, updates)
+            except (OSError, ValueError) as e:
+                print(f"[INFO] 进程内写入失败（{e}），回退到 git 命令")
+                store = None
+        if new_tree is None:
+            new_tree = _write_backup_tree_git(head_tree.sha, changed)
+            if new_tree is None:
+                return SnapshotResult("failed")
+
+        # Step 3: 创建 commit 并更新引用（比较并交换，绝不覆盖他人的更新）
+        if storage == "chain":
+            # 链式存储：以当前链尾为父提交；并发追加导致链尾变化时重建 commit 重试
+            chain_tip = _read_ref(CHAIN_REF)
+            for _ in range(5):
+                parents = [] if chain_tip == ZERO_SHA else [chain_tip]
+                commit_sha = _write_commit(store, new_tree, parents, commit_msg)
+                if commit_sha is None:
+                    return SnapshotResult("failed")
+                ref_result = update_refs([(CHAIN_REF, commit_sha, chain_tip)])
+                if ref_result.returncode == 0:
+                    break
+                chain_tip = _read_ref(CHAIN_REF)
+            else:
+                print(f"[WARN] 追加备份链失败：{ref_result.stderr.strip()}")
+                return SnapshotResult("failed")
+        else:
+            commit_sha = _write_commit(store, new_tree, [head.sha], commit_msg)
+            if commit_sha is None:
+                return SnapshotResult("failed")
+            # 旧值为 ZERO_SHA：引用已存在（含只在 packed-refs 中的）时失败，并写入 reflog
+            ref_result = create_ref(refname, commit_sha)
+            if ref_result.returncode != 0:
+                print(f"[WARN] 创建备份分支失败：{ref_result.stderr.strip()}")
+                return SnapshotResult("failed")
+
+    blob_index[backup_name] = blobs
+    save_blob_index(common_dir, blob_index)
+
+    skipped = len(targets) - len(changed)
+    note = f"（{skipped} 个与 HEAD 相同）" if skipped else ""
+    if storage == "chain":
+        print(f"[OK] 已追加到备份链：{backup_name}，包含 {len(targets)} 个文件{note}")
+    else:
+        print(f"[OK] 已创建备份分支：{backup_name}，包含 {len(targets)} 个文件{note}")
+
+    # ── 按保留策略自动淘汰旧备份 ──
+    # 只有全局数量限制且已知数量未超限时直接跳过；否则在仓库锁内重新列出再淘汰
+    only_count = policy._replace(keep=0) == RetentionPolicy(keep=0)
+    if only_count and 0 < policy.keep and len(backups) + 1 <= policy.keep:
+        return SnapshotResult("created", backup_name)
+    apply_retention(policy, repo, dry_run=dry_run, backend=backend)
+    return SnapshotResult("created", backup_name)
+
+
+def _timed_report(label: str, start: float) -> None:
+    """输出一次批量操作的耗时"""
+    print(f"[TIME] {label}：{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def _reparent_commit(raw: bytes, parent: str | None) -> bytes:
+    """替换 commit 对象的父提交，其余内容（作者、时间、说明）原样保留"""
+    header, sep, message = raw.partition(b"\n\n")
+    lines = [l for l in header.split(b"\n") if not l.startswith(b"parent ")]
+    if parent is not None:
+        lines.insert(1, f"parent {parent}".encode("ascii"))  # 紧跟 tree 行
+    return b"\n".join(lines) + sep + message
+
+
+def _rewrite_chain(
+    git: GitSession,
+    store: LooseObjectStore | None,
+    chain: list[dict],
+    drop: set[str],
+    detach_root: bool = False,
+) -> str | None:
+    """从备份链中摘除若干备份，返回新的链尾（链被清空时返回 ZERO_SHA）
+
+    第一个被摘除的备份之前的提交原样复用，之后的提交只替换父指针后重写，
+    作者、时间与说明保持不变；写入失败时返回 None。detach_root 为真时从
+    最旧的存活备份起全部重写，使其成为无父提交的新根（丢弃截断边界以下的提交）。
+    """
+    parent = None
+    rewriting = detach_root
+    for entry in reversed(chain):  # 最旧在前
+        if entry["commit"] in drop:
+            rewriting = True
+            continue
+        if not rewriting:
+            parent = entry["commit"]
+            continue
+        obj = git.read_object(entry["commit"])
+        if obj is None:
+            return None
+        raw = _reparent_commit(obj[1], parent)
+        parent = store.write("commit", raw) if store is not None else write_object("commit", raw)
+        if parent is None:
+            return None
+    return parent or ZERO_SHA
+
+
+def _chain_updates(
+    git: GitSession,
+    store: LooseObjectStore | None,
+    chain: list[dict],
+    base: str | None,
+    drop: set[str],
+) -> list[tuple[str, str, str]] | None:
+    """从备份链摘除 drop 中的备份所需的引用更新；重写失败时返回 None
+
+    - 被摘除的恰好是最旧的若干个：只把截断边界移到其中最新的一个，不写任何对象；
+      边界以下隐藏的提交累积到与存活备份一样多时，重写一次存活部分并删除边界
+    - 其余情况（摘除中间的备份，或链被清空）按原方式重写
+    """
+    tip = chain[0]["commit"]
+    live = [b for b in chain if b["commit"] not in drop]
+    old_base = base or ZERO_SHA
+    if not live:
+        updates = [(CHAIN_REF, ZERO_SHA, tip)]
+        if base:
+            updates.append((CHAIN_BASE_REF, ZERO_SHA, base))
+        return updates
+
+    k = len(chain) - len(live)
+    if all(b["commit"] in drop for b in chain[-k:]):
+        new_base = chain[-k]["commit"]
+        hidden = int(run_git("rev-list", "--count", new_base).stdout.strip() or 0)
+        if hidden < max(len(live), CHAIN_COMPACT_MIN):
+            # 链尾不变，但一并校验，避免与并发追加交错
+            return [(CHAIN_BASE_REF, new_base, old_base), (CHAIN_REF, tip, tip)]
+
+    new_tip = _rewrite_chain(git, store, chain, drop, detach_root=base is not None)
+    if new_tip is None:
+        return None
+    updates = [(CHAIN_REF, new_tip, tip)]
+    if base:
+        updates.append((CHAIN_BASE_REF, ZERO_SHA, base))
+    return updates
+
+
+def _delete_backups(
+    git: GitSession,
+    store: LooseObjectStore | None,
+    backups: list[dict],
+    to_delete: list[dict],
+) -> bool:
+    """在一个 update-ref 事务中删除一组备份（带旧值校验），返回是否成功
+
+    备份分支直接删除引用；链上的备份通过移动截断边界或重写备份链摘除
+    （见 _chain_updates），链引用的更新与分支删除放在同一个事务里。
+    """
+    start = time.perf_counter()
+    updates = [(b["ref"], ZERO_SHA, b["commit"]) for b in to_delete if b["storage"] == "branch"]
+    chain = [b for b in backups if b["storage"] == "chain"]
+    drop = {b["commit"] for b in to_delete if b["storage"] == "chain"}
+    if drop:
+        base = _read_ref(CHAIN_BASE_REF)
+        chain_updates = _chain_updates(
+            git, store, chain, None if base == ZERO_SHA else base, drop
+        )
+        if chain_updates is None:
+            print("[WARN] 重写备份链失败，未做任何删除")
+            return False
+        updates.extend(chain_updates)
+    result = update_refs(updates)
+    _timed_report(f"淘汰 {len(to_delete)} 个备份（单次 update-ref 事务）", start)
+    if result.returncode != 0:
+        print(f"[WARN] 删除备份失败，未做任何删除：{result.stderr.strip()}")
+        return False
+    return True
 
-    to_delete = branches[MAX_BACKUPS:]  # 超出部分（最旧的）
+
+def apply_retention(
+    policy: RetentionPolicy,
+    repo: tuple[Path, Path, Path] | None = None,
+    dry_run: bool = False,
+    backend: str = "auto",
+) -> None:
+    """按保留策略淘汰旧备份
+
+    列举与删除在仓库锁内完成，删除时校验旧值：并发的快照进程不会
+    同时淘汰同一批备份，也不会删掉别人刚刚更新过的引用。
+
+    参数：
+        policy: 保留策略
+        repo: get_repo_paths() 的结果，None 时重新查询
+        dry_run: 模拟模式，仅显示将要进行的操作而不实际执行
+        backend: "auto" 时链重写在进程内写对象，"git" 时调用 hash-object
+    """
+    if repo is None:
+        repo = get_repo_paths()
+        if repo is None:
+            return
+    _, git_dir, common_dir = repo
 
     if dry_run:
-        print(f"[DRY-RUN] 将自动淘汰 {len(to_delete)} 个旧备份分支:")
-        for b in to_delete:
-            print(f"  - git branch -D {b}")
+        with GitSession() as git:
+            backups = list_backups(git) or []  # 最新在前
+        to_delete = select_evictions(backups, policy)
+        if to_delete:
+            print(f"[DRY-RUN] 将按保留策略淘汰 {len(to_delete)} 个旧备份（git update-ref --stdin）:")
+            for b in to_delete:
+                print(f"  - {b['name']} {b['commit']}")
         return
 
-    for b in to_delete:
-        result = run_git("branch", "-D", b)
-        if result.returncode == 0:
-            print(f"[INFO] 自动淘汰旧备份：{b}")
-        else:
-            print(f"[WARN] 淘汰失败: {b} — {result.stderr.strip()}")
+    try:
+        with RepoLock(common_dir), GitSession() as git:
+            backups = list_backups(git) or []  # 最新在前
+            to_delete = select_evictions(backups, policy)
+            if not to_delete:
+                return
+            store = None
+            if backend == "auto":
+                store = LooseObjectStore(git_dir, common_dir, git)
+                if not store.available:
+                    store = None
+            if _delete_backups(git, store, backups, to_delete):
+                for b in to_delete:
+                    print(f"[INFO] 自动淘汰旧备份：{b['name']}")
+    except TimeoutError as e:
+        print(f"[WARN] {e}，本次跳过自动淘汰（下次备份时再处理）")
+
+
+def cmd_prune(
+    policy: RetentionPolicy | None = None, dry_run: bool = False, backend: str = "auto"
+) -> None:
+    """立即按保留策略淘汰旧备份（不创建新备份）"""
+    repo = get_repo_paths()
+    if repo is None:
+        print("[WARN] 当前目录不在 Git 仓库内，无法淘汰备份")
+        return
+    policy = policy or load_backup_config(repo[2])[0]
+    print(
+        f"[INFO] 保留策略：keep={policy.keep} keep-per-file={policy.keep_per_file} "
+        f"max-age={policy.max_age_days}d keep-every={policy.keep_every}"
+    )
+    apply_retention(policy, repo, dry_run=dry_run, backend=backend)
 
 
 def cmd_list() -> None:
-    """列出所有备份分支"""
-    if not is_git_repo():
+    """列出所有备份（一次 for-each-ref 取回分支信息，备份链另需一次 git log）"""
+    with GitSession() as git:
+        backups = list_backups(git)
+    if backups is None:
         print("[WARN] 当前目录不在 Git 仓库内，无法列出备份分支")
         return
 
-    branches = get_backup_branches()
-    if not branches:
+    if not backups:
         print("[INFO] 暂无备份分支")
         return
 
-    print(f"备份分支列表（共 {len(branches)} 个，最新在前）：")
-    for branch in branches:
-        # 获取该分支最新提交的信息
-        log_result = run_git("log", branch, "-1", "--format=%ai %s")
-        info = log_result.stdout.strip() if log_result.returncode == 0 else ""
-        print(f"  {branch}  {info}")
+    print(f"备份列表（共 {len(backups)} 个，最新在前）：")
+    for b in backups:
+        print(f"  {b['name']}  {b['date']} {b['subject']}")
 
 
 def cmd_rollback(target_branch: str | None, dry_run: bool = False) -> None:
     """从备份分支恢复文件到当前工作区
 
-    从备份分支的 commit 中解析出被备份的文件列表，仅恢复这些文件，
-    避免误覆盖工作区中的其他变更。
+    从备份分支的 commit 中解析出被备份的文件列表（多文件备份按整组恢复），
+    仅恢复这些文件，避免误覆盖工作区中的其他变更。
 
     参数：
         target_branch: 目标备份分支，None 表示最近的备份
@@ -319,107 +942,418 @@ def cmd_rollback(target_branch: str | None, dry_run: bool = False) -> None:
         print("[WARN] 当前目录不在 Git 仓库内，无法执行回滚")
         return
 
-    # 未指定分支时，使用最近的备份
-    if target_branch is None:
-        branches = get_backup_branches()
-        if not branches:
-            print("[INFO] 未找到任何备份分支，无法回滚")
+    resolved = resolve_backup(target_branch, "回滚")
+    if resolved is None:
+        return
+    if dry_run and target_branch is None:
+        print(f"[DRY-RUN] 将使用最近的备份: {resolved[0]}")
+    target_branch, target_commit = resolved
+
+    # 从备份恢复文件（仅恢复被备份的文件，而非整个目录）
+    # 优先使用提交说明中记录的整组文件，旧式备份回退到解析实际变更的文件列表
+    with GitSession() as git:
+        files = backup_files(git, target_commit)
+    if not files:
+        files_result = run_git(
+            "diff-tree", "--no-commit-id", "--name-only", "-r", target_commit
+        )
+        if files_result.returncode != 0 or not files_result.stdout.strip():
+            print(f"[WARN] 无法解析备份分支中的文件列表：{files_result.stderr.strip()}")
             return
-        target_branch = branches[0]
-        if dry_run:
-            print(f"[DRY-RUN] 将使用最近的备份分支: {target_branch}")
+        files = files_result.stdout.strip().split("\n")
 
-    # 验证备份分支存在
-    verify = run_git("rev-parse", "--verify", target_branch)
-    if verify.returncode != 0:
-        print(f"[WARN] 备份分支不存在：{target_branch}")
+    if dry_run:
+        print(f"[DRY-RUN] 将恢复以下 {len(files)} 个文件（单次 git checkout）:")
+        print(f"  - git checkout {target_branch} -- {' '.join(files)}")
+        print(f"[DRY-RUN] 模拟完成，未实际恢复文件")
         return
 
-    # 从备份分支恢复文件（仅恢复被备份的文件，而非整个目录）
-    # 解析备份 commit 中实际变更的文件列表
-    files_result = run_git(
-        "diff-tree", "--no-commit-id", "--name-only", "-r", target_branch
+    # 一次 checkout 恢复整组文件；任一路径失败时 git 不会写入任何文件
+    # 按已解析的 commit 哈希检出：即使分支此刻被并发淘汰，恢复内容也不受影响
+    # 文件列表为仓库相对路径，用 :(top) 使其不受当前目录影响
+    start = time.perf_counter()
+    checkout_result = run_git(
+        "checkout", target_commit, "--", *(f":(top,literal){f}" for f in files)
     )
-    if files_result.returncode != 0 or not files_result.stdout.strip():
-        print(f"[WARN] 无法解析备份分支中的文件列表：{files_result.stderr.strip()}")
-        return
+    _timed_report(f"恢复 {len(files)} 个文件（单次 git checkout）", start)
+    if checkout_result.returncode == 0:
+        print(
+            f"[OK] 已从备份分支 {target_branch} 恢复 {len(files)} 个文件：{', '.join(files)}"
+        )
+    else:
+        print(
+            f"[WARN] 未能从备份分支 {target_branch} 恢复文件：{checkout_result.stderr.strip()}"
+        )
 
-    files = files_result.stdout.strip().split("\n")
 
-    if dry_run:
-        print(f"[DRY-RUN] 将恢复以下 {len(files)} 个文件:")
-        for f in files:
-            print(f"  - git checkout {target_branch} -- {f}")
-        print(f"[DRY-RUN] 模拟完成，未实际恢复文件")
-        return
+def resolve_backup(target: str | None, action: str) -> tuple[str, str] | None:
+    """把备份名称解析为 (名称, 提交哈希)；失败时输出原因并返回 None
 
-    restored = 0
-    for f in files:
-        checkout_result = run_git("checkout", target_branch, "--", f)
-        if checkout_result.returncode == 0:
-            restored += 1
-        else:
-            print(f"[WARN] 恢复文件失败: {f} — {checkout_result.stderr.strip()}")
+    未指定时取最近的备份；链上备份（history@...）按名称查找；其余按分支名或
+    提交解析。action 用于提示信息（如“回滚”“对比差异”）。
+    """
+    if target is None or target.startswith(CHAIN_NAME):
+        with GitSession() as git:
+            backups = list_backups(git) or []
+        if not backups:
+            print(f"[INFO] 未找到任何备份，无法{action}")
+            return None
+        if target is None:
+            return backups[0]["name"], backups[0]["commit"]
+        commit = next((b["commit"] for b in backups if b["name"] == target), None)
+    else:
+        verify = run_git("rev-parse", "--verify", "-q", f"{target}^{{commit}}")
+        commit = verify.stdout.strip() if verify.returncode == 0 else None
+    if commit is None:
+        print(f"[WARN] 备份不存在：{target}")
+        return None
+    return target, commit
+
+
+# --word-diff 的分词：ASCII 单词整体作为一个词，其余每个字符（含汉字）单独成词。
+# 以 LC_ALL=C 调用 git，正则按字节匹配：[\xc0-\xff][\x80-\xbf]* 恰好是一个 UTF-8
+# 字符（首字节 + 后续字节）。非 ASCII 字节经 surrogateescape 原样传给 git。
+CJK_WORD_REGEX = "[A-Za-z0-9_]+|[\udcc0-\udcff][\udc80-\udcbf]*|[^[:space:]]"
+
+
+def _diff_targets(
+    git: GitSession, commit: str, filepaths: list[str], repo_root: Path
+) -> list[tuple[Path, str]]:
+    """--diff 的文件集合：未指定时为该备份记录的整组文件"""
+    if filepaths:
+        return expand_snapshot_paths(filepaths, repo_root)
+    return [(repo_root / rel, rel) for rel in backup_files(git, commit)]
+
+
+def paragraph_spans(text: str) -> list[tuple[int, str]]:
+    """按空行切分段落，返回 [(起始行号, 段落文本)]"""
+    spans, start, buf = [], 0, []
+    for i, line in enumerate(text.splitlines()):
+        if line.strip():
+            if not buf:
+                start = i + 1
+            buf.append(line)
+        elif buf:
+            spans.append((start, "\n".join(buf)))
+            buf = []
+    if buf:
+        spans.append((start, "\n".join(buf)))
+    return spans
+
+
+def _changed_chars(old: str, new: str) -> tuple[int, int]:
+    """两段文本逐字比较，返回 (新增字数, 删除字数)，不计空白"""
+    from difflib import SequenceMatcher
+
+    added = removed = 0
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("replace", "delete"):
+            removed += sum(1 for c in old[i1:i2] if not c.isspace())
+        if tag in ("replace", "insert"):
+            added += sum(1 for c in new[j1:j2] if not c.isspace())
+    return added, removed
+
+
+def paragraph_changes(old_text: str, new_text: str) -> list[dict]:
+    """按段落对齐新旧文本，返回有改动的段落及其增删字数（行号为新文本中的行号）
+
+    先以整段为单位对齐（未改动的段落直接跳过），被替换的段落再逐字比较。
+    """
+    from difflib import SequenceMatcher
 
-    if restored > 0:
-        print(
-            f"[OK] 已从备份分支 {target_branch} 恢复 {restored} 个文件：{', '.join(files)}"
+    old_paras, new_paras = paragraph_spans(old_text), paragraph_spans(new_text)
+    matcher = SequenceMatcher(
+        None, [p for _, p in old_paras], [p for _, p in new_paras], autojunk=False
+    )
+    changes = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        olds, news = old_paras[i1:i2], new_paras[j1:j2]
+        for k in range(max(len(olds), len(news))):
+            old = olds[k][1] if k < len(olds) else ""
+            line, new = news[k] if k < len(news) else (None, "")
+            added, removed = _changed_chars(old, new)
+            if line is None:
+                line = -olds[k][0]  # 整段删除：记录旧文本中的行号
+            changes.append(
+                {
+                    "line": line,
+                    "lines": new.count("\n") + 1 if new else 0,
+                    "added": added,
+                    "removed": removed,
+                    "preview": (new or old).splitlines()[0].strip()[:30],
+                }
+            )
+    return changes
+
+
+def format_diff_stat(rel: str, changes: list[dict], width: int = 30) -> list[str]:
+    """git diff --stat 风格：每个改动段落一行（行号、增删字数、比例条）"""
+    if not changes:
+        return [f"{rel}  无差异"]
+    total_add = sum(c["added"] for c in changes)
+    total_del = sum(c["removed"] for c in changes)
+    out = [f"{rel}  {len(changes)} 段改动，+{total_add} -{total_del} 字"]
+    biggest = max(c["added"] + c["removed"] for c in changes) or 1
+    for c in changes:
+        if c["line"] < 0:
+            where = f"(删) 原L{-c['line']}"
+        elif c["lines"] > 1:
+            where = f"L{c['line']}-L{c['line'] + c['lines'] - 1}"
+        else:
+            where = f"L{c['line']}"
+        scale = width / biggest if biggest > width else 1
+        bar = "+" * round(c["added"] * scale) + "-" * round(c["removed"] * scale)
+        out.append(
+            f"  {where:<14} +{c['added']:<5} -{c['removed']:<5} {bar:<{width}}  {c['preview']}"
         )
-    else:
-        print(f"[WARN] 未能从备份分支 {target_branch} 恢复任何文件")
+    return out
 
 
-def cmd_diff(filepath: str) -> None:
-    """显示文件与最近备份分支的差异"""
-    if not is_git_repo():
+def cmd_diff(
+    filepaths: list[str],
+    backup: str | None = None,
+    word_diff: bool = False,
+    stat: bool = False,
+) -> None:
+    """显示工作区文件与任一备份的差异（多个文件一次 git diff）
+
+    参数：
+        filepaths: 要对比的文件或目录；为空时对比该备份记录的整组文件
+        backup: 备份名称（分支名或 history@...），None 表示最近的备份
+        word_diff: 按字/词对比（汉字逐字、ASCII 按单词），适合无空格的中文正文
+        stat: 只输出每个改动段落的增删字数统计
+    """
+    repo = get_repo_paths()
+    if repo is None:
         print("[WARN] 当前目录不在 Git 仓库内，无法对比差异")
         return
+    repo_root = repo[0]
 
-    branches = get_backup_branches()
-    if not branches:
-        print("[INFO] 未找到任何备份分支，无法对比差异")
+    resolved = resolve_backup(backup, "对比差异")
+    if resolved is None:
         return
+    name, commit = resolved
+
+    with GitSession() as git:
+        targets = _diff_targets(git, commit, filepaths, repo_root)
+        if not targets:
+            print(f"[WARN] 备份 {name} 未记录文件集合，请指定要对比的文件")
+            return
+
+        if stat:
+            print(f"与备份 {name} 的逐段改动统计：")
+            for path, rel in targets:
+                obj = git.read_object(f"{commit}:{rel}")
+                old = obj[1] if obj is not None and obj[0].type == "blob" else b""
+                new = path.read_bytes() if path.is_file() else b""
+                if old == new:
+                    print(f"{rel}  无差异")
+                    continue
+                try:
+                    import check_aigc
+
+                    old_text = check_aigc.decode_source(old)[0]
+                    new_text = check_aigc.decode_source(new)[0]
+                except UnicodeDecodeError:
+                    print(f"[WARN] 无法识别 {rel} 的编码，跳过")
+                    continue
+                for line in format_diff_stat(rel, paragraph_changes(old_text, new_text)):
+                    print(line)
+            return
 
-    latest_branch = branches[0]
-    result = run_git("diff", latest_branch, "--", filepath)
+    # 所有文件一次 git diff；路径为仓库相对路径，用 :(top) 使其不受当前目录影响
+    args = ["diff"]
+    env = None
+    if word_diff:
+        args += ["--word-diff=plain", f"--word-diff-regex={CJK_WORD_REGEX}"]
+        env = {**os.environ, "LC_ALL": "C"}
+    args += [commit, "--", *(f":(top,literal){rel}" for _, rel in targets)]
+    result = run_git(*args, env=env)
     if result.returncode != 0:
         print(f"[WARN] 对比失败：{result.stderr.strip()}")
         return
 
     if result.stdout.strip():
-        print(f"与备份分支 {latest_branch} 的差异：")
+        print(f"与备份 {name} 的差异（{len(targets)} 个文件）：")
         print(result.stdout)
     else:
-        print(f"[INFO] {filepath} 与最近备份 {latest_branch} 无差异")
+        label = targets[0][1] if len(targets) == 1 else f"{len(targets)} 个文件"
+        print(f"[INFO] {label} 与备份 {name} 无差异")
+
+
+# 时间线缓存键中的解码方式标记：解码逻辑变化时更换，旧结果自动失效
+TIMELINE_DECODER = "decode_source"
+
+
+def _decode_version(data: bytes) -> str:
+    """按检查器的规则解码一个版本（UTF-8/GB18030 等，见 check_aigc.decode_source）
+
+    都无法识别时退回带替换字符的 UTF-8，时间线照常列出该版本。
+    """
+    import check_aigc
+
+    try:
+        return check_aigc.decode_source(data)[0]
+    except UnicodeDecodeError:
+        return data.decode("utf-8", errors="replace")
+
+
+def _score_text(text: str, target_format: str) -> dict:
+    """对一个版本的文本执行 AIGC 检查并汇总指标（在工作进程中运行）"""
+    import check_aigc
+
+    diagnostics = check_aigc.check_text(text, target_format)
+    return check_aigc.text_metrics(text, diagnostics, target_format)
+
+
+def _load_json_cache(cache_path: Path) -> dict:
+    try:
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _save_json_cache(cache_path: Path, cache: dict) -> None:
+    """原子写入缓存文件（并发调用时后写者覆盖，不会产生半截文件）"""
+    tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+
+
+def cmd_timeline(filepath: str, jobs: int | None = None) -> None:
+    """列出文件在各备份中的 AIGC 指标变化（不检出任何文件）
+
+    通过一个常驻 cat-file 进程从对象库直接读出每个备份中的文件内容，
+    在进程池中并行运行 check_aigc 的内存检查。备份不可变，结果按
+    blob 哈希（连同规则文件指纹）缓存在 .git 中，重复调用无需重新检查。
+
+    参数：
+        filepath: 要追踪的文件路径
+        jobs: 并行工作进程数，None 表示按 CPU 核数
+    """
+    repo = get_repo_paths()
+    if repo is None:
+        print("[WARN] 当前目录不在 Git 仓库内，无法生成备份时间线")
+        return
+    repo_root, _, common_dir = repo
+
+    try:
+        rel_path = Path(filepath).resolve().relative_to(repo_root.resolve()).as_posix()
+    except ValueError:
+        print(f"[WARN] 文件 {filepath} 不在仓库内")
+        return
+
+    import check_aigc
+
+    target_format = check_aigc.infer_format(filepath)
+    rules_digest = aigc_rules.rules_fingerprint()[:12]
+
+    # ── 从对象库读出各备份版本（最旧在前），相同内容只检查一次 ──
+    versions: list[tuple[str, str, str]] = []  # (标签, 日期, blob 哈希)
+    texts: dict[str, str] = {}
+    with GitSession() as git:
+        backups = list_backups(git) or []
+        for b in reversed(backups):
+            obj = git.read_object(f"{b['commit']}:{rel_path}")
+            if obj is None:
+                continue  # 该备份不包含此文件
+            info, data = obj
+            versions.append((b["name"], b["date"], info.sha))
+            texts.setdefault(info.sha, _decode_version(data))
+
+    path = Path(filepath)
+    if path.exists():
+        data = path.read_bytes()
+        sha = hash_blob(data)
+        versions.append(("(工作区)", "", sha))
+        texts.setdefault(sha, _decode_version(data))
+
+    if not versions:
+        print(f"[INFO] 备份中没有 {rel_path} 的任何版本")
+        return
+
+    # ── 命中缓存的直接复用，其余在进程池中并行检查 ──
+    cache_path = common_dir / "humanizer-timeline-cache.json"
+    cache = _load_json_cache(cache_path)
+    key_of = {
+        sha: f"{sha}:{target_format}:{rules_digest}:{TIMELINE_DECODER}" for sha in texts
+    }
+    pending = [sha for sha in texts if key_of[sha] not in cache]
+
+    start = time.perf_counter()
+    if len(pending) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                sha: pool.submit(_score_text, texts[sha], target_format)
+                for sha in pending
+            }
+            for sha, fut in futures.items():
+                cache[key_of[sha]] = fut.result()
+    else:
+        for sha in pending:
+            cache[key_of[sha]] = _score_text(texts[sha], target_format)
+    if pending:
+        _save_json_cache(cache_path, cache)
+
+    print(f"{rel_path} 备份时间线（共 {len(versions)} 个版本，最旧在前）：")
+    print(f"  {'版本':<44} {'错误':>4} {'警告':>4} {'提示':>4} {'连接词/千字':>10} {'突发性CV':>8}")
+    for label, date, sha in versions:
+        m = cache[key_of[sha]]
+        burst = f"{m['burstiness']:.2f}" if m["burstiness"] is not None else "-"
+        print(
+            f"  {label:<44} {m['error']:>4} {m['warning']:>4} {m['info']:>4} "
+            f"{m['connective_density']:>10.2f} {burst:>8}"
+        )
+    _timed_report(
+        f"检查 {len(pending)} 个版本（{len(texts) - len(pending)} 个命中缓存）", start
+    )
 
 
 def cmd_cleanup(skip_confirm: bool = False, dry_run: bool = False) -> None:
-    """删除所有备份分支
+    """在一个 update-ref 事务中删除所有备份（备份分支与备份链）
 
     参数：
         skip_confirm: 跳过确认提示
         dry_run: 模拟模式，仅显示将要进行的操作而不实际执行
     """
-    if not is_git_repo():
+    repo = get_repo_paths()
+    if repo is None:
         print("[WARN] 当前目录不在 Git 仓库内，无法清理备份分支")
         return
 
-    branches = get_backup_branches()
-    if not branches:
-        print("[INFO] 暂无备份分支需要清理")
+    with GitSession() as git:
+        backups = list_backups(git) or []
+
+    if not backups:
+        print("[INFO] 暂无备份需要清理")
         return
 
+    updates = [(b["ref"], ZERO_SHA, b["commit"]) for b in backups if b["storage"] == "branch"]
+    chain = [b for b in backups if b["storage"] == "chain"]
+    if chain:
+        updates.append((CHAIN_REF, ZERO_SHA, chain[0]["commit"]))
+        base = _read_ref(CHAIN_BASE_REF)
+        if base != ZERO_SHA:
+            updates.append((CHAIN_BASE_REF, ZERO_SHA, base))
+
     if dry_run:
-        print(f"[DRY-RUN] 模拟删除所有备份分支")
-        print(f"[DRY-RUN] 将删除以下 {len(branches)} 个备份分支：")
-        for b in branches:
-            print(f"  - git branch -D {b}")
+        print(f"[DRY-RUN] 模拟删除所有备份")
+        print(f"[DRY-RUN] 将在一个事务中删除以下 {len(updates)} 个引用（git update-ref --stdin）：")
+        for ref, _, old in updates:
+            print(f"  - delete {ref} {old}")
         print(f"[DRY-RUN] 模拟完成，未实际删除任何分支")
         return
 
-    print(f"将删除以下 {len(branches)} 个备份分支：")
-    for b in branches:
-        print(f"  {b}")
+    print(f"将删除以下 {len(backups)} 个备份：")
+    for b in backups:
+        print(f"  {b['name']}")
 
     if not skip_confirm:
         try:
@@ -430,15 +1364,19 @@ def cmd_cleanup(skip_confirm: bool = False, dry_run: bool = False) -> None:
             print("[INFO] 已取消清理")
             return
 
-    deleted = 0
-    for b in branches:
-        result = run_git("branch", "-D", b)
-        if result.returncode == 0:
-            deleted += 1
-        else:
-            print(f"[WARN] 删除失败: {b} — {result.stderr.strip()}")
-
-    print(f"[OK] 已删除 {deleted}/{len(branches)} 个备份分支")
+    # 持锁删除，避免与并发快照的自动淘汰交错；确认期间有备份变动时事务整体失败
+    try:
+        with RepoLock(repo[2]):
+            start = time.perf_counter()
+            result = update_refs(updates)
+            _timed_report(f"删除 {len(updates)} 个引用（单次 update-ref 事务）", start)
+    except TimeoutError as e:
+        print(f"[WARN] {e}，未删除任何分支")
+        return
+    if result.returncode != 0:
+        print(f"[WARN] 删除备份失败，未做任何删除：{result.stderr.strip()}")
+        return
+    print(f"[OK] 已删除 {len(backups)}/{len(backups)} 个备份")
 
 
 # ── 入口 ──────────────────────────────────────────────────
@@ -457,32 +1395,135 @@ def main():
         metavar="BRANCH",
         help="从最近备份或指定备份分支恢复文件",
     )
-    group.add_argument("--diff", metavar="FILE", help="显示文件与最近备份分支的差异")
+    group.add_argument(
+        "--diff",
+        nargs="*",
+        metavar="FILE",
+        help="显示文件与备份的差异；可给多个文件/目录，不给时对比该备份的整组文件",
+    )
+    group.add_argument(
+        "--timeline",
+        metavar="FILE",
+        help="列出文件在各备份中的 AIGC 检查指标变化（直接读对象库，不检出）",
+    )
     group.add_argument("--cleanup", action="store_true", help="删除所有备份分支")
+    group.add_argument(
+        "--prune", action="store_true", help="立即按保留策略淘汰旧备份（不创建新备份）"
+    )
     parser.add_argument("--yes", action="store_true", help="跳过 --cleanup 的确认提示")
+    parser.add_argument(
+        "--porcelain",
+        action="store_true",
+        help='备份完成后多输出一行 JSON 结果 {"status", "backup"}（供脚本解析）',
+    )
+    parser.add_argument(
+        "--backup",
+        metavar="NAME",
+        help="--diff 的对比对象：备份分支名或 history@...（默认最近的备份）",
+    )
+    parser.add_argument(
+        "--word-diff",
+        action="store_true",
+        help="--diff 按字/词对比（汉字逐字、英文按单词），一字之差不再显示为整行改动",
+    )
+    parser.add_argument(
+        "--stat", action="store_true", help="--diff 只输出每个改动段落的增删字数"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="--timeline 的并行进程数（默认按 CPU 核数，1 表示不开进程池）",
+    )
+    retention = parser.add_argument_group(
+        "保留策略与存储方式",
+        "未指定时读取 git config humanizer.keep / keepPerFile / maxAgeDays / "
+        "keepEvery / storage，均未配置时保留最新 5 个备份分支",
+    )
+    retention.add_argument("--keep", type=int, metavar="N", help="全局保留最新的 N 个备份（0 不限）")
+    retention.add_argument(
+        "--keep-per-file", type=int, metavar="N", help="每个文件保留最新的 N 个备份（0 不限）"
+    )
+    retention.add_argument(
+        "--max-age", type=float, metavar="DAYS", help="淘汰超过 DAYS 天的备份（0 不限）"
+    )
+    retention.add_argument(
+        "--keep-every", type=int, metavar="N", help="超出保留窗口的旧备份每 N 个保留 1 个"
+    )
+    retention.add_argument(
+        "--storage",
+        choices=["branch", "chain"],
+        help=f"branch：每个备份一个分支；chain：所有备份串成一条链，只占用 {CHAIN_REF}",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["auto", "git"],
+        default="auto",
+        help="备份写入方式：auto 优先进程内直接写对象库（失败自动回退），git 始终调用 git 命令",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="模拟执行，显示将要进行的操作而不实际修改",
     )
     parser.add_argument(
-        "file",
-        nargs="?",
-        help="要备份的文件路径（不与 --list/--rollback/--diff/--cleanup 同用）",
+        "files",
+        nargs="*",
+        metavar="FILE",
+        help="要备份的文件或目录路径，可多个，整组生成一个备份；与 --diff 同用时作为对比的文件",
     )
     args = parser.parse_args()
 
+    # --diff 的文件列表可以写在其他选项之后（--diff --backup NAME a.tex），
+    # 此时 argparse 把它们归入位置参数，这里并回 --diff
+    if args.diff is not None:
+        args.diff += args.files
+    elif args.files and (
+        args.list or args.rollback is not None or args.timeline or args.cleanup or args.prune
+    ):
+        parser.error("--list/--rollback/--timeline/--cleanup/--prune 不接受备份文件参数")
+
+    # 命令行给出的保留参数覆盖仓库配置中的对应项
+    overrides = {
+        "keep": args.keep,
+        "keep_per_file": args.keep_per_file,
+        "max_age_days": args.max_age,
+        "keep_every": args.keep_every,
+    }
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    policy = None
+    if overrides:
+        repo = get_repo_paths()
+        base = load_backup_config(repo[2])[0] if repo else RetentionPolicy()
+        policy = base._replace(**overrides)
+
     if args.list:
         cmd_list()
     elif args.rollback is not None:
         target = None if args.rollback == "__latest__" else args.rollback
         cmd_rollback(target, dry_run=args.dry_run)
-    elif args.diff:
-        cmd_diff(args.diff)
+    elif args.diff is not None:
+        cmd_diff(args.diff, args.backup, word_diff=args.word_diff, stat=args.stat)
+    elif args.timeline:
+        cmd_timeline(args.timeline, jobs=args.jobs)
     elif args.cleanup:
         cmd_cleanup(skip_confirm=args.yes, dry_run=args.dry_run)
-    elif args.file:
-        cmd_snapshot(args.file, dry_run=args.dry_run)
+    elif args.prune:
+        cmd_prune(policy, dry_run=args.dry_run, backend=args.backend)
+    elif args.files:
+        result = cmd_snapshot(
+            args.files,
+            dry_run=args.dry_run,
+            backend=args.backend,
+            policy=policy,
+            storage=args.storage,
+        )
+        if args.porcelain:
+            # 供编排器解析的结果行，始终是最后一行输出
+            print(json.dumps(result._asdict(), ensure_ascii=False), flush=True)
+        if result.status == "failed":
+            sys.exit(1)
     else:
         parser.print_help()
 
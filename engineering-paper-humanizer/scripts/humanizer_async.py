@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""engineering-paper-humanizer 的 asyncio 接口（供 agent 编排器嵌入）
+
+同步版本的 check_file / git_snapshot 会阻塞事件循环：文件读取是阻塞 I/O，
+run_git 是同步的 subprocess.run，规则扫描是 CPU 密集计算。本模块提供：
+
+- check_path：文件读取放到线程池，规则扫描放到进程池
+- list_backups：用 asyncio.create_subprocess_exec 执行与 git_snapshot 相同的
+  for-each-ref / git log 并复用其解析逻辑
+- snapshot：以子进程方式运行 git_snapshot.py（cwd 指定仓库），多个仓库可
+  同时备份；同一仓库的并发备份由 git_snapshot 的仓库锁与 CAS 引用更新保证安全
+
+所有操作共享一个 asyncio.Semaphore，限制同时进行的检查/备份数量。
+
+用法:
+    import asyncio
+    from humanizer_async import Humanizer
+
+    async def main():
+        async with Humanizer(max_concurrency=8) as h:
+            results = await asyncio.gather(*(h.check_path(p) for p in paths))
+            await h.snapshot(["main.tex"], cwd="thesis/")
+            backups = await h.list_backups(cwd="thesis/")
+
+也可直接使用模块级的 check_path / snapshot / list_backups（共享一个默认实例）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+
+import check_aigc
+import git_snapshot
+from git_plumbing import for_each_ref_args, parse_for_each_ref
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        return check_aigc.decode_source(f.read())[0]
+
+
+async def run_git_async(*args: str, cwd: str | None = None) -> tuple[int, str, str]:
+    """不阻塞事件循环地执行 git 命令，返回 (returncode, stdout, stderr)"""
+    proc = await asyncio.create_subprocess_exec(
+        "git",
+        *args,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate()
+    return (
+        proc.returncode,
+        out.decode("utf-8", errors="replace"),
+        err.decode("utf-8", errors="replace"),
+    )
+
+
+class Humanizer:
+    """asyncio 检查/备份客户端
+
+    参数:
+        max_concurrency: 同时进行的检查与备份操作上限
+        executor: 执行规则扫描的执行器；默认按需创建一个进程池
+            （worker 数 = min(max_concurrency, CPU 核数)），close() 时回收
+    """
+
+    def __init__(self, max_concurrency: int = 8, executor: Executor | None = None):
+        self.max_concurrency = max_concurrency
+        self._executor = executor
+        self._owns_executor = executor is None
+        # Semaphore 需在事件循环内创建（Python < 3.10 会绑定创建时的循环），
+        # 换了事件循环（如多次 asyncio.run）时重新创建
+        self._sem: asyncio.Semaphore | None = None
+        self._sem_loop = None
+
+    async def __aenter__(self) -> "Humanizer":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._sem_loop = loop
+        return self._sem
+
+    def _scan_executor(self) -> Executor:
+        if self._executor is None:
+            workers = min(self.max_concurrency, os.cpu_count() or 1)
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        return self._executor
+
+    async def close(self) -> None:
+        """回收自建的进程池"""
+        if self._owns_executor and self._executor is not None:
+            executor, self._executor = self._executor, None
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, executor.shutdown)
+
+    # ── 检查 ──
+
+    async def check_path(
+        self,
+        path: str,
+        target_format: str | None = None,
+        section: int | None = None,
+    ) -> list[dict]:
+        """异步检查一个文件，返回与 check_file 相同的诊断列表
+
+        参数:
+            path: 文件路径
+            target_format: "latex" | "markdown" | "plain"；None 时按扩展名推断
+            section: 只检查指定章节（仅 LaTeX 有效）
+
+        文件不存在时抛出 FileNotFoundError（不像命令行那样直接退出进程）。
+        """
+        fmt = target_format or check_aigc.infer_format(path)
+        loop = asyncio.get_running_loop()
+        async with self._limit():
+            text = await loop.run_in_executor(None, _read_text, path)
+            return await loop.run_in_executor(
+                self._scan_executor(), check_aigc.check_text, text, fmt, section
+            )
+
+    # ── 备份 ──
+
+    async def list_backups(self, cwd: str | None = None) -> list[dict] | None:
+        """异步列出 cwd 所在仓库的全部备份（字段同 git_snapshot.list_backups）
+
+        不在 Git 仓库内时返回 None。
+        """
+        fields = git_snapshot.BACKUP_REF_FIELDS
+        async with self._limit():
+            code, out, _ = await run_git_async(
+                *for_each_ref_args(git_snapshot.BACKUP_REF_PATTERNS, fields), cwd=cwd
+            )
+            if code != 0:
+                return None
+            branches, tip, base = git_snapshot.split_backup_refs(
+                parse_for_each_ref(out, fields)
+            )
+            backups = [git_snapshot.branch_backup(r) for r in branches]
+            if tip is not None:
+                code, log, err = await run_git_async(
+                    *git_snapshot.chain_log_args(tip, base), cwd=cwd
+                )
+                if code == 0:
+                    backups.extend(git_snapshot.parse_chain_log(log))
+                else:
+                    print(f"[WARN] 无法读取备份链：{err.strip()}", file=sys.stderr)
+        return git_snapshot.sort_backups(backups)
+
+    async def snapshot(
+        self,
+        paths: list[str],
+        cwd: str | None = None,
+        storage: str | None = None,
+        backend: str = "auto",
+    ) -> dict:
+        """异步为一组文件/目录创建一个备份（语义同 git_snapshot.py <paths...>）
+
+        返回:
+            {"status": "created" | "skipped" | "failed",
+             "backup": 新备份名（仅 created）, "returncode", "output": 脚本输出}
+            内容与最近备份相同、不在仓库内或无可备份文件时 status 为 "skipped"
+        """
+        cmd = [sys.executable, str(SCRIPT_DIR / "git_snapshot.py"), "--porcelain", *paths]
+        if storage:
+            cmd += ["--storage", storage]
+        if backend != "auto":
+            cmd += ["--backend", backend]
+        env = dict(os.environ, PYTHONIOENCODING="utf-8")
+        async with self._limit():
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=cwd,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            out, _ = await proc.communicate()
+        output = out.decode("utf-8", errors="replace")
+        # --porcelain 的结果行是最后一行；缺失（如脚本异常退出）时按失败处理
+        result = {"status": "failed", "backup": None}
+        head, _, last = output.rstrip("\n").rpartition("\n")
+        try:
+            parsed = json.loads(last)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict) and "status" in parsed:
+            result = parsed
+            output = head + "\n" if head else ""
+        if proc.returncode != 0:
+            result["status"] = "failed"
+        return {**result, "returncode": proc.returncode, "output": output}
+
+
+# ── 模块级便捷函数（共享默认实例） ─────────────────────────
+
+_default: Humanizer | None = None
+
+
+def _client() -> Humanizer:
+    global _default
+    if _default is None:
+        _default = Humanizer()
+    return _default
+
+
+async def check_path(
+    path: str, target_format: str | None = None, section: int | None = None
+) -> list[dict]:
+    return await _client().check_path(path, target_format, section)
+
+
+async def list_backups(cwd: str | None = None) -> list[dict] | None:
+    return await _client().list_backups(cwd)
+
+
+async def snapshot(
+    paths: list[str],
+    cwd: str | None = None,
+    storage: str | None = None,
+    backend: str = "auto",
+) -> dict:
+    return await _client().snapshot(paths, cwd, storage, backend)